@@ -0,0 +1,48 @@
+"""
+Бенчмарк открытия дерева категорий: создание модели
+и первая пачка корневых узлов для широкой (все категории
+в корне) и глубокой (цепочка) иерархии.
+
+Запуск: python benchmarks/bench_category_tree.py [кол-во категорий]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from PySide6 import QtCore  # noqa: E402
+from models.category import Category  # noqa: E402
+from repository.memory_repository import MemoryRepository  # noqa: E402
+from view.category_model import CategoryTreeModel  # noqa: E402
+
+
+def open_tree(repo: MemoryRepository) -> float:
+    start = time.perf_counter()
+    model = CategoryTreeModel(repo)
+    root = QtCore.QModelIndex()
+    if model.canFetchMore(root):
+        model.fetchMore(root)
+    model.index(0, 0).data()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'bench.db')
+        wide = MemoryRepository('CatMemo', db_file, indexes=('parent',))
+        for i in range(n):
+            wide.add(Category(name=f'category {i}', parent=None))
+        deep = MemoryRepository('CatMemo', db_file, indexes=('parent',))
+        parent = None
+        for i in range(n):
+            parent = deep.add(Category(name=f'category {i}', parent=parent))
+        print(f'categories: {n}')
+        print(f'широкое дерево: {open_tree(wide) * 1000:10.2f} ms')
+        print(f'глубокое дерево: {open_tree(deep) * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Микробенчмарк копирования объектов без pk:
+dataclasses.asdict против MemoryRepository.create_copy_without_pk
+(сгенерированный для класса конструктор). Печатает время
+и число выделенных блоков памяти на объект.
+
+Запуск: python benchmarks/bench_clone.py [кол-во объектов]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from models.expense import Expense  # noqa: E402
+from repository.memory_repository import MemoryRepository  # noqa: E402
+
+
+def clone_asdict(obj: Expense) -> Expense:
+    obj_dict = asdict(obj)
+    obj_dict.pop('pk', None)
+    return obj.__class__(**obj_dict)
+
+
+def bench(clone, objects: list[Expense]) -> tuple[float, float]:
+    start = time.perf_counter()
+    for obj in objects:
+        clone(obj)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    copies = [clone(obj) for obj in objects]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    del copies
+    return elapsed, blocks / len(objects)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    now = datetime(2024, 4, 4)
+    objects = [Expense(amount=i, category=i % 20, expense_date=now,
+                       added_date=now, comment=f'expense {i}', pk=i + 1)
+               for i in range(n)]
+    repo = MemoryRepository('Bench', ':memory:')
+    print(f'objects: {n}')
+    for name, clone in (('asdict', clone_asdict),
+                        ('create_copy_without_pk', repo.create_copy_without_pk)):
+        elapsed, blocks = bench(clone, objects)
+        print(f'{name:24} {elapsed * 1000:8.1f} ms  {blocks:6.2f} блоков/объект')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк агрегатов: MemoryRepository (объекты Expense)
+против ColumnarExpenseRepository (столбцы NumPy).
+
+Запуск: python benchmarks/bench_columnar.py [кол-во строк]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from models.expense import Expense  # noqa: E402
+from repository.columnar_repository import ColumnarExpenseRepository  # noqa: E402
+from repository.memory_repository import MemoryRepository  # noqa: E402
+
+
+def make_expenses(n: int) -> list[Expense]:
+    start = datetime(2020, 1, 1)
+    return [Expense(amount=i % 1000, category=i % 20,
+                    expense_date=start + timedelta(minutes=37 * i),
+                    added_date=start, comment=f'expense {i % 50}')
+            for i in range(n)]
+
+
+def build(factory, n: int):
+    tracemalloc.start()
+    repo = factory(make_expenses(n))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return repo, size
+
+
+def memory_repo(expenses: list[Expense]) -> MemoryRepository:
+    repo = MemoryRepository('Bench', ':memory:',
+                            sorted_indexes=('expense_date',))
+    for expense in expenses:
+        repo.add(expense)
+    return repo
+
+
+def bench(repo, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        repo.sum_amount(('month', 'category'))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f'rows: {n}')
+    for name, factory in (('MemoryRepository', memory_repo),
+                          ('ColumnarExpenseRepository',
+                           ColumnarExpenseRepository)):
+        repo, size = build(factory, n)
+        print(f'{name:26} {size / n:7.0f} байт/строку  '
+              f'sum_amount(month, category): {bench(repo) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Бенчмарк времени до первого окна: импорт главного окна,
+создание QApplication и MainApp и показ окна. Каждый замер -
+отдельный процесс, чтобы импорты не кэшировались; база -
+пустая, во временном каталоге. Печатает также, загружены ли
+при старте библиотеки графиков.
+
+Запуск: python benchmarks/bench_first_window.py [кол-во запусков]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BOOKKEEPER = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from PySide6 import QtWidgets
+from view.Main_window import MainApp
+imported = time.perf_counter()
+app = QtWidgets.QApplication([])
+window = MainApp()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'total': shown - start,
+    'heavy': sorted(name for name in ('networkx', 'matplotlib')
+                    if name in sys.modules),
+}))
+"""
+
+
+def first_window() -> dict:
+    env = dict(os.environ, PYTHONPATH=BOOKKEEPER)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    with tempfile.TemporaryDirectory() as tmp:
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=tmp, env=env,
+            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    runs = [first_window() for _ in range(repeat)]
+    best = min(runs, key=lambda run: run['total'])
+    print(f'импорт:         {best["import"] * 1000:8.1f} ms')
+    print(f'первое окно:    {best["total"] * 1000:8.1f} ms')
+    print(f'графики при старте: {", ".join(best["heavy"]) or "нет"}')
+
+
+if __name__ == '__main__':
+    main()
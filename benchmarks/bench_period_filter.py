@@ -0,0 +1,81 @@
+"""
+Бенчмарк проверки дат на попадание в период: прежняя
+построчная проверка (разбор строки даты и сегодняшней даты
+на каждый вызов), PeriodFilter.contains и векторная
+PeriodFilter.mask по массиву datetime64 и по секундам эпохи.
+
+Запуск: python benchmarks/bench_period_filter.py [кол-во дат]
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from utils import PeriodFilter  # noqa: E402
+
+
+def old_date_is_in_range(period: str, year: str, month: str,
+                         day: str) -> bool:
+    """ Проверка до PeriodFilter: для сравнения """
+    this_year, this_month, this_day = map(
+        int,
+        str(datetime.date.today()).split()[0].split("-"))
+    year, month, day = int(year), int(month), int(day)
+    if this_year != year:
+        return False
+    if period == 'Day':
+        return this_day == day and this_month == month
+    if period == 'Week':
+        today_date = datetime.date(this_year, this_month, this_day)
+        target_date = datetime.date(year, month, day)
+        week_start = today_date - datetime.timedelta(
+            days=today_date.weekday())
+        week_end = week_start + datetime.timedelta(days=6)
+        return week_start <= target_date <= week_end
+    return this_month == month
+
+
+def per_row(label: str, seconds: float, n: int) -> None:
+    print(f'{label:28} {seconds * 1000:9.1f} ms  '
+          f'{seconds / n * 1e9:8.1f} ns/дата')
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    today = datetime.datetime.combine(datetime.date.today(),
+                                      datetime.time())
+    offsets = rng.integers(-400 * 86400, 0, n)
+    seconds = ((today - datetime.datetime(1970, 1, 1))
+               // datetime.timedelta(seconds=1)) + offsets
+    dates64 = seconds.astype('datetime64[s]')
+    moments = dates64.astype(datetime.datetime).tolist()
+    print(f'dates: {n}, период: Month')
+
+    start = time.perf_counter()
+    old = [old_date_is_in_range('Month', *str(moment).split()[0].split('-'))
+           for moment in moments]
+    per_row('date_is_in_range (прежняя)', time.perf_counter() - start, n)
+
+    start = time.perf_counter()
+    period = PeriodFilter.for_period('Month')
+    new = [period.contains(moment) for moment in moments]
+    per_row('PeriodFilter.contains', time.perf_counter() - start, n)
+
+    start = time.perf_counter()
+    mask = period.mask(dates64)
+    per_row('PeriodFilter.mask datetime64', time.perf_counter() - start, n)
+
+    start = time.perf_counter()
+    seconds_mask = period.mask(seconds)
+    per_row('PeriodFilter.mask секунды', time.perf_counter() - start, n)
+
+    assert old == new == mask.tolist() == seconds_mask.tolist()
+
+
+if __name__ == '__main__':
+    main()
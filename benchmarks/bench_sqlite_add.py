@@ -0,0 +1,50 @@
+"""
+Бенчмарк записи расходов в SQLite:
+построчный SQLiteRepository.add против пакетного add_many.
+
+Запуск: python benchmarks/bench_sqlite_add.py [кол-во строк]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from models.expense import Expense  # noqa: E402
+from repository.sqlite_repository import SQLiteRepository  # noqa: E402
+
+
+def make_expenses(n: int) -> list[Expense]:
+    now = datetime(2024, 4, 4)
+    return [Expense(amount=i % 1000, category=i % 20,
+                    expense_date=now, added_date=now,
+                    comment=f'expense {i}')
+            for i in range(n)]
+
+
+def bench(n: int, bulk: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteRepository(os.path.join(tmp, 'bench.db'), Expense)
+        expenses = make_expenses(n)
+        start = time.perf_counter()
+        if bulk:
+            repo.add_many(expenses)
+        else:
+            for expense in expenses:
+                repo.add(expense)
+        elapsed = time.perf_counter() - start
+        repo.manager.close(repo.db_file)
+    return n / elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f'rows: {n}')
+    print(f'add (по одной):  {bench(n, bulk=False):12.0f} rows/sec')
+    print(f'add_many:        {bench(n, bulk=True):12.0f} rows/sec')
+
+
+if __name__ == '__main__':
+    main()
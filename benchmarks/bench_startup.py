@@ -0,0 +1,54 @@
+"""
+Бенчмарк холодного и тёплого старта MemoryRepository:
+загрузка всей таблицы из SQLite, из бинарного снимка
+и ленивый режим (только метаданные).
+
+Запуск: python benchmarks/bench_startup.py [кол-во строк]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bookkeeper'))
+
+from models.expense import Expense  # noqa: E402
+from repository.connection import connections  # noqa: E402
+from repository.memory_repository import MemoryRepository  # noqa: E402
+
+
+def fill(db_file: str, n: int) -> None:
+    repo = MemoryRepository('ExpMemo', db_file, use_snapshot=True)
+    start = datetime(2020, 1, 1)
+    for i in range(n):
+        repo.add(Expense(amount=i % 1000, category=i % 20,
+                         expense_date=start + timedelta(minutes=i),
+                         added_date=start, comment=f'expense {i}'))
+    repo.copy_to_sqlite()
+
+
+def bench(db_file: str, repeat: int = 5, **options) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        connections.close(db_file)
+        start = time.perf_counter()
+        MemoryRepository('ExpMemo', db_file, **options)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'bench.db')
+        fill(db_file, n)
+        print(f'rows: {n}')
+        print(f'SQLite:      {bench(db_file) * 1000:10.1f} ms')
+        print(f'снимок:      {bench(db_file, use_snapshot=True) * 1000:10.1f} ms')
+        print(f'lazy:        {bench(db_file, lazy=True) * 1000:10.1f} ms')
+        connections.close(db_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,9 @@ class Budget:
     """
     This is a model of user's budget
     it contains time, which can be
-    [day, week, month, None]
+    [day, week, month, quarter, year,
+    same month last year, last N days,
+    from..to, None] (see utils.period_bounds)
     (period when U did buings)
     sum - spent money
     budget - free money U have
@@ -26,7 +28,7 @@ class Budget:
                  time: str = 'Empty',
                  spent_sum: float = 0,
                  budget: float = 0):
-        if time not in ['Day', 'Week', 'Month', 'Empty']:
+        if time == 'all' or not utils.is_period(time):
             raise ValueError('Unknown period type!!!1!')
 
     def update_spent_sum(
@@ -43,11 +45,17 @@ class Budget:
             float: Разница между бюджетом и суммой расходов.
         """
 
-        expenses_list = expenses_repo.get_all()
-        for exp in expenses_list:
-            pure_date = str(exp.expense_date).split()[0]
-            year, month, day = pure_date.split("-")
-
-            if utils.date_is_in_range(self.time, year, month, day):
+        period = utils.PeriodFilter.for_period(self.time)
+        if period.bounds is None:
+            return self.budget - self.spent_sum
+        if hasattr(expenses_repo, 'sum_amount'):
+            # сумму за период считает сам репозиторий,
+            # не выгружая все расходы
+            total = expenses_repo.sum_amount(date_range=period.bounds)[()]
+            self.spent_sum += float(total)
+            return self.budget - self.spent_sum
+
+        for exp in expenses_repo.get_all():
+            if period.contains(exp.expense_date):
                 self.spent_sum += float(exp.amount)
         return self.budget - self.spent_sum
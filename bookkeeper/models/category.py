@@ -3,7 +3,7 @@ from typing import Union
 from repository.abstract_repository import AbstractRepository
 
 
-@dataclass
+@dataclass(slots=True)
 class Category:
     """
     Категория расходов, хранит название в
@@ -15,6 +15,9 @@ class Category:
     parent: Union[int, None]
     pk: int = 0
 
+    # индексы таблицы category в SQLite
+    indexes = ('parent', 'name')
+
     def get_parent(self,
             repo: AbstractRepository['Category']) -> 'Category | None':
         """
@@ -12,3 +12,6 @@ class Expense:
         = field(default_factory=datetime.now)
     comment: str = ""
     pk: int = 0
+
+    # индексы таблицы expense в SQLite
+    indexes = ('expense_date', 'category')
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Generic, TypeVar, Any, List, Protocol
+from repository.events import ChangeEvent, ChangeKind, Subscriber
 
 
 class Model(Protocol):
@@ -39,3 +40,25 @@ class AbstractRepository(ABC, Generic[T]):
         condition in the form of a dictionary {'field_name': value}
         if no condition is provided (by default), return all records
         """
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """
+        Subscribe to change events: callback(ChangeEvent)
+        is called after every add, update and delete.
+        """
+        if '_subscribers' not in self.__dict__:
+            self._subscribers: list[Subscriber] = []
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        """ Stop sending change events to callback """
+        self.__dict__.get('_subscribers', []).remove(callback)
+
+    def _notify(self, kind: ChangeKind, pk: int, obj: Any = None) -> None:
+        """ Send a change event to all subscribers """
+        subscribers = self.__dict__.get('_subscribers')
+        if not subscribers:
+            return
+        event = ChangeEvent(kind, pk, obj)
+        for callback in list(subscribers):
+            callback(event)
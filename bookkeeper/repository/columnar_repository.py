@@ -0,0 +1,406 @@
+from datetime import date, datetime, timedelta
+from itertools import count
+from typing import Any, Iterable, Iterator, List
+
+import numpy as np
+
+from repository.abstract_repository import AbstractRepository
+from repository.events import ChangeKind
+from repository.sqlite_repository import (EPOCH, SQLiteRepository,
+                                          adapt_datetime)
+from models.expense import Expense
+import utils
+
+# категория None хранится в столбце целых чисел так
+NO_CATEGORY = -1
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _seconds(value: datetime | str) -> int:
+    """ Дата (или строка ISO) в секундах от начала эпохи """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return adapt_datetime(value)
+
+
+def _month_start(months: int) -> date:
+    """ Первое число месяца с номером months от января 1970 """
+    return date(1970 + months // 12, months % 12 + 1, 1)
+
+
+class ColumnarExpenseRepository(AbstractRepository[Expense]):
+    """
+    Репозиторий расходов в памяти, хранящий их по столбцам:
+    сумма, категория, даты (секунды от начала эпохи) и pk -
+    в массивах NumPy, комментарии - в пуле строк, а в столбце
+    лежит номер строки в пуле. Суммы и фильтры по периодам
+    считаются векторно, объекты Expense создаются только
+    при выдаче из репозитория.
+    """
+    COLUMNS: dict[str, type] = {
+        'amount': np.int64,
+        'category': np.int64,
+        'expense_date': np.int64,
+        'added_date': np.int64,
+        'comment': np.int32,
+        'pk': np.int64,
+    }
+
+    def __init__(self, expenses: Iterable[Expense] = ()) -> None:
+        """
+        Инициализирует репозиторий.
+
+        Args:
+            expenses (Iterable[Expense]): Расходы для загрузки.
+            Заполненные pk сохраняются, остальным выдаются новые.
+        """
+        self._columns = {name: np.empty(16, dtype)
+                         for name, dtype in self.COLUMNS.items()}
+        self._size = 0
+        # pk -> номер строки в столбцах
+        self._rows: dict[int, int] = {}
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        expenses = list(expenses)
+        for expense in expenses:
+            if expense.pk:
+                self._append(self._row_values(expense, expense.pk))
+        self._counter = count(max(self._rows, default=0) + 1)
+        for expense in expenses:
+            if not expense.pk:
+                self.add(expense)
+
+    @classmethod
+    def from_sqlite(
+            cls, table: SQLiteRepository) -> 'ColumnarExpenseRepository':
+        """
+        Загружает таблицу expense сразу в столбцы,
+        не создавая объектов Expense.
+
+        Args:
+            table (SQLiteRepository): Таблица расходов.
+
+        Returns:
+            ColumnarExpenseRepository: Репозиторий с данными таблицы.
+        """
+        repo = cls()
+        cursor = table.connection.cursor()
+        try:
+            # CAST убирает объявленный тип столбца,
+            # поэтому даты приходят числами, а не datetime
+            cursor.execute(
+                "SELECT amount, category, "
+                "CAST(expense_date AS INTEGER), CAST(added_date AS INTEGER), "
+                f"comment, pk FROM {table.table_name}")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not rows:
+            return repo
+        amounts, categories, expense_dates, added_dates, comments, pks \
+            = zip(*rows)
+        repo._reserve(len(rows))
+        size = len(rows)
+        columns = repo._columns
+        columns['amount'][:size] = amounts
+        columns['category'][:size] = [
+            NO_CATEGORY if category is None else category
+            for category in categories]
+        columns['expense_date'][:size] = expense_dates
+        columns['added_date'][:size] = added_dates
+        columns['comment'][:size] = [
+            repo._string_id(comment or '') for comment in comments]
+        columns['pk'][:size] = pks
+        repo._size = size
+        repo._rows = {pk: row for row, pk in enumerate(pks)}
+        repo._counter = count(max(pks) + 1)
+        return repo
+
+    def count(self) -> int:
+        """ Число расходов в репозитории """
+        return self._size
+
+    def _column(self, name: str) -> np.ndarray:
+        """ Заполненная часть столбца (без копирования) """
+        return self._columns[name][:self._size]
+
+    def _reserve(self, extra: int) -> None:
+        """ Увеличивает столбцы (вдвое), чтобы вместить ещё extra строк """
+        needed = self._size + extra
+        capacity = len(self._columns['pk'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _string_id(self, text: str) -> int:
+        """ Номер строки в пуле, строка добавляется при необходимости """
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(text)
+            self._string_ids[text] = string_id
+        return string_id
+
+    def _row_values(self, obj: Expense, pk: int) -> dict[str, int]:
+        """ Значения столбцов для расхода """
+        return {
+            'amount': obj.amount,
+            'category': (NO_CATEGORY if obj.category is None
+                         else obj.category),
+            'expense_date': _seconds(obj.expense_date),
+            'added_date': _seconds(obj.added_date),
+            'comment': self._string_id(obj.comment),
+            'pk': pk,
+        }
+
+    def _append(self, values: dict[str, int]) -> None:
+        """ Добавляет строку в конец столбцов """
+        self._reserve(1)
+        row = self._size
+        for name, value in values.items():
+            self._columns[name][row] = value
+        self._rows[values['pk']] = row
+        self._size += 1
+
+    def _materialize(self, row: int) -> Expense:
+        """ Создает объект Expense из строки столбцов """
+        columns = self._columns
+        category = int(columns['category'][row])
+        return Expense(
+            amount=int(columns['amount'][row]),
+            category=None if category == NO_CATEGORY else category,
+            expense_date=EPOCH + timedelta(
+                seconds=int(columns['expense_date'][row])),
+            added_date=EPOCH + timedelta(
+                seconds=int(columns['added_date'][row])),
+            comment=self._strings[columns['comment'][row]],
+            pk=int(columns['pk'][row]))
+
+    def _materialize_all(self, rows: np.ndarray) -> List[Expense]:
+        """ Объекты для строк rows в их порядке """
+        return [self._materialize(row) for row in rows.tolist()]
+
+    def add(self, obj: Expense) -> int:
+        """
+        Добавляет расход.
+
+        Args:
+            obj (Expense): Расход с pk == 0.
+
+        Returns:
+            int: Идентификатор добавленного расхода.
+        """
+        if getattr(obj, 'pk', None) != 0:
+            raise ValueError(
+                f'trying to add object {obj} with filled `pk` attribute')
+        pk = next(self._counter)
+        self._append(self._row_values(obj, pk))
+        obj.pk = pk
+        self._notify(ChangeKind.ADDED, pk, obj)
+        return pk
+
+    def get(self, pk: int) -> Expense | None:
+        """
+        Получает расход по первичному ключу.
+
+        Args:
+            pk (int): Идентификатор расхода.
+
+        Returns:
+            Expense | None: Новый объект или None, если расхода нет.
+        """
+        row = self._rows.get(pk)
+        if row is None:
+            return None
+        return self._materialize(row)
+
+    def get_all(self,
+                where: dict[str, Any] | None = None) -> List[Expense]:
+        """
+        Получает расходы в порядке pk. Условие проверяется
+        векторно, объекты создаются только для подходящих строк.
+
+        Args:
+            where (dict[str, Any] | None): Условие вида
+            {'название_поля': значение}, все условия
+            объединяются через AND. Без условия - все записи.
+
+        Returns:
+            List[Expense]: Список расходов.
+        """
+        rows = np.flatnonzero(self.mask(where))
+        order = np.argsort(self._column('pk')[rows], kind='stable')
+        return self._materialize_all(rows[order])
+
+    def mask(self, where: dict[str, Any] | None = None) -> np.ndarray:
+        """
+        Булев массив строк, удовлетворяющих условию
+        (в порядке хранения, без создания объектов).
+
+        Args:
+            where (dict[str, Any] | None): Условие как в get_all.
+
+        Returns:
+            np.ndarray: Маска длины count().
+        """
+        mask = np.ones(self._size, dtype=bool)
+        for field, value in (where or {}).items():
+            if field not in self.COLUMNS:
+                raise ValueError(f'unknown field {field!r} for expense')
+            if field in ('expense_date', 'added_date'):
+                value = _seconds(value)
+            elif field == 'category' and value is None:
+                value = NO_CATEGORY
+            elif field == 'comment':
+                value = self._string_ids.get(value, -1)
+            mask &= self._column(field) == value
+        return mask
+
+    def update(self, obj: Expense) -> None:
+        """
+        Обновляет расход.
+
+        Args:
+            obj (Expense): Расход с заполненным pk.
+        """
+        if obj.pk == 0:
+            raise ValueError(
+                'attempt to update object with unknown primary key')
+        row = self._rows[obj.pk]
+        for name, value in self._row_values(obj, obj.pk).items():
+            self._columns[name][row] = value
+        self._notify(ChangeKind.UPDATED, obj.pk, obj)
+
+    def delete(self, pk: int) -> None:
+        """
+        Удаляет расход: на его место переносится последняя строка,
+        так что столбцы остаются без пропусков.
+
+        Args:
+            pk (int): Идентификатор расхода.
+        """
+        row = self._rows.pop(pk)
+        last = self._size - 1
+        if row != last:
+            for column in self._columns.values():
+                column[row] = column[last]
+            self._rows[int(self._columns['pk'][row])] = row
+        self._size = last
+        self._notify(ChangeKind.DELETED, pk)
+
+    def date_mask(self, start: datetime | None = None,
+                  end: datetime | None = None) -> np.ndarray:
+        """
+        Маска строк, у которых start <= expense_date < end.
+        Границу None не проверяют.
+
+        Args:
+            start (datetime | None): Нижняя граница (включительно).
+            end (datetime | None): Верхняя граница (не включительно).
+
+        Returns:
+            np.ndarray: Маска длины count().
+        """
+        return utils.PeriodFilter(start, end).mask(
+            self._column('expense_date'))
+
+    def range(self, start: datetime | None = None,
+              end: datetime | None = None) -> Iterator[Expense]:
+        """
+        Перебирает расходы, у которых start <= expense_date < end,
+        в порядке возрастания даты (при равных датах - pk).
+
+        Args:
+            start (datetime | None): Нижняя граница (включительно).
+            end (datetime | None): Верхняя граница (не включительно).
+
+        Yields:
+            Expense: Расходы из диапазона.
+        """
+        rows = np.flatnonzero(self.date_mask(start, end))
+        order = np.lexsort((self._column('pk')[rows],
+                            self._column('expense_date')[rows]))
+        for row in rows[order].tolist():
+            yield self._materialize(row)
+
+    def sum_amount(
+        self,
+        group_by: Iterable[str] = (),
+        date_range: tuple[datetime, datetime] | None = None
+    ) -> dict[tuple, int]:
+        """
+        Сумма amount с группировкой, посчитанная векторно.
+
+        Args:
+            group_by (Iterable[str]): Поля группировки: category,
+            comment или период: day, week, month.
+            date_range (tuple[datetime, datetime] | None):
+            Полуинтервал дат [начало, конец).
+
+        Returns:
+            dict[tuple, int]: Как у SQLiteRepository.sum_amount.
+        """
+        group_by = list(group_by)
+        mask = (self.date_mask(*date_range) if date_range is not None
+                else np.ones(self._size, dtype=bool))
+        amounts = self._column('amount')[mask]
+        if not group_by:
+            return {(): int(amounts.sum())}
+        keys = [self._group_keys(group, mask) for group in group_by]
+        if not len(amounts):
+            return {}
+        # ключи группировки кодируются номерами своих значений
+        # и сворачиваются в один код строки
+        values = []
+        codes = np.zeros(len(amounts), dtype=np.int64)
+        for key in keys:
+            unique, inverse = np.unique(key, return_inverse=True)
+            codes = codes * len(unique) + inverse.ravel()
+            values.append(unique.tolist())
+        # суммы по группам - в целых числах, как и без группировки:
+        # строки сортируются по коду, и каждая группа сворачивается
+        # np.add.reduceat в int64, без float-весов bincount
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = np.flatnonzero(
+            np.concatenate(([True], codes[1:] != codes[:-1])))
+        groups = codes[starts]
+        totals = np.add.reduceat(amounts[order], starts)
+        positions = np.unravel_index(groups, [len(v) for v in values])
+        return {
+            tuple(self._group_value(group, group_values[position])
+                  for group, group_values, position
+                  in zip(group_by, values, key)): total
+            for key, total in zip(zip(*(p.tolist() for p in positions)),
+                                  totals.tolist())}
+
+    def _group_keys(self, group: str, mask: np.ndarray) -> np.ndarray:
+        """ Целочисленный ключ группировки для строк по маске """
+        if group in ('category', 'comment'):
+            return self._column(group)[mask]
+        days = self._column('expense_date')[mask] // SECONDS_PER_DAY
+        if group == 'day':
+            return days
+        if group == 'week':
+            # 1970-01-01 - четверг, понедельник имеет номер 0
+            return days - (days + 3) % 7
+        if group == 'month':
+            return days.astype('datetime64[D]').astype(
+                'datetime64[M]').astype(np.int64)
+        raise ValueError(f'unknown group {group!r}')
+
+    def _group_value(self, group: str, key: int) -> Any:
+        """ Значение группы в ответе по её целочисленному ключу """
+        if group == 'category':
+            return None if key == NO_CATEGORY else key
+        if group == 'comment':
+            return self._strings[key]
+        if group == 'month':
+            return _month_start(key)
+        return EPOCH.date() + timedelta(days=key)
@@ -0,0 +1,211 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionManager:
+    """
+    Выдает соединения с SQLite: по одному на каждый поток
+    и файл базы данных. Все репозитории одного потока
+    работают через общее соединение. Базы открываются
+    в режиме WAL, так что чтение не блокирует запись.
+    """
+    DEFAULT_PRAGMAS: dict[str, Any] = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+    def __init__(self, pragmas: dict[str, Any] | None = None) -> None:
+        """
+        Инициализирует менеджер соединений.
+
+        Args:
+            pragmas (dict[str, Any] | None): PRAGMA, выполняемые
+            для каждого нового соединения, поверх DEFAULT_PRAGMAS.
+        """
+        self.pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})}
+        self._connections: dict[tuple[int, str], sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        # открытые единицы работы: глубина вложенности и
+        # функции, которые нужно вызвать после фиксации,
+        # отдельным списком для каждого уровня вложенности
+        self._unit_depth: dict[tuple[int, str], int] = {}
+        self._after_commit: dict[
+            tuple[int, str], list[list[Callable[[], Any]]]] = {}
+
+    @staticmethod
+    def _key(db_file: str) -> tuple[int, str]:
+        """ Ключ соединения: поток и абсолютный путь к базе """
+        if db_file != ':memory:':
+            db_file = os.path.abspath(db_file)
+        return threading.get_ident(), db_file
+
+    def get(self, db_file: str) -> sqlite3.Connection:
+        """
+        Соединение текущего потока с базой db_file.
+        Создается при первом обращении.
+
+        Args:
+            db_file (str): Имя файла базы данных.
+
+        Returns:
+            sqlite3.Connection: Соединение.
+        """
+        key = self._key(db_file)
+        connection = self._connections.get(key)
+        if connection is None:
+            connection = self._connect(db_file)
+            with self._lock:
+                self._connections[key] = connection
+        return connection
+
+    def _connect(self, db_file: str) -> sqlite3.Connection:
+        """ Открывает соединение и применяет PRAGMA """
+        # соединение используется только своим потоком,
+        # но закрыть его при завершении можно из любого
+        connection = sqlite3.connect(
+            db_file,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False)
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
+
+    def in_unit_of_work(self, db_file: str) -> bool:
+        """ Открыта ли в текущем потоке единица работы с базой """
+        return self._unit_depth.get(self._key(db_file), 0) > 0
+
+    def begin(self, db_file: str) -> None:
+        """
+        Начинает единицу работы: до парного end() репозитории
+        этого потока не фиксируют транзакцию сами.
+        Вложенные вызовы входят во внешнюю транзакцию
+        как точки сохранения (SAVEPOINT): откат вложенной
+        единицы отменяет только её изменения.
+
+        Args:
+            db_file (str): Имя файла базы данных.
+
+        Raises:
+            RuntimeError: У соединения уже есть открытая транзакция
+            вне единицы работы: её нельзя ни молча зафиксировать,
+            ни молча откатить.
+        """
+        key = self._key(db_file)
+        depth = self._unit_depth.get(key, 0)
+        if depth == 0:
+            connection = self.get(db_file)
+            if connection.in_transaction:
+                raise RuntimeError(
+                    f'unexpected open transaction on {db_file!r}')
+            connection.execute("BEGIN IMMEDIATE")
+            self._after_commit[key] = []
+        else:
+            self.get(db_file).execute(f"SAVEPOINT unit_{depth}")
+        self._after_commit[key].append([])
+        self._unit_depth[key] = depth + 1
+
+    def end(self, db_file: str, commit: bool = True) -> None:
+        """
+        Завершает единицу работы. Внешний вызов фиксирует
+        транзакцию (или откатывает её, если commit=False).
+        Вложенный освобождает свою точку сохранения или
+        откатывается к ней; функции after_commit отменённой
+        вложенной единицы отбрасываются.
+        Если фиксация не удалась, транзакция откатывается,
+        а ошибка передаётся дальше. Функции after_commit
+        вызываются все: ошибка одной записывается в журнал
+        и не мешает остальным, данные к этому моменту
+        уже зафиксированы.
+
+        Args:
+            db_file (str): Имя файла базы данных.
+            commit (bool): Фиксировать ли изменения.
+        """
+        key = self._key(db_file)
+        depth = self._unit_depth[key] - 1
+        connection = self.get(db_file)
+        if depth > 0:
+            self._unit_depth[key] = depth
+            levels = self._after_commit[key]
+            callbacks = levels.pop()
+            if commit:
+                levels[-1].extend(callbacks)
+            else:
+                connection.execute(f"ROLLBACK TO SAVEPOINT unit_{depth}")
+            connection.execute(f"RELEASE SAVEPOINT unit_{depth}")
+            return
+        del self._unit_depth[key]
+        callbacks, = self._after_commit.pop(key)
+        if not commit:
+            connection.rollback()
+            return
+        try:
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception('after-commit callback %r failed', callback)
+
+    def after_commit(self, db_file: str, callback: Callable[[], Any]) -> None:
+        """
+        Вызывает callback после фиксации текущей единицы работы
+        (при откате он отбрасывается). Вне единицы работы
+        вызывает сразу.
+
+        Args:
+            db_file (str): Имя файла базы данных.
+            callback (Callable[[], Any]): Функция без аргументов.
+        """
+        levels = self._after_commit.get(self._key(db_file))
+        if levels is None:
+            callback()
+        else:
+            levels[-1].append(callback)
+
+    def close(self, db_file: str | None = None) -> None:
+        """
+        Закрывает соединения всех потоков с базой db_file,
+        а без аргумента - вообще все соединения.
+
+        Args:
+            db_file (str | None): Имя файла базы данных.
+        """
+        path = None if db_file is None else self._key(db_file)[1]
+        self._close_where(lambda key: path is None or key[1] == path)
+
+    def close_current_thread(self) -> None:
+        """
+        Закрывает все соединения текущего потока. Потоки пула
+        завершаются, когда простаивают, и их соединения иначе
+        оставались бы открытыми до выхода из программы.
+        """
+        thread = threading.get_ident()
+        self._close_where(lambda key: key[0] == thread)
+
+    def _close_where(
+            self, condition: Callable[[tuple[int, str]], bool]) -> None:
+        """ Закрывает соединения, ключ которых удовлетворяет condition """
+        with self._lock:
+            keys = [key for key in self._connections if condition(key)]
+            connections = [self._connections.pop(key) for key in keys]
+        for connection in connections:
+            if connection.in_transaction:
+                connection.rollback()
+            connection.close()
+
+
+connections = ConnectionManager()
+atexit.register(connections.close)
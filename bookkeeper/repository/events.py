@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable
+
+
+class ChangeKind(Enum):
+    """ Вид изменения объекта в репозитории """
+    ADDED = 'added'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """
+    Событие об изменении одного объекта репозитория.
+    obj - объект после изменения, для удалённого -
+    удалённый объект (None, если репозиторий его не хранит).
+    """
+    kind: ChangeKind
+    pk: int
+    obj: Any = None
+
+
+Subscriber = Callable[[ChangeEvent], None]
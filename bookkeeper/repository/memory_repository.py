@@ -1,11 +1,94 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
 from itertools import count
-from typing import Any, Optional
-from dataclasses import asdict
+from typing import Any, Callable, Iterable, Iterator, Optional
+from dataclasses import fields
+from functools import cache
+from inspect import Parameter, get_annotations, signature
+from operator import attrgetter
 from repository.abstract_repository import AbstractRepository, T
+from repository.events import ChangeKind
 from models.category import Category
 from models.expense import Expense
-import sqlite3
-from repository.sqlite_repository import SQLiteRepository
+from repository.sqlite_repository import SQL_TYPES, SQLiteRepository, sql_type
+from repository import snapshot
+
+_MISSING = object()
+
+
+def _as_datetime(value: Any) -> Any:
+    """
+    Приводит дату, пришедшую строкой ISO или как date, к datetime.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time())
+    return value
+
+
+@cache
+def _datetime_fields(cls: type) -> frozenset[str]:
+    """ Поля модели cls, объявленные как datetime (и Optional[datetime]) """
+    return frozenset(
+        field for field, annotation
+        in get_annotations(cls, eval_str=True).items()
+        if sql_type(annotation) == SQL_TYPES[datetime])
+
+
+def _sort_key(value: Any, is_datetime: bool = False) -> tuple[bool, Any]:
+    """
+    Приводит значение к виду, пригодному для сортированного индекса.
+    Значения полей-дат (is_datetime) становятся datetime. None идёт
+    раньше остальных значений, как NULL в SQLite, и не сравнивается
+    с ними: ключ - (value is not None, value).
+    """
+    if value is None:
+        return False, None
+    if is_datetime:
+        value = _as_datetime(value)
+    return True, value
+
+
+@cache
+def _cloner(cls: type) -> Callable[[Any], Any]:
+    """
+    Функция неглубокого копирования объектов dataclass cls
+    без pk. Собирается один раз на класс: значения полей
+    читает operator.attrgetter, и они передаются в конструктор
+    позиционно - без asdict, промежуточного dict и рекурсивного
+    копирования полей. Если порядок параметров конструктора
+    не совпадает с порядком полей (свой __init__), значения
+    передаются по именам.
+    """
+    names = [field.name for field in fields(cls)
+             if field.init and field.name != 'pk']
+    if not names:
+        return lambda obj: cls()
+    getter = attrgetter(*names)
+    positional = [
+        parameter.name
+        for parameter in signature(cls).parameters.values()
+        if parameter.kind in (Parameter.POSITIONAL_ONLY,
+                              Parameter.POSITIONAL_OR_KEYWORD)]
+    if positional[:len(names)] != names:
+        if len(names) == 1:
+            return lambda obj: cls(**{names[0]: getter(obj)})
+        return lambda obj: cls(**dict(zip(names, getter(obj))))
+    if len(names) == 1:
+        # attrgetter одного поля возвращает значение, а не кортеж
+        return lambda obj: cls(getter(obj))
+    return lambda obj: cls(*getter(obj))
+
+
+# начало периода, в который попадает дата, для группировки сумм
+PERIOD_KEYS: dict[str, Callable[[datetime], date]] = {
+    'day': lambda moment: moment.date(),
+    'week': lambda moment: (
+        moment.date() - timedelta(days=moment.weekday())),
+    'month': lambda moment: moment.date().replace(day=1),
+}
 
 
 class MemoryRepository(AbstractRepository[T]):
@@ -13,56 +96,382 @@ class MemoryRepository(AbstractRepository[T]):
     """
     This repo works in the RAM and contains all the data in the dict
     """
-    def __init__(self, memory_name: str, db_file: str) -> None:
+    def __init__(self, memory_name: str, db_file: str,
+                 indexes: Iterable[str] = (),
+                 sorted_indexes: Iterable[str] = (),
+                 lazy: bool = False,
+                 use_snapshot: bool = False) -> None:
         """
         Инициализирует объект MemoryRepository.
 
         Args:
             memory_name (str): Имя репозитория в памяти.
             db_file (str): Имя файла базы данных.
+            indexes (Iterable[str]): Поля, по которым строятся
+            вторичные индексы (значение -> множество pk).
+            sorted_indexes (Iterable[str]): Поля, по которым
+            строятся сортированные индексы для range().
+            lazy (bool): Не читать таблицу при создании: сразу
+            загружаются только число строк и наибольший pk,
+            а сами объекты - при первом обращении к данным.
+            use_snapshot (bool): Загружать объекты из бинарного
+            снимка таблицы, если он актуален, и обновлять снимок
+            после каждого сохранения.
         """
         self.memory_name = memory_name
         self._container: dict[int, T] = {}
+        self._indexes: dict[str, dict[Any, set[int]]] = {
+            field: {} for field in indexes}
+        # отсортированные списки пар (значение, pk)
+        self._sorted_indexes: dict[str, list[tuple[Any, int]]] = {
+            field: [] for field in sorted_indexes}
+        # значения, под которыми объект лежит в индексах:
+        # объект могут изменить на месте до вызова update()
+        self._indexed_values: dict[int, dict[str, Any]] = {}
         self._counter = count(1)
+        # pk, изменённые с последней синхронизации с SQLite
+        self._inserted: set[int] = set()
+        self._updated: set[int] = set()
+        self._deleted: set[int] = set()
         self.db_file = db_file
         self.expense_table = SQLiteRepository(db_file, Expense)
         self.category_table = SQLiteRepository(db_file, Category)
-        self.get_everything_from_db()
+        self.use_snapshot = use_snapshot
+        self._loaded = not lazy
+        # загрузка может идти в фоновом потоке: _load_lock не даёт
+        # загрузить таблицу дважды, а _lock делает выдачу pk в add()
+        # и подмену контейнера загруженным одним шагом
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._db_count = 0
+        if lazy:
+            self._load_metadata()
+        else:
+            self.get_everything_from_db()
+
+    def _sqlite_table(self) -> SQLiteRepository | None:
+        """
+        SQLiteRepository, с которым синхронизируется этот репозиторий.
+        """
+        if self.memory_name == 'ExpMemo':
+            return self.expense_table
+        if self.memory_name == 'CatMemo':
+            return self.category_table
+        return None
 
     def get_everything_from_db(self) -> None:
         """
         Получает данные из SQLiteRepository и загружает их в память.
+        Объекты сохраняют свои pk из базы данных. Если включены
+        снимки и снимок актуален, база не читается.
         """
-        if self.memory_name == 'ExpMemo':
-            expenses = self.expense_table.get_all()
-            for expense in expenses:
-                self.add_without_pk(expense)
-        elif self.memory_name == 'CatMemo':
-            categories = self.category_table.get_all()
-            for category in categories:
-                self.add_without_pk(category)
+        for pk, obj in self._read_from_db().items():
+            self._container[pk] = obj
+            self._index_add(pk, obj)
+        self._counter = count(max(self._container, default=0) + 1)
+
+    def _read_from_db(self) -> dict[int, T]:
+        """
+        Читает объекты таблицы (или её снимка) в новый словарь
+        pk -> объект, не трогая состояния репозитория.
+        """
+        table = self._sqlite_table()
+        if table is None:
+            return {}
+        rows = snapshot.read_snapshot(table) if self.use_snapshot else None
+        objects = (table.iter_all() if rows is None
+                   else map(table.from_row, rows))
+        return {obj.pk: obj for obj in objects}
+
+    def _load_metadata(self) -> None:
+        """
+        Загружает из SQLite только число строк и наибольший pk,
+        чтобы новые объекты получали pk, не занятые в базе.
+        """
+        table = self._sqlite_table()
+        if table is None:
+            self._loaded = True
+            return
+        self._db_count, max_pk = table.stats()
+        self._counter = count(max_pk + 1)
+
+    def _ensure_loaded(self) -> None:
+        """
+        В ленивом режиме загружает объекты из SQLite
+        при первом обращении к данным. Объекты, добавленные
+        до этого, остаются в репозитории. Если загрузка уже идёт
+        в другом потоке, дожидается её.
+
+        Таблица читается в отдельный словарь, а add() из другого
+        потока во время чтения не ждёт: объекты, добавленные
+        за это время, и счётчик pk переносятся вместе с подменой
+        контейнера под _lock.
+        """
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            loaded = self._read_from_db()
+            with self._lock:
+                for pk, obj in loaded.items():
+                    self._index_add(pk, obj)
+                loaded.update(self._container)
+                self._container = loaded
+                # счётчик только растёт: pk, уже выданные add(),
+                # не выдаются повторно
+                next_pk = next(self._counter)
+                self._counter = count(
+                    max(next_pk, max(loaded, default=0) + 1))
+                self._loaded = True
+
+    def load(self) -> None:
+        """
+        Загрузить объекты из SQLite сейчас, а не при первом
+        обращении (например, в фоновом потоке).
+        """
+        self._ensure_loaded()
+
+    def _only_in_db(self) -> bool:
+        """
+        Все объекты лежат в SQLite и ещё не загружены:
+        запрос можно выполнить в базе, не загружая таблицу.
+        """
+        return not self._loaded and not self.has_changes()
+
+    def count(self) -> int:
+        """ Число объектов; в ленивом режиме таблица не читается """
+        if self._loaded:
+            return len(self._container)
+        return self._db_count + len(self._inserted)
+
+    def _index_add(self, pk: int, obj: T) -> None:
+        """ Добавить объект во все индексы """
+        if not self._indexes and not self._sorted_indexes:
+            return
+        values = {}
+        for field, index in self._indexes.items():
+            value = getattr(obj, field, _MISSING)
+            if value is not _MISSING:
+                index.setdefault(value, set()).add(pk)
+                values[field] = value
+        datetime_fields = _datetime_fields(type(obj))
+        for field, sorted_index in self._sorted_indexes.items():
+            value = getattr(obj, field, _MISSING)
+            if value is not _MISSING:
+                key = _sort_key(value, field in datetime_fields)
+                insort(sorted_index, (key, pk))
+                values['sorted:' + field] = key
+        self._indexed_values[pk] = values
+
+    def _index_remove(self, pk: int) -> None:
+        """ Убрать объект из всех индексов """
+        values = self._indexed_values.pop(pk, None)
+        if values is None:
+            return
+        for field, index in self._indexes.items():
+            pks = index.get(values.get(field, _MISSING))
+            if pks is not None:
+                pks.discard(pk)
+                if not pks:
+                    del index[values[field]]
+        for field, sorted_index in self._sorted_indexes.items():
+            key = values.get('sorted:' + field, _MISSING)
+            if key is not _MISSING:
+                position = bisect_left(sorted_index, (key, pk))
+                del sorted_index[position]
+
+    def _sorted_index(self, field: str) -> list[tuple[Any, int]]:
+        """
+        Сортированный индекс поля. Если поле не объявлено
+        в sorted_indexes, индекс строится при первом запросе
+        и дальше поддерживается, как объявленные.
+        """
+        sorted_index = self._sorted_indexes.get(field)
+        if sorted_index is not None:
+            return sorted_index
+        sorted_index = []
+        for pk, obj in self._container.items():
+            value = getattr(obj, field, _MISSING)
+            if value is not _MISSING:
+                key = _sort_key(value, field in _datetime_fields(type(obj)))
+                sorted_index.append((key, pk))
+                self._indexed_values.setdefault(pk, {})[
+                    'sorted:' + field] = key
+        sorted_index.sort()
+        self._sorted_indexes[field] = sorted_index
+        return sorted_index
+
+    def _bound_key(self, field: str, value: Any) -> tuple[bool, Any]:
+        """
+        Ключ границы или значения after_key для сортированного
+        индекса поля: тип поля берётся у объектов репозитория.
+        """
+        obj = next(iter(self._container.values()), None)
+        return _sort_key(value, obj is not None
+                         and field in _datetime_fields(type(obj)))
+
+    def range(self, start: Any = None, end: Any = None,
+              field: str = 'expense_date') -> Iterator[T]:
+        """
+        Перебирает объекты, у которых start <= field < end,
+        в порядке возрастания field. Границу None не проверяют.
+        Это бинарный поиск по сортированному индексу поля:
+        O(log n + k). Пока таблица не загружена,
+        запрос выполняет SQLiteRepository.range.
+
+        Args:
+            start: Нижняя граница (включительно).
+            end: Верхняя граница (не включительно).
+            field (str): Поле, по которому выбирается диапазон.
+
+        Yields:
+            T: Объекты из диапазона.
+        """
+        if self._only_in_db():
+            yield from self._sqlite_table().range(start, end, field)
+            return
+        self._ensure_loaded()
+        sorted_index = self._sorted_index(field)
+        if start is not None:
+            low = bisect_left(sorted_index, (self._bound_key(field, start),))
+        elif end is not None:
+            # как в SQL, None не меньше границы end: такие
+            # объекты (они в начале индекса) пропускаются
+            low = bisect_left(sorted_index, ((True,),))
+        else:
+            low = 0
+        high = len(sorted_index) if end is None else bisect_left(
+            sorted_index, (self._bound_key(field, end),))
+        for _, pk in sorted_index[low:high]:
+            yield self._container[pk]
+
+    def page(self,
+             after_key: tuple[Any, int] | None = None,
+             limit: int = 100,
+             order_by: str = 'expense_date') -> list[T]:
+        """
+        Страница объектов, упорядоченных по (order_by, pk),
+        как у SQLiteRepository.page. Это бинарный поиск
+        по сортированному индексу поля: O(log n + limit).
+        Индекс поля, не объявленного в sorted_indexes (и pk),
+        строится при первом запросе и дальше поддерживается.
+
+        Args:
+            after_key (tuple[Any, int] | None): Ключ последнего
+            объекта предыдущей страницы: (значение order_by, pk).
+            None - первая страница.
+            limit (int): Наибольшее число объектов на странице.
+            order_by (str): Поле сортировки (или pk).
+
+        Returns:
+            list[T]: Объекты страницы.
+        """
+        if self._only_in_db():
+            return self._sqlite_table().page(after_key, limit, order_by)
+        self._ensure_loaded()
+        sorted_index = self._sorted_index(order_by)
+        low = 0
+        if after_key is not None:
+            value, pk = after_key
+            if order_by == 'pk':
+                # для pk значимо только pk ключа
+                value = pk
+            low = bisect_right(
+                sorted_index, (self._bound_key(order_by, value), pk))
+        return [self._container[pk]
+                for _, pk in sorted_index[low:low + limit]]
+
+    def sum_amount(
+        self,
+        group_by: Iterable[str] = (),
+        date_range: tuple[datetime, datetime] | None = None
+    ) -> dict[tuple, float]:
+        """
+        Сумма amount с группировкой за один проход.
+        Если задан date_range, проходятся только объекты
+        из этого диапазона (через сортированный индекс).
+
+        Args:
+            group_by (Iterable[str]): Поля группировки: поле объекта
+            (например category) или период: day, week, month.
+            date_range (tuple[datetime, datetime] | None):
+            Полуинтервал дат [начало, конец).
+
+        Returns:
+            dict[tuple, float]: Как у SQLiteRepository.sum_amount.
+        """
+        if self._only_in_db():
+            return self._sqlite_table().sum_amount(group_by, date_range)
+        self._ensure_loaded()
+        key_parts = [
+            (lambda obj, period=PERIOD_KEYS[group]:
+             period(_as_datetime(obj.expense_date)))
+            if group in PERIOD_KEYS
+            else (lambda obj, field=group: getattr(obj, field))
+            for group in group_by]
+        objects = (self._container.values() if date_range is None
+                   else self.range(*date_range))
+        if not key_parts:
+            return {(): sum(obj.amount for obj in objects)}
+        totals: dict[tuple, float] = {}
+        for obj in objects:
+            key = tuple(part(obj) for part in key_parts)
+            totals[key] = totals.get(key, 0) + obj.amount
+        return totals
+
+    def has_changes(self) -> bool:
+        """ Есть ли изменения, не сохранённые в SQLite """
+        return bool(self._inserted or self._updated or self._deleted)
 
     def copy_to_sqlite(self) -> None:
         """
-        Копирует данные из MemoryRepository в SQLiteRepository.
-        """
-        with sqlite3.connect(self.db_file) as conn:
-            cursor = conn.cursor()
-            if self.memory_name == 'ExpMemo':
-                cursor.execute("DELETE FROM expense")
-            elif self.memory_name == 'CatMemo':
-                cursor.execute("DELETE FROM category")
-            conn.commit()
-        for obj in self._container.values():
-            obj2 = self.create_copy_without_pk(obj)
-            if isinstance(obj, Expense):
-                self.expense_table.add(obj2)
-            elif isinstance(obj, Category):
-                self.category_table.add(obj2)
+        Сохраняет в SQLiteRepository изменения, накопленные
+        с последней синхронизации (INSERT/UPDATE/DELETE
+        одной транзакцией). Внутри unit_of_work изменения
+        считаются сохранёнными только после её фиксации.
+        """
+        table = self._sqlite_table()
+        if table is None or not self.has_changes():
+            return
+        inserted = set(self._inserted)
+        updated = set(self._updated)
+        deleted = set(self._deleted)
+        table.apply_changes(
+            inserted=[self._container[pk] for pk in sorted(inserted)],
+            updated=[self._container[pk] for pk in sorted(updated)],
+            deleted=sorted(deleted))
+
+        def forget_saved() -> None:
+            # данные уже зафиксированы: сначала отметить их
+            # сохранёнными, снимок пишется по возможности
+            self._inserted -= inserted
+            self._updated -= updated
+            self._deleted -= deleted
+            if self.use_snapshot:
+                self.save_snapshot()
+
+        table.manager.after_commit(self.db_file, forget_saved)
+
+    def save_snapshot(self) -> bool:
+        """
+        Записывает бинарный снимок таблицы для быстрого старта.
+        Имеет смысл, только когда содержимое репозитория
+        совпадает с базой: всё загружено и сохранено.
+
+        Returns:
+            bool: Записан ли снимок.
+        """
+        table = self._sqlite_table()
+        if table is None or not self._loaded or self.has_changes():
+            return False
+        return snapshot.write_snapshot(
+            table, map(table.to_row, self._container.values()))
 
     def create_copy_without_pk(self, obj: T) -> T:
         """
-        Создает копию объекта без атрибута pk.
+        Создает неглубокую копию объекта без атрибута pk
+        (pk копии - значение по умолчанию, 0).
 
         Args:
             obj (T): Объект для копирования.
@@ -70,10 +479,7 @@ class MemoryRepository(AbstractRepository[T]):
         Returns:
             T: Копия объекта без атрибута pk.
         """
-        obj_dict = asdict(obj)
-        obj_dict.pop('pk', None)
-        obj_copy = obj.__class__(**obj_dict)
-        return obj_copy
+        return _cloner(type(obj))(obj)
 
     def add_without_pk(self, obj: T) -> int:
         """
@@ -102,24 +508,49 @@ class MemoryRepository(AbstractRepository[T]):
     def add(self, obj: T) -> int:
         """" Добавиить объект в репозиторий,
         Args:  obj (T), returns: id добавленного"""
+        # добавление не требует загрузки: pk берутся после
+        # наибольшего pk в базе
         if getattr(obj, 'pk', None) != 0:
             raise ValueError(
                 f'trying to add object {obj} with filled `pk` attribute')
-        pk = next(self._counter)
-        self._container[pk] = obj
-        obj.pk = pk
+        with self._lock:
+            pk = next(self._counter)
+            self._container[pk] = obj
+            obj.pk = pk
+            self._index_add(pk, obj)
+            self._inserted.add(pk)
+        self._notify(ChangeKind.ADDED, pk, obj)
         return pk
 
     def get(self, pk: int) -> T | None:
         """" Получить объект из репозитория,
         Args: id (int), returns: obj (T)"""
+        if not self._loaded:
+            # объект, добавленный до загрузки, уже в памяти:
+            # ждать загрузки таблицы (например, из фонового
+            # потока) для него не нужно
+            obj = self._container.get(pk)
+            if obj is not None:
+                return obj
+        self._ensure_loaded()
         return self._container.get(pk)
 
     def get_all(self, where: dict[str, Any] | None = None) -> list[T]:
         """ Получить вообще все объекты из репозитория в виде list """
+        self._ensure_loaded()
         if where is None:
             return list(self._container.values())
-        return [obj for obj in self._container.values()
+        indexed = [self._indexes[attr].get(value, set())
+                   for attr, value in where.items()
+                   if attr in self._indexes]
+        if indexed:
+            # кандидаты берутся из самого маленького индекса,
+            # остальные условия проверяются только на них
+            candidates = (self._container[pk]
+                          for pk in sorted(min(indexed, key=len)))
+        else:
+            candidates = self._container.values()
+        return [obj for obj in candidates
                 if all(
                     getattr(obj, attr) == value
                     for attr, value in where.items())]
@@ -131,48 +562,109 @@ class MemoryRepository(AbstractRepository[T]):
         if obj.pk == 0:
             raise ValueError(
                 'attempt to update object with unknown primary key')
+        self._ensure_loaded()
+        self._index_remove(obj.pk)
         self._container[obj.pk] = obj
+        self._index_add(obj.pk, obj)
+        if obj.pk in self._deleted:
+            # строка уже удалена из базы при следующем сохранении,
+            # поэтому её нужно вставить заново
+            self._inserted.add(obj.pk)
+        elif obj.pk not in self._inserted:
+            self._updated.add(obj.pk)
+        self._notify(ChangeKind.UPDATED, obj.pk, obj)
 
     def delete(self, pk: int) -> None:
         """ Удалить объект из репозитория Arg pk:int """
-        self._container.pop(pk)
+        self._ensure_loaded()
+        obj = self._container.pop(pk)
+        self._index_remove(pk)
+        if pk in self._inserted:
+            self._inserted.discard(pk)
+        else:
+            self._updated.discard(pk)
+            self._deleted.add(pk)
+        self._notify(ChangeKind.DELETED, pk, obj)
 
     def get_id_by_name(self, category_name):
         """ получить id: int объекта по имени: str """
+        self._ensure_loaded()
+        if 'name' in self._indexes:
+            pks = self._indexes['name'].get(category_name)
+            return min(pks) if pks else None
         for category in self._container.values():
             if category.name == category_name:
                 return category.pk
         return None
 
+    def child_pks(self, parent: int | None) -> list[int]:
+        """
+        pk дочерних категорий parent (None - корневые)
+        по возрастанию. С индексом по parent - без перебора
+        всех объектов.
+
+        Args:
+            parent (int | None): pk родительской категории.
+
+        Returns:
+            list[int]: pk дочерних категорий.
+        """
+        self._ensure_loaded()
+        if 'parent' in self._indexes:
+            return sorted(self._indexes['parent'].get(parent, ()))
+        return sorted(pk for pk, obj in self._container.items()
+                      if obj.parent == parent)
+
+    def orphan_pks(self) -> list[int]:
+        """
+        pk категорий, родителя которых нет в репозитории
+        (например, его удалили), по возрастанию.
+
+        Returns:
+            list[int]: pk категорий без существующего родителя.
+        """
+        self._ensure_loaded()
+        if 'parent' in self._indexes:
+            return sorted(
+                pk for parent, pks in self._indexes['parent'].items()
+                if parent is not None and parent not in self._container
+                for pk in pks)
+        return sorted(pk for pk, obj in self._container.items()
+                      if obj.parent is not None
+                      and obj.parent not in self._container)
+
+    def has_children(self, parent: int | None) -> bool:
+        """ Есть ли у категории parent дочерние категории """
+        self._ensure_loaded()
+        if 'parent' in self._indexes:
+            return parent in self._indexes['parent']
+        return any(obj.parent == parent
+                   for obj in self._container.values())
+
     def add_root_category(self, category_name):
         """ Если что-то является
         объектом класса Category, то эта ф.
         может добавить
         его в качестве корневого объекта"""
-        new_category_id = max(
-            self._container.keys(), default=0) + 1
         new_category = Category(
             name=category_name,
-            parent=None,
-            pk=new_category_id
+            parent=None
         )
-        self._container[new_category_id] = new_category
-        return new_category_id
+        return self.add(new_category)
 
-    def get_pk(
-        repository: 'MemoryRepository[Expense]',
-        obj: Expense) -> Optional[int]:
+    def get_pk(self, obj: T) -> Optional[int]:
         """
         Get the primary key (pk)
-        of an object in the repositor
-        based on the object's attributes.
-        """
-        for pk, stored_obj in repository._container.items():
-            if all(
-                getattr(stored_obj, attr) == getattr(obj, attr)
-                for attr in stored_obj.__annotations__ if attr != 'pk'
-            ):
-                return pk
+        of an object in the repository in O(1).
+        Objects are stored under their own pk, so it is enough
+        to check that the stored object is this one (or equal to it);
+        value-equal duplicates keep their own pks.
+        """
+        self._ensure_loaded()
+        pk = getattr(obj, 'pk', 0)
+        stored_obj = self._container.get(pk)
+        if stored_obj is not None and (stored_obj is obj or stored_obj == obj):
+            return pk
         return None
 
     def get_category_name_by_id(
@@ -190,7 +682,8 @@ class MemoryRepository(AbstractRepository[T]):
             Название категории или None,
             если категория не найдена.
         """
-        for category in self._container.values():
-            if category.pk == category_id:
-                return category.name
-        return None
+        self._ensure_loaded()
+        category = self._container.get(category_id)
+        if category is None:
+            return None
+        return category.name
@@ -0,0 +1,151 @@
+"""
+Бинарный снимок таблицы SQLite для быстрого старта MemoryRepository.
+
+Формат файла: заголовок HEADER (сигнатура, версия формата,
+длина метаданных), затем метаданные и строки таблицы, каждое
+отдельным pickle (протокол 5). Метаданные хранят столбцы
+таблицы и её версию - счётчик из таблицы VERSION_TABLE, который
+триггеры увеличивают при каждом изменении строк. Так снимок
+одной таблицы не устаревает от записи в другие таблицы базы.
+Перед чтением версия сверяется: при любом расхождении снимок
+считается устаревшим и данные читаются из базы.
+"""
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+from typing import Any, Iterable
+from repository.sqlite_repository import SQLiteRepository
+
+MAGIC = b'BKSNAP\0\0'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<8sIQ')
+VERSION_TABLE = 'snapshot_version'
+
+
+def snapshot_path(table: SQLiteRepository) -> str:
+    """ Файл снимка таблицы: рядом с базой данных """
+    return f"{table.db_file}.{table.table_name}.snap"
+
+
+def install_versioning(table: SQLiteRepository) -> None:
+    """
+    Создаёт счётчик версии таблицы и триггеры, увеличивающие
+    его при INSERT, UPDATE и DELETE. Начальное значение
+    случайно, чтобы версии разных баз не совпадали.
+
+    Args:
+        table (SQLiteRepository): Таблица.
+    """
+    name = table.table_name
+    with table._transaction() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+            f"(name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        cursor.execute(
+            f"INSERT OR IGNORE INTO {VERSION_TABLE} "
+            f"VALUES (?, abs(random() % 1000000000000))", (name,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS "
+                f"{VERSION_TABLE}_{name}_{event.lower()} "
+                f"AFTER {event} ON {name} BEGIN "
+                f"UPDATE {VERSION_TABLE} SET version = version + 1 "
+                f"WHERE name = '{name}'; END")
+
+
+def table_version(table: SQLiteRepository) -> int | None:
+    """
+    Текущая версия таблицы.
+
+    Args:
+        table (SQLiteRepository): Таблица.
+
+    Returns:
+        int | None: Версия или None, если счётчик не создан.
+    """
+    try:
+        row = table.connection.execute(
+            f"SELECT version FROM {VERSION_TABLE} WHERE name = ?",
+            (table.table_name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if row is None else row[0]
+
+
+def write_snapshot(table: SQLiteRepository,
+                   rows: Iterable[tuple]) -> bool:
+    """
+    Записывает снимок таблицы. Строки должны совпадать
+    с содержимым таблицы в базе (например, сразу после
+    сохранения). При первой записи для таблицы создаётся
+    счётчик версии (install_versioning).
+
+    Args:
+        table (SQLiteRepository): Таблица.
+        rows (Iterable[tuple]): Строки в формате SQLiteRepository.to_row.
+
+    Returns:
+        bool: Записан ли снимок (нельзя, если база
+        в памяти). Снимок -
+        только ускорение, поэтому ошибки записи не выходят
+        наружу: снимок просто не записывается.
+    """
+    if table.db_file == ':memory:':
+        return False
+    path = snapshot_path(table)
+    # запись во временный файл и замена: читатель
+    # никогда не увидит наполовину записанный снимок
+    temp_path = path + '.tmp'
+    try:
+        install_versioning(table)
+        meta = pickle.dumps(
+            {'columns': table.columns, 'version': table_version(table)},
+            protocol=5)
+        body = pickle.dumps(list(rows), protocol=5)
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(meta)))
+            file.write(meta)
+            file.write(body)
+        os.replace(temp_path, path)
+    except (OSError, sqlite3.Error, pickle.PicklingError):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def read_snapshot(table: SQLiteRepository) -> list[tuple] | None:
+    """
+    Читает снимок таблицы через mmap, если он актуален.
+
+    Args:
+        table (SQLiteRepository): Таблица.
+
+    Returns:
+        list[tuple] | None: Строки таблицы или None, если снимка
+        нет, он другой версии или устарел.
+    """
+    try:
+        with open(snapshot_path(table), 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                return _parse(view, table)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _parse(view: memoryview, table: SQLiteRepository) -> list[tuple] | None:
+    """ Разбирает содержимое файла снимка """
+    magic, version, meta_size = HEADER.unpack_from(view)
+    if magic != MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    start = HEADER.size
+    meta: dict[str, Any] = pickle.loads(view[start:start + meta_size])
+    if meta['columns'] != table.columns \
+            or meta['version'] != table_version(table):
+        return None
+    return pickle.loads(view[start + meta_size:])
@@ -1,61 +1,214 @@
 import sqlite3
-from typing import TypeVar, Type, Generic, List, Dict, Any
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import (Type, List, Dict, Any, Iterable, Iterator, Sequence,
+                    get_args)
 from inspect import get_annotations
+from dataclasses import fields as dataclass_fields, is_dataclass
+from repository.abstract_repository import AbstractRepository, T
+from repository.connection import ConnectionManager, connections
+from repository.events import ChangeKind
 
-T = TypeVar('T')
+# соответствие типов аннотаций типам столбцов SQLite
+SQL_TYPES: dict[type, str] = {
+    int: 'INTEGER',
+    bool: 'INTEGER',
+    float: 'REAL',
+    str: 'TEXT',
+    datetime: 'DATETIME',
+}
 
+EPOCH = datetime(1970, 1, 1)
 
-class SQLiteRepository(Generic[T]):
+
+def adapt_datetime(value: datetime) -> int:
+    """
+    Хранимое в SQLite представление даты: целое число секунд
+    от начала эпохи. Оно компактно и сортируется как сама дата.
+    Микросекунды отбрасываются.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def convert_datetime(value: bytes) -> datetime:
+    """
+    Обратное преобразование для столбцов типа DATETIME.
+    Строки в формате ISO (старые базы) тоже понимаются.
+    """
+    text = value.decode()
+    try:
+        return EPOCH + timedelta(seconds=int(text))
+    except ValueError:
+        return datetime.fromisoformat(text)
+
+
+# SQL-выражения для группировки расходов по периодам
+PERIOD_SQL: dict[str, str] = {
+    'day': "date(expense_date, 'unixepoch')",
+    'week': "date(expense_date, 'unixepoch', 'weekday 0', '-6 days')",
+    'month': "date(expense_date, 'unixepoch', 'start of month')",
+}
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_converter('DATETIME', convert_datetime)
+
+
+def sql_type(annotation: Any) -> str:
+    """
+    Тип столбца SQLite для аннотации поля модели.
+    Для Optional/Union берётся первый тип, отличный от None.
+
+    Args:
+        annotation (Any): Аннотация поля.
+
+    Returns:
+        str: Тип столбца (по умолчанию TEXT).
+    """
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if args:
+        annotation = args[0]
+    return SQL_TYPES.get(annotation, 'TEXT')
+
+
+class SQLiteRepository(AbstractRepository[T]):
     """
     Репозиторий SQLite
     для работы с объектами базы данных.
     """
-    def __init__(self, db_file: str, cls: Type[T]) -> None:
+    def __init__(self, db_file: str, cls: Type[T],
+                 manager: ConnectionManager | None = None) -> None:
         """
         Инициализирует объект SQLiteRepository.
 
         Args:
             db_file (str): Имя файла базы данных.
             cls (Type[T]): Тип класса объекта.
+            manager (ConnectionManager | None): Откуда брать
+            соединения, по умолчанию общий менеджер connections.
         """
         self.db_file = db_file
+        self.manager = manager or connections
         self.table_name = cls.__name__.lower()
         self.fields = get_annotations(cls, eval_str=True)
         self.fields.pop('pk')
+        self.columns = list(self.fields) + ['pk']
         self.cls = cls
-        self.connection = sqlite3.connect(self.db_file)
-        self.cursor = self.connection.cursor()
+        # строку можно передать в конструктор позиционно, без dict,
+        # если поля модели идут в том же порядке, что и столбцы
+        self._positional = is_dataclass(cls) and [
+            field.name for field in dataclass_fields(cls)
+            if field.init] == self.columns
+        self._datetime_fields = [
+            field for field, annotation in self.fields.items()
+            if sql_type(annotation) == SQL_TYPES[datetime]]
+        self._datetime_positions = [
+            position for position, field in enumerate(self.fields)
+            if field in self._datetime_fields]
         self.create_table()
 
-    def create_table(self):
-        columns = []
-        """ Создает таблицу в базе
-        данных, если она не существует. """
-        if self.table_name == 'expense':
-            columns = [
-                "amount INTEGER",
-                "category INTEGER",
-                "expense_date TEXT",
-                "added_date TEXT",
-                "comment TEXT",
-                "pk INTEGER PRIMARY KEY AUTOINCREMENT"
-            ]
-        elif self.table_name == 'category':
-            columns = [
-                "name TEXT",
-                "parent INTEGER",
-                "pk INTEGER PRIMARY KEY AUTOINCREMENT"
-            ]
-        else:
-            ...
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """ Соединение текущего потока с базой """
+        return self.manager.get(self.db_file)
 
-        columns_string = ", ".join(columns)
-        if columns_string:  # Проверка наличия хотя бы одного столбца
-            sql_string = (
-                f"CREATE TABLE IF NOT EXISTS {self.table_name} "
-                f"({columns_string})"
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Транзакция для одной операции записи. Внутри единицы
+        работы (unit_of_work) фиксацию и откат выполняет она,
+        иначе транзакция фиксируется при выходе из блока.
+
+        Yields:
+            sqlite3.Cursor: Курсор для выполнения запросов.
+        """
+        cursor = self.connection.cursor()
+        if self.manager.in_unit_of_work(self.db_file):
+            yield cursor
+            return
+        with self.connection:
+            yield cursor
+
+    def _notify_after_commit(self, kind: ChangeKind, pk: int,
+                             obj: T | None = None) -> None:
+        """
+        Событие об изменении отправляется подписчикам после
+        фиксации транзакции; при откате unit_of_work - не отправляется.
+        """
+        self.manager.after_commit(
+            self.db_file, lambda: self._notify(kind, pk, obj))
+
+    def create_table(self) -> None:
+        """
+        Создает таблицу в базе данных, если она не существует.
+        Столбцы берутся из аннотаций модели, pk - последним.
+        Затем создаются индексы, объявленные в модели
+        атрибутом indexes (имя поля или кортеж имён).
+        """
+        cursor = self.connection.cursor()
+        columns = [f"{field} {sql_type(annotation)}"
+                   for field, annotation in self.fields.items()]
+        columns.append("pk INTEGER PRIMARY KEY AUTOINCREMENT")
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table_name} "
+            f"({', '.join(columns)})"
+        )
+        self._migrate_datetime_columns(columns)
+        for index in getattr(self.cls, 'indexes', ()):
+            index_fields = (index,) if isinstance(index, str) else index
+            index_name = f"idx_{self.table_name}_{'_'.join(index_fields)}"
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} "
+                f"ON {self.table_name} ({', '.join(index_fields)})"
             )
-            self.cursor.execute(sql_string)
+
+    def _migrate_datetime_columns(self, columns: list[str]) -> None:
+        """
+        Переводит таблицу из старой схемы, где даты хранились
+        строками в столбцах TEXT, на столбцы DATETIME с числом
+        секунд. Таблица пересоздаётся один раз, pk сохраняются.
+
+        Args:
+            columns (list[str]): Описания столбцов новой схемы.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(f"PRAGMA table_info({self.table_name})")
+        declared = {row[1]: row[2] for row in cursor.fetchall()}
+        legacy = [field for field in self._datetime_fields
+                  if declared.get(field) != SQL_TYPES[datetime]]
+        if not legacy:
+            return
+        names = list(self.fields.keys()) + ['pk']
+        values = [
+            f"CASE WHEN typeof({name}) = 'text' "
+            f"THEN COALESCE(CAST(strftime('%s', {name}) AS INTEGER), {name}) "
+            f"ELSE {name} END" if name in legacy else name
+            for name in names]
+        old_table = f"{self.table_name}_old"
+        with self._transaction() as cursor:
+            if not self.connection.in_transaction:
+                cursor.execute("BEGIN")
+            cursor.execute(
+                f"ALTER TABLE {self.table_name} RENAME TO {old_table}")
+            cursor.execute(
+                f"CREATE TABLE {self.table_name} ({', '.join(columns)})")
+            cursor.execute(
+                f"INSERT INTO {self.table_name} ({', '.join(names)}) "
+                f"SELECT {', '.join(values)} FROM {old_table}")
+            cursor.execute(f"DROP TABLE {old_table}")
+
+    def _values(self, obj: T) -> list[Any]:
+        """
+        Значения полей объекта для записи в базу.
+        Даты, переданные строками, приводятся к datetime,
+        чтобы храниться в том же виде, что и остальные.
+        """
+        values = [getattr(obj, field) for field in self.fields]
+        for position in self._datetime_positions:
+            if isinstance(values[position], str):
+                values[position] = datetime.fromisoformat(values[position])
+        return values
 
     def add(self, obj: T) -> int:
         """
@@ -77,34 +230,417 @@ class SQLiteRepository(Generic[T]):
             f"INSERT INTO {self.table_name} "
             f"({columns_str}) " f"VALUES ({placeholders})"
         )
-        values = [getattr(obj, field) for field in self.fields]
-        self.cursor.execute(sql_string, values)
-        self.connection.commit()
-        obj.pk = self.cursor.lastrowid
+        values = self._values(obj)
+        with self._transaction() as cursor:
+            cursor.execute(sql_string, values)
+        obj.pk = cursor.lastrowid
+        self._notify_after_commit(ChangeKind.ADDED, obj.pk, obj)
         return obj.pk
 
-    def get_all(self) -> List[T]:
+    def add_many(self, objects: Iterable[T]) -> List[int]:
         """
-        Получает все объекты из базы данных.
+        Добавляет пачку объектов одной транзакцией (executemany).
+
+        Args:
+            objects (Iterable[T]): Объекты для добавления.
 
         Returns:
-            List[T]: Список объектов.
+            List[int]: Идентификаторы объектов в том же порядке.
+        """
+        objects = list(objects)
+        for obj in objects:
+            if not hasattr(obj, "pk"):
+                raise ValueError("Object must have 'pk' attribute")
+        new_objects = [obj for obj in objects if obj.pk == 0]
+        if new_objects:
+            columns_str = ", ".join(self.fields.keys())
+            placeholders = ", ".join(['?'] * len(self.fields))
+            sql_string = (
+                f"INSERT INTO {self.table_name} "
+                f"({columns_str}) " f"VALUES ({placeholders})"
+            )
+            rows = (
+                self._values(obj) for obj in new_objects
+            )
+            # pk AUTOINCREMENT внутри одной транзакции выдаются подряд,
+            # поэтому их можно восстановить по last_insert_rowid()
+            with self._transaction() as cursor:
+                if not self.connection.in_transaction:
+                    cursor.execute("BEGIN IMMEDIATE")
+                cursor.executemany(sql_string, rows)
+                cursor.execute("SELECT last_insert_rowid()")
+                last_pk = cursor.fetchone()[0]
+            first_pk = last_pk - len(new_objects) + 1
+            for pk, obj in enumerate(new_objects, start=first_pk):
+                obj.pk = pk
+                self._notify_after_commit(ChangeKind.ADDED, pk, obj)
+        return [obj.pk for obj in objects]
+
+    def apply_changes(self,
+                      inserted: Iterable[T],
+                      updated: Iterable[T],
+                      deleted: Iterable[int]) -> None:
         """
+        Применяет накопленные изменения одной транзакцией.
+        Вставляемые объекты записываются со своими pk,
+        так что идентификаторы не меняются между сохранениями.
+
+        Args:
+            inserted (Iterable[T]): Новые объекты (с заполненным pk).
+            updated (Iterable[T]): Изменённые объекты.
+            deleted (Iterable[int]): pk удалённых объектов.
+        """
+        columns = list(self.fields.keys())
+        insert_sql = (
+            f"INSERT INTO {self.table_name} "
+            f"({', '.join(columns)}, pk) "
+            f"VALUES ({', '.join(['?'] * (len(columns) + 1))})"
+        )
+        update_sql = (
+            f"UPDATE {self.table_name} SET "
+            f"{', '.join(f'{column} = ?' for column in columns)} "
+            f"WHERE pk = ?"
+        )
+        delete_sql = f"DELETE FROM {self.table_name} WHERE pk = ?"
+        with self._transaction() as cursor:
+            cursor.executemany(delete_sql, ((pk,) for pk in deleted))
+            cursor.executemany(update_sql, (
+                self._values(obj) + [obj.pk] for obj in updated))
+            cursor.executemany(insert_sql, (
+                self._values(obj) + [obj.pk] for obj in inserted))
+
+    def get(self, pk: int) -> T | None:
+        """
+        Получает объект по первичному ключу.
+
+        Args:
+            pk (int): Идентификатор объекта.
+
+        Returns:
+            T | None: Объект или None, если его нет в базе.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(
+            f"{self._select_sql()} WHERE pk = ?", (pk,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return self.from_row(row)
+
+    def update(self, obj: T) -> None:
+        """
+        Обновляет запись объекта в базе данных.
+
+        Args:
+            obj (T): Объект с заполненным pk.
+        """
+        if obj.pk == 0:
+            raise ValueError(
+                'attempt to update object with unknown primary key')
+        columns = list(self.fields.keys())
         sql_string = (
-            f"SELECT {', '.join(self.fields.keys())} "
-            f"FROM {self.table_name}"
+            f"UPDATE {self.table_name} SET "
+            f"{', '.join(f'{column} = ?' for column in columns)} "
+            f"WHERE pk = ?"
         )
-        self.cursor.execute(sql_string)
-        rows = self.cursor.fetchall()
-        objects = []
+        values = self._values(obj) + [obj.pk]
+        with self._transaction() as cursor:
+            cursor.execute(sql_string, values)
+        self._notify_after_commit(ChangeKind.UPDATED, obj.pk, obj)
 
-        for row in rows:
-            obj_dict = {}
-            for idx, field in enumerate(self.fields.keys()):
-                obj_dict[field] = row[idx]
-            objects.append(self.create_object(obj_dict))
+    def delete(self, pk: int) -> None:
+        """
+        Удаляет запись из базы данных.
+
+        Args:
+            pk (int): Идентификатор удаляемого объекта.
+        """
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table_name} WHERE pk = ?", (pk,))
+        if cursor.rowcount == 0:
+            raise KeyError(pk)
+        self._notify_after_commit(ChangeKind.DELETED, pk)
 
-        return objects
+    def get_all(self, where: dict[str, Any] | None = None) -> List[T]:
+        """
+        Получает объекты из базы данных.
+
+        Args:
+            where (dict[str, Any] | None): Условие вида
+            {'название_поля': значение}, все условия
+            объединяются через AND. Без условия - все записи.
+
+        Returns:
+            List[T]: Список объектов.
+        """
+        return list(self.iter_all(where))
+
+    def iter_all(self,
+                 where: dict[str, Any] | None = None,
+                 batch_size: int = 1000) -> Iterator[T]:
+        """
+        Лениво перебирает объекты из базы данных,
+        читая строки пачками по batch_size (fetchmany),
+        так что в памяти держится не больше одной пачки.
+
+        Args:
+            where (dict[str, Any] | None): Условие как в get_all.
+            batch_size (int): Размер пачки строк.
+
+        Yields:
+            T: Объекты по одному.
+        """
+        sql_string, params = self._where_sql(where)
+        # отдельный курсор, чтобы не мешать другим запросам репозитория
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql_string, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self.from_row(row)
+        finally:
+            cursor.close()
+
+    def range(self, start: Any = None, end: Any = None,
+              field: str = 'expense_date',
+              batch_size: int = 1000) -> Iterator[T]:
+        """
+        Перебирает объекты, у которых start <= field < end,
+        в порядке (field, pk), как MemoryRepository.range.
+        Границу None не проверяют; при индексе по field
+        (см. indexes модели) читаются только строки диапазона.
+
+        Args:
+            start: Нижняя граница (включительно).
+            end: Верхняя граница (не включительно).
+            field (str): Поле, по которому выбирается диапазон.
+            batch_size (int): Размер пачки строк.
+
+        Yields:
+            T: Объекты из диапазона.
+        """
+        if field not in self.fields:
+            raise ValueError(
+                f'unknown field {field!r} for table {self.table_name}')
+        conditions, params = [], []
+        for value, operator in ((start, '>='), (end, '<')):
+            if value is not None:
+                conditions.append(f"{field} {operator} ?")
+                params.append(self._sql_value(field, value))
+        sql_string = self._select_sql()
+        if conditions:
+            sql_string += f" WHERE {' AND '.join(conditions)}"
+        sql_string += f" ORDER BY {field}, pk"
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql_string, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self.from_row(row)
+        finally:
+            cursor.close()
+
+    def page(self,
+             after_key: tuple[Any, int] | None = None,
+             limit: int = 100,
+             order_by: str = 'expense_date') -> List[T]:
+        """
+        Страница объектов, упорядоченных по (order_by, pk).
+        Выборка по ключу (keyset): WHERE (order_by, pk) > (?, ?),
+        поэтому время не зависит от номера страницы
+        и при индексе по order_by не растёт с размером таблицы.
+
+        Args:
+            after_key (tuple[Any, int] | None): Ключ последнего
+            объекта предыдущей страницы: (значение order_by, pk).
+            None - первая страница.
+            limit (int): Наибольшее число объектов на странице.
+            order_by (str): Поле сортировки (или pk).
+
+        Returns:
+            List[T]: Объекты страницы; меньше limit - страниц больше нет.
+        """
+        if order_by != 'pk' and order_by not in self.fields:
+            raise ValueError(
+                f'unknown field {order_by!r} for table {self.table_name}')
+        sql_string = self._select_sql()
+        params: list[Any] = []
+        if order_by == 'pk':
+            if after_key is not None:
+                sql_string += " WHERE pk > ?"
+                params.append(after_key[-1])
+            sql_string += " ORDER BY pk"
+        else:
+            if after_key is not None:
+                value, pk = after_key
+                # NULL в SQLite идёт раньше остальных значений,
+                # а сравнение с ним не истинно: после NULL-ключа
+                # идут остальные NULL с большим pk и все не-NULL
+                if value is None:
+                    sql_string += f" WHERE ({order_by} IS NULL AND pk > ?)" \
+                                  f" OR {order_by} IS NOT NULL"
+                    params.append(pk)
+                else:
+                    sql_string += f" WHERE ({order_by}, pk) > (?, ?)"
+                    params.extend((self._sql_value(order_by, value), pk))
+            sql_string += f" ORDER BY {order_by}, pk"
+        sql_string += " LIMIT ?"
+        params.append(limit)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql_string, params)
+            return [self.from_row(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def stats(self) -> tuple[int, int]:
+        """
+        Лёгкие метаданные таблицы без чтения строк.
+
+        Returns:
+            tuple[int, int]: Число строк и наибольший pk (0 для пустой).
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT COUNT(*), MAX(pk) FROM {self.table_name}")
+            rows_count, max_pk = cursor.fetchone()
+        finally:
+            cursor.close()
+        return rows_count, max_pk or 0
+
+    def sum_amount(
+        self,
+        group_by: Iterable[str] = (),
+        date_range: tuple[datetime, datetime] | None = None
+    ) -> dict[tuple, float]:
+        """
+        Сумма amount с группировкой, посчитанная в SQL (GROUP BY).
+        Работает для таблиц с полями amount и expense_date.
+
+        Args:
+            group_by (Iterable[str]): Поля группировки: поле модели
+            (например category) или период: day, week, month.
+            date_range (tuple[datetime, datetime] | None):
+            Полуинтервал дат [начало, конец).
+
+        Returns:
+            dict[tuple, float]: Ключ - кортеж значений группировки
+            в порядке group_by (периоды - date начала периода),
+            значение - сумма. Без группировки - {(): сумма}.
+        """
+        group_by = list(group_by)
+        expressions = []
+        for group in group_by:
+            if group in PERIOD_SQL:
+                expressions.append(PERIOD_SQL[group])
+            elif group in self.fields:
+                expressions.append(group)
+            else:
+                raise ValueError(f'unknown group {group!r}')
+        sql_string = f"SELECT {', '.join(expressions + ['SUM(amount)'])} " \
+                     f"FROM {self.table_name}"
+        params: list[Any] = []
+        if date_range is not None:
+            sql_string += " WHERE expense_date >= ? AND expense_date < ?"
+            params.extend(self._sql_value('expense_date', value)
+                          for value in date_range)
+        if expressions:
+            sql_string += f" GROUP BY {', '.join(expressions)}"
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql_string, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not expressions:
+            return {(): rows[0][0] or 0}
+        return {
+            tuple(date.fromisoformat(value) if group in PERIOD_SQL else value
+                  for group, value in zip(group_by, row[:-1])): row[-1]
+            for row in rows}
+
+    def _select_sql(self) -> str:
+        """ SELECT всех полей таблицы вместе с pk """
+        return f"SELECT {', '.join(self.columns)} FROM {self.table_name}"
+
+    def _where_sql(
+            self, where: dict[str, Any] | None) -> tuple[str, list[Any]]:
+        """
+        Собирает параметризованный SELECT с условием WHERE.
+
+        Args:
+            where (dict[str, Any] | None): Условие {'поле': значение}.
+
+        Returns:
+            tuple[str, list[Any]]: SQL-запрос и его параметры.
+        """
+        if not where:
+            return self._select_sql(), []
+        for field in where:
+            if field != 'pk' and field not in self.fields:
+                raise ValueError(
+                    f'unknown field {field!r} for table {self.table_name}')
+        # IS, в отличие от =, корректно сравнивает и с NULL
+        conditions = " AND ".join(f"{field} IS ?" for field in where)
+        params = [self._sql_value(field, value)
+                  for field, value in where.items()]
+        return f"{self._select_sql()} WHERE {conditions}", params
+
+    def _sql_value(self, field: str, value: Any) -> Any:
+        """
+        Значение для сравнения с полем field в запросе. Даты
+        хранятся числом секунд, поэтому для полей-дат строки ISO
+        и date приводятся к datetime (его переводит адаптер).
+
+        Args:
+            field (str): Поле модели.
+            value (Any): Значение из условия запроса.
+
+        Returns:
+            Any: Параметр запроса.
+        """
+        if field not in self._datetime_fields:
+            return value
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime.combine(value, datetime.min.time())
+        return value
+
+    def from_row(self, row: Sequence[Any]) -> T:
+        """
+        Создает объект из строки результата _select_sql
+        (значения полей и последним pk).
+
+        Args:
+            row (Sequence[Any]): Строка таблицы.
+
+        Returns:
+            T: Созданный объект.
+        """
+        if self._positional:
+            return self.cls(*row)
+        return self.create_object(dict(zip(self.columns, row)))
+
+    def to_row(self, obj: T) -> tuple:
+        """
+        Строка таблицы для объекта, обратное к from_row.
+
+        Args:
+            obj (T): Объект.
+
+        Returns:
+            tuple: Значения полей и последним pk.
+        """
+        return (*self._values(obj), obj.pk)
 
     def create_object(self, obj_dict: Dict[str, Any]) -> T:
         """
@@ -0,0 +1,93 @@
+from types import TracebackType
+from typing import Type
+from repository.abstract_repository import T
+from repository.connection import ConnectionManager, connections
+from repository.sqlite_repository import SQLiteRepository
+from models.category import Category
+from models.expense import Expense
+
+
+class UnitOfWork:
+    """
+    Единица работы: все изменения репозиториев одной базы,
+    сделанные внутри блока with, фиксируются одной транзакцией
+    (один commit и один fsync) или откатываются при исключении.
+    """
+    def __init__(self, db_file: str,
+                 manager: ConnectionManager | None = None) -> None:
+        """
+        Инициализирует единицу работы.
+
+        Args:
+            db_file (str): Имя файла базы данных.
+            manager (ConnectionManager | None): Менеджер соединений,
+            по умолчанию общий менеджер connections.
+        """
+        self.db_file = db_file
+        self.manager = manager or connections
+        self._repositories: dict[type, SQLiteRepository] = {}
+
+    def repository(self, cls: Type[T]) -> SQLiteRepository[T]:
+        """
+        Репозиторий модели cls в этой единице работы. Создаётся
+        (с проверкой схемы таблицы) при первом обращении, так что
+        единица работы, которой репозитории не нужны, ничего
+        не создаёт.
+
+        Args:
+            cls (Type[T]): Класс модели.
+
+        Returns:
+            SQLiteRepository[T]: Репозиторий.
+        """
+        repository = self._repositories.get(cls)
+        if repository is None:
+            repository = SQLiteRepository(self.db_file, cls, self.manager)
+            self._repositories[cls] = repository
+        return repository
+
+    @property
+    def expenses(self) -> SQLiteRepository[Expense]:
+        """ Репозиторий расходов """
+        return self.repository(Expense)
+
+    @property
+    def categories(self) -> SQLiteRepository[Category]:
+        """ Репозиторий категорий """
+        return self.repository(Category)
+
+    def __enter__(self) -> 'UnitOfWork':
+        self.manager.begin(self.db_file)
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None,
+                 exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        self.manager.end(self.db_file, commit=exc_type is None)
+        if exc_type is not None:
+            # создание таблиц тоже откатилось: при следующем
+            # обращении репозитории создаются заново
+            self._repositories.clear()
+
+
+def unit_of_work(db_file: str,
+                 manager: ConnectionManager | None = None) -> UnitOfWork:
+    """
+    Открывает единицу работы с базой:
+
+        with unit_of_work('bookkeeper.db') as uow:
+            uow.categories.add(category)
+            uow.expenses.add(expense)
+
+    Репозитории этой базы в том же потоке (в том числе
+    MemoryRepository.copy_to_sqlite) тоже пишут в её транзакцию.
+    Вложенные блоки входят во внешний.
+
+    Args:
+        db_file (str): Имя файла базы данных.
+        manager (ConnectionManager | None): Менеджер соединений.
+
+    Returns:
+        UnitOfWork: Контекстный менеджер единицы работы.
+    """
+    return UnitOfWork(db_file, manager)
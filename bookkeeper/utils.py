@@ -1,21 +1,32 @@
-from typing import Union
-from PySide6.QtWidgets import QMessageBox
+from dataclasses import dataclass
+from typing import Any, Union, Optional
 import datetime
+import re
 
 
-def reorder_time(date: str) -> Union[datetime.datetime, None]:
+class DateFormatError(ValueError):
     """
-    Попытка преобразования строки даты в формат datetime.
+    Строку не удалось разобрать как дату.
+    """
+    def __init__(self, date: str) -> None:
+        super().__init__(
+            'Неверный формат даты. Введите дату в формате "ГГГГ-ММ-ДД".')
+        self.date = date
+
+
+def reorder_time(date: str) -> datetime.datetime:
+    """
+    Преобразование строки даты в формат datetime.
 
     Args:
         date (str): Строка с датой
         в формате "ГГГГ-ММ-ДД" или "ДД.ММ.ГГГГ".
 
     Returns:
-        Union[datetime, None]:
-        Возвращает объект datetime,
-        если удалось преобразовать строку даты,
-        иначе возвращает None.
+        datetime: Дата из строки.
+
+    Raises:
+        DateFormatError: Строка не в одном из этих форматов.
     """
     try:
         expense_date = datetime.datetime.strptime(date, '%Y-%m-%d')
@@ -28,18 +39,73 @@ def reorder_time(date: str) -> Union[datetime.datetime, None]:
                 month,
                 day)
         except ValueError:
-            QMessageBox.warning(
-                None,
-                'Ошибка',
-                'Неверный формат даты. Введите дату в формате "ГГГГ-ММ-ДД".')
-            return None
+            raise DateFormatError(date) from None
     return expense_date
 
 
+class PeriodFormatError(ValueError):
+    """
+    Строка не описывает ни один известный период.
+    """
+    def __init__(self, time: str) -> None:
+        super().__init__(f'Неизвестный период: {time!r}')
+        self.time = time
+
+
+# периоды относительно сегодняшнего дня
+PERIODS = ('Day', 'Week', 'Month', 'Quarter', 'Year', 'Same month last year')
+# периоды без границ: все расходы / бюджет без периода
+UNBOUNDED_PERIODS = ('all', 'Empty')
+_ROLLING = re.compile(r'Last (\d+) days?')
+_SPAN = re.compile(r'(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})')
+
+
+def rolling_period(days: int) -> str:
+    """
+    Период из последних days дней, включая сегодня.
+
+    Args:
+        days (int): Число дней, не меньше 1.
+    Returns:
+        str: Период для period_bounds, например "Last 30 days".
+    """
+    return f'Last {days} days'
+
+
+def span_period(first: datetime.date, last: datetime.date) -> str:
+    """
+    Период с first по last включительно.
+
+    Args:
+        first (datetime.date): Первый день.
+        last (datetime.date): Последний день.
+    Returns:
+        str: Период для period_bounds: "ГГГГ-ММ-ДД..ГГГГ-ММ-ДД".
+    """
+    return f'{first.isoformat()}..{last.isoformat()}'
+
+
+def is_period(time: str) -> bool:
+    """ Понимает ли period_bounds строку time """
+    try:
+        period_bounds(time)
+    except PeriodFormatError:
+        return False
+    return True
+
+
+def _add_months(month_start: datetime.date, months: int) -> datetime.date:
+    """ Первое число месяца через months месяцев от month_start """
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
 def date_is_in_range(time: str, year: str, month: str, day: str) -> bool:
     """
     Проверяет, находится ли указанная
     дата в пределах заданного временного диапазона.
+    Для проверки многих дат лучше один раз построить
+    PeriodFilter.for_period(time) и вызывать его contains.
 
     Args:
         time (str): Временной интервал (День, Неделя, Месяц).
@@ -51,23 +117,184 @@ def date_is_in_range(time: str, year: str, month: str, day: str) -> bool:
         дата находится в указанном
         диапазоне, в противном случае - False.
     """
-    this_year, this_month, this_day = map(
-        int,
-        str(datetime.date.today()).split()[0].split("-"))
-    year, month, day = int(year), int(month), int(day)
-    if this_year != year:
+    period = PeriodFilter.for_period(time)
+    if period.bounds is None:
         return False
+    return period.contains(
+        datetime.datetime(int(year), int(month), int(day)))
+
+
+def period_bounds(
+        time: str,
+        today: Optional[datetime.date] = None
+) -> Optional[tuple[datetime.datetime, datetime.datetime]]:
+    """
+    Границы временного диапазона в виде полуинтервала [начало, конец).
+
+    Args:
+        time (str): Временной интервал: один из PERIODS
+        (календарные день, неделя, месяц, квартал и год,
+        тот же месяц год назад), "Last N days" (последние
+        N дней, см. rolling_period) или
+        "ГГГГ-ММ-ДД..ГГГГ-ММ-ДД" (см. span_period).
+        today (datetime.date): Дата, от которой считается
+        интервал, по умолчанию сегодня.
+    Returns:
+        Optional[tuple[datetime.datetime, datetime.datetime]]:
+        Начало и конец интервала или None,
+        если интервал не ограничен (all, Empty).
+
+    Raises:
+        PeriodFormatError: Неизвестный период.
+    """
+    if time in UNBOUNDED_PERIODS:
+        return None
+    today = today or datetime.date.today()
+    month = today.replace(day=1)
     if time == 'Day':
-        if this_day == day and this_month == month:
-            return True
-        else:
-            return False
+        start = today
+        end = start + datetime.timedelta(days=1)
     elif time == 'Week':
-        today_date = datetime.date(this_year, this_month, this_day)
-        target_date = datetime.date(year, month, day)
-        week_start = today_date - datetime.timedelta(days=today_date.weekday())
-        week_end = week_start + datetime.timedelta(days=6)
-        return week_start <= target_date <= week_end
-
+        start = today - datetime.timedelta(days=today.weekday())
+        end = start + datetime.timedelta(days=7)
     elif time == 'Month':
-        return this_month == month
+        start = month
+        end = _add_months(month, 1)
+    elif time == 'Quarter':
+        start = _add_months(month, -((today.month - 1) % 3))
+        end = _add_months(start, 3)
+    elif time == 'Year':
+        start = datetime.date(today.year, 1, 1)
+        end = datetime.date(today.year + 1, 1, 1)
+    elif time == 'Same month last year':
+        start = _add_months(month, -12)
+        end = _add_months(start, 1)
+    elif (match := _ROLLING.fullmatch(time)) and int(match[1]) > 0:
+        end = today + datetime.timedelta(days=1)
+        start = end - datetime.timedelta(days=int(match[1]))
+    elif match := _SPAN.fullmatch(time):
+        try:
+            start = datetime.date.fromisoformat(match[1])
+            end = (datetime.date.fromisoformat(match[2])
+                   + datetime.timedelta(days=1))
+        except ValueError:
+            raise PeriodFormatError(time) from None
+        if end <= start:
+            raise PeriodFormatError(time)
+    else:
+        raise PeriodFormatError(time)
+    return (datetime.datetime.combine(start, datetime.time()),
+            datetime.datetime.combine(end, datetime.time()))
+
+
+def as_datetime(value: Union[str, datetime.date]) -> datetime.datetime:
+    """
+    Приводит дату к datetime: строки ISO разбираются,
+    date становится полуночью этого дня.
+
+    Args:
+        value (Union[str, datetime.date]): Дата.
+    Returns:
+        datetime.datetime: Та же дата как datetime.
+    """
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class PeriodFilter:
+    """
+    Фильтр дат по полуинтервалу [start, end). Границы
+    считаются один раз при создании, проверка даты - два
+    сравнения. Граница None не проверяется.
+    """
+    start: Optional[datetime.datetime] = None
+    end: Optional[datetime.datetime] = None
+
+    def __post_init__(self) -> None:
+        # границы могут прийти строками ISO или датами
+        for name in ('start', 'end'):
+            value = getattr(self, name)
+            if value is not None and type(value) is not datetime.datetime:
+                object.__setattr__(self, name, as_datetime(value))
+
+    @classmethod
+    def for_period(cls, time: str,
+                   today: Optional[datetime.date] = None) -> 'PeriodFilter':
+        """
+        Фильтр для периода от today (см. period_bounds);
+        для all и Empty - фильтр без границ.
+
+        Args:
+            time (str): Временной интервал.
+            today (datetime.date): Дата, от которой считается
+            интервал, по умолчанию сегодня.
+        Returns:
+            PeriodFilter: Фильтр периода.
+        """
+        bounds = period_bounds(time, today)
+        return cls() if bounds is None else cls(*bounds)
+
+    @property
+    def bounds(self) -> Optional[tuple[Optional[datetime.datetime],
+                                       Optional[datetime.datetime]]]:
+        """
+        Границы (start, end) для запросов к репозиториям
+        (range, sum_amount) или None, если фильтр без границ.
+        """
+        if self.start is None and self.end is None:
+            return None
+        return self.start, self.end
+
+    def contains(self, value: Union[str, datetime.date]) -> bool:
+        """
+        Попадает ли дата в период.
+
+        Args:
+            value (Union[str, datetime.date]): Дата.
+        Returns:
+            bool: start <= value < end.
+        """
+        if type(value) is not datetime.datetime:
+            value = as_datetime(value)
+        return ((self.start is None or self.start <= value)
+                and (self.end is None or value < self.end))
+
+    def mask(self, dates: Any) -> Any:
+        """
+        Векторная проверка массива дат.
+
+        Args:
+            dates: Массив NumPy datetime64, массив целых
+            секунд от начала эпохи (как в SQLite и
+            ColumnarExpenseRepository) или последовательность
+            дат, которую NumPy приводит к datetime64.
+        Returns:
+            numpy.ndarray: Булева маска той же длины.
+        """
+        import numpy as np
+        dates = np.asarray(dates)
+        if dates.dtype.kind in 'iu':
+            def bound(moment):
+                if moment.tzinfo is not None:
+                    moment = moment.astimezone(
+                        datetime.timezone.utc).replace(tzinfo=None)
+                return (moment - EPOCH) // datetime.timedelta(seconds=1)
+        else:
+            if dates.dtype.kind != 'M':
+                dates = dates.astype('datetime64[us]')
+
+            def bound(moment):
+                return np.datetime64(moment, 'us')
+        mask = np.ones(dates.shape, dtype=bool)
+        if self.start is not None:
+            mask &= dates >= bound(self.start)
+        if self.end is not None:
+            mask &= dates < bound(self.end)
+        return mask
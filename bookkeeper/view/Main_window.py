@@ -1,8 +1,10 @@
+from functools import cached_property
 from PySide6 import QtWidgets
 from view.expense_tracker import ExpenseTracker
 from view.categories_tracker import CategoryApp
 from view.budget_app import BudgetApp
 from repository.memory_repository import MemoryRepository
+from view.workers import Worker, run_in_background, save_repositories
 from models.category import Category
 from models.expense import Expense
 
@@ -17,16 +19,35 @@ class MainApp(QtWidgets.QWidget):
         super().__init__()
         self.expense_repo = MemoryRepository[Expense](
             'ExpMemo',
-            "bookkeeper.db")
+            "bookkeeper.db",
+            indexes=('category',),
+            sorted_indexes=('expense_date',),
+            lazy=True, use_snapshot=True)
         self.category_repo = MemoryRepository[Category](
-            'CatMemo', "bookkeeper.db")
+            'CatMemo', "bookkeeper.db",
+            indexes=('name', 'parent'),
+            lazy=True, use_snapshot=True)
         self.setWindowTitle('Main Application')
         self.resize(500, 100)
-        self.category_app = CategoryApp(self)
-        self.expense_tracker = ExpenseTracker(self)
-        self.budget_app = BudgetApp(self)
+        self.save_worker: Worker | None = None
         self.init_ui()
 
+    # окна редакторов создаются при первом открытии
+    @cached_property
+    def category_app(self) -> CategoryApp:
+        """ Окно редактора категорий """
+        return CategoryApp(self)
+
+    @cached_property
+    def expense_tracker(self) -> ExpenseTracker:
+        """ Окно отслеживания расходов """
+        return ExpenseTracker(self)
+
+    @cached_property
+    def budget_app(self) -> BudgetApp:
+        """ Окно редактора бюджета """
+        return BudgetApp(self)
+
     def init_ui(self) -> None:
         """
         Инициализация пользовательского
@@ -63,11 +84,42 @@ class MainApp(QtWidgets.QWidget):
         self.hide()
 
     def save_and_close(self) -> None:
-        """ Сохранить изменения в репозиторий """
-        self.expense_repo.copy_to_sqlite()
-        self.category_repo.copy_to_sqlite()
+        """
+        Сохранить изменения в репозиторий одной транзакцией
+        в фоновом потоке. Пока идёт сохранение, кнопки
+        недоступны, чтобы данные не менялись во время записи.
+        """
+        if self.save_worker is not None:
+            return
+        self.set_buttons_enabled(False)
+        self.save_worker = run_in_background(
+            save_repositories, self.expense_repo.db_file,
+            [self.category_repo, self.expense_repo],
+            on_finished=self.save_finished,
+            on_error=self.save_failed)
+
+    def set_buttons_enabled(self, enabled: bool) -> None:
+        """ Включить или выключить кнопки главного окна """
+        for button in (self.expense_button, self.category_button,
+                       self.budget_button, self.saveandclose_button):
+            button.setEnabled(enabled)
+
+    def save_finished(self, _saved: int) -> None:
+        """ Сохранение закончено """
+        self.save_worker = None
+        self.set_buttons_enabled(True)
         QtWidgets.QMessageBox.warning(
             self,
             "Готово",
             "Данные сохранены в ПЗУ",
             QtWidgets.QMessageBox.Ok)
+
+    def save_failed(self, error: Exception) -> None:
+        """ Сохранение закончилось ошибкой, изменения не записаны """
+        self.save_worker = None
+        self.set_buttons_enabled(True)
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Ошибка",
+            f"Данные не сохранены: {error}",
+            QtWidgets.QMessageBox.Ok)
@@ -1,5 +1,8 @@
 from PySide6 import QtWidgets
 from models.budget import Budget
+from view.workers import run_in_background
+from view.period_picker import PeriodPicker
+from view.dialogs import show_error
 
 
 class BudgetApp(QtWidgets.QMainWindow):
@@ -54,17 +57,41 @@ class BudgetApp(QtWidgets.QMainWindow):
         self.setCentralWidget(
             self.budget_input_widget
         )
+        # окно растёт вместе с полями выбора периода
+        self.setMinimumSize(0, 0)
+        self.setMaximumSize(16777215, 16777215)
+        self.layout().setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
 
     def handle_budget_creation(self, budget) -> None:
         """
-        Обработать создание бюджета.
+        Обработать создание бюджета: сумма трат за период
+        считается в фоновом потоке.
 
         Args:
             budget(Budget):
             Бюджет, созданный пользователем выше
         """
         expenses_repo = self.main_app.expense_repo
-        result = budget.update_spent_sum(expenses_repo)
+        run_in_background(
+            lambda worker: budget.update_spent_sum(expenses_repo),
+            on_finished=self.show_budget_result,
+            on_error=self.show_budget_error)
+
+    def show_budget_error(self, error: Exception) -> None:
+        """ Не удалось посчитать траты за период """
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Ошибка",
+            f"Не удалось посчитать траты: {error}",
+            QtWidgets.QMessageBox.Ok)
+
+    def show_budget_result(self, result: float) -> None:
+        """
+        Показать, сколько осталось от бюджета.
+
+        Args:
+            result(float): Разница между бюджетом и тратами.
+        """
         if result > 0:
             QtWidgets.QMessageBox.warning(
                 self,
@@ -107,10 +134,8 @@ class BudgetInputWidget(QtWidgets.QWidget):
         self.period_label = QtWidgets.QLabel(
             "Период планирования:"
         )
-        self.period_combobox = QtWidgets.QComboBox()
-        self.period_combobox.addItems(
-            ['Empty', 'Day', 'Week', 'Month']
-        )
+        self.period_picker = PeriodPicker('Empty')
+        self.period_combobox = self.period_picker.combobox
         self.amount_label = QtWidgets.QLabel("Сумма трат:")
         self.amount_input = QtWidgets.QLineEdit()
         self.amount_input.setText('0')
@@ -119,7 +144,7 @@ class BudgetInputWidget(QtWidgets.QWidget):
             self.create_budget
         )
         layout.addWidget(self.period_label)
-        layout.addWidget(self.period_combobox)
+        layout.addWidget(self.period_picker)
         layout.addWidget(self.amount_label)
         layout.addWidget(self.amount_input)
         layout.addWidget(self.submit_button)
@@ -129,9 +154,14 @@ class BudgetInputWidget(QtWidgets.QWidget):
         """
         Создать бюджет на основе введенной информации.
         """
-        period = self.period_combobox.currentText()
+        period = self.period_picker.period()
         amount = float(self.amount_input.text())
-        budg = Budget(time=period, budget=float(amount))
+        try:
+            budg = Budget(time=period, budget=float(amount))
+        except ValueError as error:
+            # например, диапазон дат с концом раньше начала
+            show_error(self, error)
+            return
         budg.time = period
         budg.budget = float(amount)
         self.parent().handle_budget_creation(budg)
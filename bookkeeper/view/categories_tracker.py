@@ -1,7 +1,6 @@
 from PySide6 import QtWidgets
 from models.category import Category
-import networkx as nx
-import matplotlib.pyplot as plt
+from view.category_model import CategoryTreeModel
 
 
 def visualization(categories) -> None:
@@ -11,6 +10,9 @@ def visualization(categories) -> None:
     Args:
         categories (list[Category]): Список категорий.
     """
+    # тяжёлые библиотеки нужны только здесь: не грузим их при старте
+    import networkx as nx
+    import matplotlib.pyplot as plt
     G = nx.DiGraph()
     for category in categories:
         G.add_node(category.pk, label=category.name)
@@ -49,6 +51,8 @@ class CategoryApp(QtWidgets.QMainWindow):
         self.resize(800, 600)
         self.central_widget = QtWidgets.QWidget()
         self.setCentralWidget(self.central_widget)
+        self.categories_model = CategoryTreeModel(
+            main_app.category_repo, self)
         self.init_ui()
 
     def go_back(self) -> None:
@@ -62,23 +66,23 @@ class CategoryApp(QtWidgets.QMainWindow):
         """
         Инициализация пользовательского интерфейса.
         """
-        # Создаем таблицу
-        self.categories_table = QtWidgets.QTableWidget()
-        self.categories_table.setColumnCount(3)
-        self.categories_table.setHorizontalHeaderLabels(
-            ["ID", "Название", "ID родителя"]
-        )
-        header = self.categories_table.horizontalHeader()
-        header.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
-        self.categories_table.setEditTriggers(
+        # Создаем дерево категорий; дети узла загружаются
+        # моделью только при его раскрытии
+        self.categories_tree = QtWidgets.QTreeView()
+        self.categories_tree.setModel(self.categories_model)
+        self.categories_tree.setUniformRowHeights(True)
+        self.categories_tree.header().setSectionResizeMode(
+            QtWidgets.QHeaderView.Stretch)
+        self.categories_tree.setEditTriggers(
             QtWidgets.QAbstractItemView.NoEditTriggers
         )
-        self.categories_table.verticalHeader().hide()
-        self.update_table()
+        self.categories_tree.setSelectionMode(
+            QtWidgets.QAbstractItemView.SingleSelection
+        )
         vertical_layout = QtWidgets.QVBoxLayout(
             self.central_widget
         )
-        vertical_layout.addWidget(self.categories_table)
+        vertical_layout.addWidget(self.categories_tree)
         # Создаем кнопки
         self.back_button = QtWidgets.QPushButton("Назад")
         self.add_category_button = QtWidgets.QPushButton("Добавить категорию")
@@ -113,28 +117,19 @@ class CategoryApp(QtWidgets.QMainWindow):
 
     def update_table(self) -> None:
         """
-        Обновить
-        таблицу категорий
-        (это надо чтобы отображать изменения после кликов)
+        Перестроить дерево категорий заново; отдельные изменения
+        приходят в модель событиями репозитория.
         """
-        self.categories_table.clearContents()
-        self.categories_table.setRowCount(0)
-        categories = self.main_app.category_repo.get_all()
-        for category in categories:
-            row_position = self.categories_table.rowCount()
-            self.categories_table.insertRow(row_position)
-            self.categories_table.setItem(
-                row_position,
-                0,
-                QtWidgets.QTableWidgetItem(str(category.pk)))
-            self.categories_table.setItem(
-                row_position,
-                1,
-                QtWidgets.QTableWidgetItem(category.name))
-            self.categories_table.setItem(
-                row_position,
-                2,
-                QtWidgets.QTableWidgetItem(str(category.parent)))
+        self.categories_model.reload()
+
+    def selected_pk(self) -> int | None:
+        """
+        pk выделенной категории или None.
+        """
+        selected_rows = self.categories_tree.selectionModel().selectedRows()
+        if not selected_rows:
+            return None
+        return self.categories_model.pk_at(selected_rows[0])
 
     def visualize_graph(self) -> None:
         """
@@ -186,29 +181,20 @@ class CategoryApp(QtWidgets.QMainWindow):
                 return
             self.main_app.category_repo.add(
                 new_category)
-            self.update_table()
 
     def edit_category(self) -> None:
         """
         Редактировать категорию.
         """
-        selected_rows = self.categories_table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            pk = int(self.categories_table.item(
-                row, 0
-            ).text())
-            current_name = self.categories_table.item(
-                row, 1
-            ).text()
-            current_parent_id = self.categories_table.item(
-                row, 2
-            ).text()
+        pk = self.selected_pk()
+        category = (None if pk is None
+                    else self.main_app.category_repo.get(pk))
+        if category is not None:
             text, ok = QtWidgets.QInputDialog.getText(
                 self,
                 'Редактировать категорию (род по ID)',
                 'Введите новые данные через запятую:',
-                text=f"{current_name}, {current_parent_id}"
+                text=f"{category.name}, {category.parent}"
             )
             if ok:
                 try:
@@ -235,7 +221,6 @@ class CategoryApp(QtWidgets.QMainWindow):
                             pk=pk)
                         self.main_app.category_repo.update(
                             updated_category)
-                        self.update_table()
                     else:
                         QtWidgets.QMessageBox.warning(
                             self,
@@ -251,9 +236,6 @@ class CategoryApp(QtWidgets.QMainWindow):
         """
         Удалить категорию.
         """
-        selected_rows = self.categories_table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            pk = int(self.categories_table.item(row, 0).text())  # Получаем pk
+        pk = self.selected_pk()
+        if pk is not None:
             self.main_app.category_repo.delete(pk)
-            self.update_table()
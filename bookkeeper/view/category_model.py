@@ -0,0 +1,322 @@
+from bisect import bisect_left, insort
+from typing import Any
+from PySide6 import QtCore
+from models.category import Category
+from repository.abstract_repository import AbstractRepository
+from repository.events import ChangeEvent, ChangeKind
+
+Qt = QtCore.Qt
+_ABSENT = object()
+
+
+class _Node:
+    """
+    Узел дерева категорий: загруженные дочерние узлы
+    и pk детей, которые ещё не переданы представлению.
+    pending is None - дети у репозитория ещё не запрашивались.
+    """
+    __slots__ = ('pk', 'parent', 'row', 'children', 'pending')
+
+    def __init__(self, pk: int | None,
+                 parent: '_Node | None' = None, row: int = 0) -> None:
+        self.pk = pk
+        self.parent = parent
+        self.row = row
+        self.children: list[_Node] = []
+        self.pending: list[int] | None = None
+
+
+class CategoryTreeModel(QtCore.QAbstractItemModel):
+    """
+    Дерево категорий поверх репозитория.
+    Дети узла запрашиваются у репозитория только при раскрытии
+    узла (canFetchMore/fetchMore) и передаются представлению
+    пачками по BATCH, так что дерево из десятков тысяч
+    категорий открывается сразу. Внутренний id индекса - pk
+    категории, сами данные берутся из репозитория в data().
+    Категории, родителя которых нет (его удалили), показываются
+    среди корневых, чтобы их можно было изменить или удалить.
+    """
+    HEADERS = ["Название", "ID"]
+    NAME, PK = range(2)
+    BATCH = 200
+
+    def __init__(self,
+                 category_repo: AbstractRepository[Category],
+                 parent: QtCore.QObject | None = None) -> None:
+        """
+        Инициализирует модель.
+
+        Args:
+            category_repo (AbstractRepository[Category]):
+            Репозиторий категорий.
+            parent (QtCore.QObject | None): Родительский объект Qt.
+        """
+        super().__init__(parent)
+        self.category_repo = category_repo
+        self._root = _Node(None)
+        self._nodes: dict[int, _Node] = {}
+        # parent -> pk детей для репозиториев без child_pks
+        # и обратное отображение pk -> parent; строятся один раз
+        # и дальше обновляются событиями репозитория
+        self._children_index: dict[int | None, list[int]] | None = None
+        self._parent_of: dict[int, int | None] = {}
+        category_repo.subscribe(self.on_category_changed)
+
+    def reload(self) -> None:
+        """ Сбросить загруженные узлы: дерево строится заново """
+        self.beginResetModel()
+        self._root = _Node(None)
+        self._nodes = {}
+        self._children_index = None
+        self._parent_of = {}
+        self.endResetModel()
+
+    def _child_pks(self, parent: int | None) -> list[int]:
+        """
+        pk дочерних категорий parent по возрастанию;
+        у корня (None) - вместе с категориями без родителя.
+        """
+        if hasattr(self.category_repo, 'child_pks'):
+            pks = self.category_repo.child_pks(parent)
+        else:
+            pks = list(self._fallback_index().get(parent, ()))
+        if parent is None:
+            pks = sorted(pks + self._orphan_pks())
+        return pks
+
+    def _has_children(self, parent: int | None) -> bool:
+        """ Есть ли у категории parent дочерние категории """
+        if hasattr(self.category_repo, 'has_children'):
+            found = self.category_repo.has_children(parent)
+        else:
+            found = bool(self._fallback_index().get(parent))
+        return found or (parent is None and bool(self._orphan_pks()))
+
+    def _orphan_pks(self) -> list[int]:
+        """ pk категорий, родителя которых нет в репозитории """
+        if hasattr(self.category_repo, 'orphan_pks'):
+            return self.category_repo.orphan_pks()
+        index = self._fallback_index()
+        return sorted(pk for parent, pks in index.items()
+                      if parent is not None and parent not in self._parent_of
+                      for pk in pks)
+
+    def _shown_parent(self, parent: int | None) -> int | None:
+        """
+        Под каким узлом показывать детей parent:
+        если категории parent нет, то в корне.
+        """
+        if parent is None or self.category_repo.get(parent) is not None:
+            return parent
+        return None
+
+    def _fallback_index(self) -> dict[int | None, list[int]]:
+        """ Индекс parent -> pk детей, построенный по get_all """
+        if self._children_index is None:
+            self._children_index = {}
+            self._parent_of = {}
+            for category in self.category_repo.get_all():
+                self._children_index.setdefault(
+                    category.parent, []).append(category.pk)
+                self._parent_of[category.pk] = category.parent
+            for pks in self._children_index.values():
+                pks.sort()
+        return self._children_index
+
+    def _reindex(self, pk: int, parent: Any = _ABSENT) -> None:
+        """
+        Переносит pk в индексе детей под parent; без parent -
+        убирает pk из индекса. Не построенный индекс не трогается.
+        """
+        if self._children_index is None:
+            return
+        old = self._parent_of.pop(pk, _ABSENT)
+        if old is not _ABSENT:
+            siblings = self._children_index[old]
+            del siblings[bisect_left(siblings, pk)]
+            if not siblings:
+                del self._children_index[old]
+        if parent is not _ABSENT:
+            insort(self._children_index.setdefault(parent, []), pk)
+            self._parent_of[pk] = parent
+
+    def _node(self, index: QtCore.QModelIndex) -> _Node:
+        """ Узел индекса; недействительный индекс - корень """
+        if not index.isValid():
+            return self._root
+        return self._nodes[index.internalId()]
+
+    def _index_of(self, node: _Node) -> QtCore.QModelIndex:
+        """ Индекс узла в первом столбце """
+        if node is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, 0, node.pk)
+
+    def pk_at(self, index: QtCore.QModelIndex) -> int:
+        """ pk категории в строке индекса """
+        return index.internalId()
+
+    def index(self, row: int, column: int,
+              parent: QtCore.QModelIndex = QtCore.QModelIndex()
+              ) -> QtCore.QModelIndex:
+        node = self._node(parent)
+        if not 0 <= row < len(node.children) \
+                or not 0 <= column < len(self.HEADERS):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row].pk)
+
+    def parent(self, index: QtCore.QModelIndex = QtCore.QModelIndex()
+               ) -> QtCore.QModelIndex:
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self._index_of(self._node(index).parent)
+
+    def rowCount(self,
+                 parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self,
+                    parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self,
+                    parent: QtCore.QModelIndex = QtCore.QModelIndex()
+                    ) -> bool:
+        if parent.column() > 0:
+            return False
+        node = self._node(parent)
+        if node.children:
+            return True
+        if node.pending is None:
+            return self._has_children(node.pk)
+        return bool(node.pending)
+
+    def canFetchMore(self, parent: QtCore.QModelIndex) -> bool:
+        if parent.column() > 0:
+            return False
+        node = self._node(parent)
+        if node.pending is None:
+            return self._has_children(node.pk)
+        return bool(node.pending)
+
+    def fetchMore(self, parent: QtCore.QModelIndex) -> None:
+        """ Передать представлению следующую пачку детей узла """
+        node = self._node(parent)
+        if node.pending is None:
+            node.pending = self._child_pks(node.pk)
+        batch = node.pending[:self.BATCH]
+        if not batch:
+            return
+        del node.pending[:self.BATCH]
+        first = len(node.children)
+        self.beginInsertRows(parent, first, first + len(batch) - 1)
+        for row, pk in enumerate(batch, first):
+            child = _Node(pk, node, row)
+            node.children.append(child)
+            self._nodes[pk] = child
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QtCore.QModelIndex,
+             role: int = Qt.DisplayRole) -> Any:
+        """ Название или pk категории (DisplayRole), pk (UserRole) """
+        if not index.isValid():
+            return None
+        pk = index.internalId()
+        if role == Qt.UserRole:
+            return pk
+        if role != Qt.DisplayRole:
+            return None
+        if index.column() == self.PK:
+            return str(pk)
+        category = self.category_repo.get(pk)
+        return None if category is None else category.name
+
+    def _parent_node(self, parent: int | None) -> _Node | None:
+        """ Загруженный узел категории parent (None - корень) """
+        if parent is None:
+            return self._root
+        return self._nodes.get(parent)
+
+    def _insert(self, pk: int, parent: int | None) -> None:
+        """ Показать новую категорию pk под parent """
+        parent = self._shown_parent(parent)
+        node = self._parent_node(parent)
+        if node is None:
+            # родитель ещё не загружен: категория появится при fetchMore
+            return
+        if node.pending is None:
+            if self._child_pks(parent) != [pk]:
+                return
+            # первый ребёнок узла: показываем его сразу,
+            # чтобы у узла появилась стрелка раскрытия
+            node.pending = []
+        if node.pending:
+            node.pending.append(pk)
+            return
+        row = len(node.children)
+        self.beginInsertRows(self._index_of(node), row, row)
+        child = _Node(pk, node, row)
+        node.children.append(child)
+        self._nodes[pk] = child
+        self.endInsertRows()
+
+    def _remove(self, pk: int) -> None:
+        """ Убрать категорию pk вместе с загруженными потомками """
+        node = self._nodes.get(pk)
+        if node is None:
+            # категория могла ждать своей пачки в fetchMore
+            for waiting in (self._root, *self._nodes.values()):
+                if waiting.pending and pk in waiting.pending:
+                    waiting.pending.remove(pk)
+            return
+        parent_node = node.parent
+        self.beginRemoveRows(self._index_of(parent_node), node.row, node.row)
+        del parent_node.children[node.row]
+        for sibling in parent_node.children[node.row:]:
+            sibling.row -= 1
+        stack = [node]
+        while stack:
+            removed = stack.pop()
+            self._nodes.pop(removed.pk, None)
+            stack.extend(removed.children)
+        self.endRemoveRows()
+
+    def on_category_changed(self, event: ChangeEvent) -> None:
+        """
+        Добавить, обновить, переместить или удалить
+        узел одной категории.
+        """
+        category = event.obj
+        if event.kind is ChangeKind.DELETED:
+            self._reindex(event.pk)
+        else:
+            self._reindex(event.pk, category.parent)
+        if event.kind is ChangeKind.ADDED:
+            self._insert(event.pk, category.parent)
+        elif event.kind is ChangeKind.DELETED:
+            self._remove(event.pk)
+            # дети удалённой категории остаются без родителя
+            # и переходят в корень
+            for child in self._child_pks(event.pk):
+                self._insert(child, None)
+        else:
+            node = self._nodes.get(event.pk)
+            if node is not None \
+                    and node.parent.pk == self._shown_parent(category.parent):
+                self.dataChanged.emit(
+                    self._index_of(node),
+                    self.createIndex(node.row, len(self.HEADERS) - 1,
+                                     node.pk))
+                return
+            # категория сменила родителя
+            self._remove(event.pk)
+            self._insert(event.pk, category.parent)
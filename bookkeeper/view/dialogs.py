@@ -0,0 +1,17 @@
+from PySide6 import QtWidgets
+
+
+def show_error(parent: QtWidgets.QWidget | None, error: Exception,
+               title: str = 'Ошибка') -> None:
+    """
+    Показать пользователю ошибку из модели, репозитория
+    или utils: они сами ничего не знают о Qt и только
+    выбрасывают исключения.
+
+    Args:
+        parent (QtWidgets.QWidget | None): Окно, над которым
+        показывается сообщение.
+        error (Exception): Ошибка, её текст - текст сообщения.
+        title (str): Заголовок окна сообщения.
+    """
+    QtWidgets.QMessageBox.warning(parent, title, str(error))
@@ -0,0 +1,217 @@
+from typing import Any
+from PySide6 import QtCore
+from models.expense import Expense
+from repository.abstract_repository import AbstractRepository
+from repository.events import ChangeEvent, ChangeKind
+import utils
+
+Qt = QtCore.Qt
+
+
+class ExpenseTableModel(QtCore.QAbstractTableModel):
+    """
+    Модель таблицы расходов поверх репозитория.
+    Хранит только pk строк, сами данные берутся из репозитория
+    в data() - то есть только для строк, которые видны на экране.
+    Изменения приходят событиями репозитория и затрагивают
+    только свою строку.
+    """
+    HEADERS = ["Дата", "Сумма", "Категория", "Комментарий", "PK"]
+    DATE, AMOUNT, CATEGORY, COMMENT, PK = range(5)
+
+    def __init__(self,
+                 expense_repo: AbstractRepository[Expense],
+                 category_repo: Any,
+                 parent: QtCore.QObject | None = None) -> None:
+        """
+        Инициализирует модель.
+
+        Args:
+            expense_repo (AbstractRepository[Expense]): Репозиторий расходов.
+            category_repo: Репозиторий категорий
+            (нужен get_category_name_by_id).
+            parent (QtCore.QObject | None): Родительский объект Qt.
+        """
+        super().__init__(parent)
+        self.expense_repo = expense_repo
+        self.category_repo = category_repo
+        self._pks: list[int] = []
+        # pk -> строка; после удаления строки номера строк,
+        # начиная с _stale_from, пересчитываются при обращении
+        self._rows: dict[int, int] = {}
+        self._stale_from: int | None = None
+        # pk, удалённые до того, как их строки пришли из загрузки
+        self._dropped: set[int] = set()
+        expense_repo.subscribe(self.on_expense_changed)
+        category_repo.subscribe(self.on_category_changed)
+
+    def reload(self) -> None:
+        """ Заново берет список расходов из репозитория """
+        self.clear()
+        self.append_pks([expense.pk for expense in
+                         self.expense_repo.get_all()])
+
+    def clear(self) -> None:
+        """ Убрать все строки, например перед фоновой загрузкой """
+        self.beginResetModel()
+        self._pks = []
+        self._rows = {}
+        self._stale_from = None
+        self._dropped = set()
+        self.endResetModel()
+
+    def append_pks(self, pks: list[int]) -> None:
+        """
+        Добавить в конец строки расходов pks. Пропускает уже
+        показанные (пришедшие событием во время загрузки)
+        и уже удалённые расходы.
+
+        Args:
+            pks (list[int]): pk расходов.
+        """
+        pks = [pk for pk in pks
+               if pk not in self._rows and pk not in self._dropped]
+        if not pks:
+            return
+        first = len(self._pks)
+        self.beginInsertRows(QtCore.QModelIndex(),
+                             first, first + len(pks) - 1)
+        self._pks.extend(pks)
+        self._rows.update(zip(pks, range(first, first + len(pks))))
+        self.endInsertRows()
+
+    def row_of(self, pk: int) -> int | None:
+        """
+        Строка расхода pk или None, если его нет в модели.
+        O(1), кроме первого обращения после удаления строк.
+        """
+        row = self._rows.get(pk)
+        if row is None or self._stale_from is None \
+                or row < self._stale_from:
+            return row
+        for row in range(self._stale_from, len(self._pks)):
+            self._rows[self._pks[row]] = row
+        self._stale_from = None
+        return self._rows[pk]
+
+    def pk_at(self, row: int) -> int:
+        """ pk расхода в строке row """
+        return self._pks[row]
+
+    def expense_at(self, row: int) -> Expense | None:
+        """ Расход в строке row """
+        return self.expense_repo.get(self._pks[row])
+
+    def rowCount(self,
+                 parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._pks)
+
+    def columnCount(self,
+                    parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QtCore.QModelIndex,
+             role: int = Qt.DisplayRole) -> Any:
+        """
+        Текст ячейки (DisplayRole) или значение для сортировки
+        (UserRole): дата, число, название категории, строка, pk.
+        """
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.UserRole):
+            return None
+        expense = self.expense_at(index.row())
+        if expense is None:
+            return None
+        column = index.column()
+        if column == self.DATE:
+            if role == Qt.UserRole:
+                return utils.as_datetime(expense.expense_date)
+            return str(expense.expense_date).split()[0]
+        if column == self.AMOUNT:
+            return expense.amount if role == Qt.UserRole \
+                else str(expense.amount)
+        if column == self.CATEGORY:
+            return str(self.category_repo.get_category_name_by_id(
+                expense.category))
+        if column == self.COMMENT:
+            return expense.comment
+        return expense.pk if role == Qt.UserRole else str(expense.pk)
+
+    def on_expense_changed(self, event: ChangeEvent) -> None:
+        """ Вставить, обновить или удалить строку одного расхода """
+        if event.kind is ChangeKind.ADDED:
+            self.append_pks([event.pk])
+            return
+        row = self.row_of(event.pk)
+        if row is None:
+            if event.kind is ChangeKind.DELETED:
+                self._dropped.add(event.pk)
+            return
+        if event.kind is ChangeKind.DELETED:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self._pks[row]
+            del self._rows[event.pk]
+            self._stale_from = row if self._stale_from is None \
+                else min(self._stale_from, row)
+            self.endRemoveRows()
+        else:
+            self.dataChanged.emit(
+                self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def on_category_changed(self, event: ChangeEvent) -> None:
+        """ Переименование категории меняет только столбец категорий """
+        if event.kind is ChangeKind.UPDATED and self._pks:
+            self.dataChanged.emit(
+                self.index(0, self.CATEGORY),
+                self.index(len(self._pks) - 1, self.CATEGORY))
+
+
+class ExpensePeriodProxy(QtCore.QSortFilterProxyModel):
+    """
+    Прокси-модель, оставляющая расходы выбранного периода
+    и сортирующая их по значениям UserRole исходной модели.
+    """
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self.period = 'all'
+        self._filter = utils.PeriodFilter()
+        self.setSortRole(Qt.UserRole)
+        self.setDynamicSortFilter(True)
+
+    def set_period(self, period: str) -> None:
+        """
+        Выбрать период отображения.
+
+        Args:
+            period (str): 'all', 'Day', 'Week' или 'Month'.
+        """
+        # beginFilterChange появился в Qt 6.9, invalidateRowsFilter
+        # с этой версии устарел
+        modern = hasattr(self, 'beginFilterChange')
+        if modern:
+            self.beginFilterChange()
+        self.period = period
+        self._filter = utils.PeriodFilter.for_period(period)
+        if modern:
+            self.endFilterChange()
+        else:
+            self.invalidateRowsFilter()
+
+    def filterAcceptsRow(self, source_row: int,
+                         source_parent: QtCore.QModelIndex) -> bool:
+        if self._filter.bounds is None:
+            return True
+        expense = self.sourceModel().expense_at(source_row)
+        if expense is None:
+            return False
+        return self._filter.contains(expense.expense_date)
+
+    def pk_at(self, row: int) -> int:
+        """ pk расхода в строке row прокси-модели """
+        source = self.mapToSource(self.index(row, 0))
+        return self.sourceModel().pk_at(source.row())
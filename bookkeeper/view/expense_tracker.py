@@ -1,7 +1,10 @@
-from PySide6 import QtWidgets
+from PySide6 import QtCore, QtWidgets
 from models.expense import Expense
-import datetime
 from models.category import Category
+from view.expense_model import ExpenseTableModel, ExpensePeriodProxy
+from view.workers import Worker, load_pks, run_in_background
+from view.dialogs import show_error
+from view.period_picker import PeriodPicker
 import utils
 
 
@@ -23,22 +26,30 @@ class ExpenseTracker(QtWidgets.QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.main_app = main_app
         self.period = 'all'
+        self.expenses_model = ExpenseTableModel(
+            main_app.expense_repo, main_app.category_repo, self)
+        self.expenses_proxy = ExpensePeriodProxy(self)
+        self.expenses_proxy.setSourceModel(self.expenses_model)
+        self.load_worker: Worker | None = None
         self.init_ui()
 
     def setup_table(self) -> None:
         """
-        Настройка таблицы расходов.
+        Настройка таблицы расходов: модель поверх репозитория
+        и прокси-модель с фильтром по периоду и сортировкой.
         """
-        self.expenses_table.setColumnCount(5)
-        self.expenses_table.setHorizontalHeaderLabels(
-            ["Дата", "Сумма", "Категория", "Комментарий", "PK"]
-        )
+        self.expenses_table.setModel(self.expenses_proxy)
+        # строки идут в порядке репозитория, пока пользователь
+        # не выберет столбец для сортировки
+        self.expenses_table.horizontalHeader().setSortIndicator(
+            -1, QtCore.Qt.AscendingOrder)
+        self.expenses_table.setSortingEnabled(True)
 
     def init_ui(self) -> None:
         """
         Инициализация пользовательского интерфейса.
         """
-        self.expenses_table = QtWidgets.QTableWidget()
+        self.expenses_table = QtWidgets.QTableView()
         self.setup_table()  # Настройка таблицы
         self.expenses_table.setSelectionBehavior(
             QtWidgets.QAbstractItemView.SelectRows
@@ -46,7 +57,6 @@ class ExpenseTracker(QtWidgets.QMainWindow):
         self.expenses_table.setSelectionMode(
             QtWidgets.QAbstractItemView.SingleSelection
         )
-        self.update_table()
         # Создаем вертикальный макет и добавляем таблицу в него
         vertical_layout = QtWidgets.QVBoxLayout(
             self.central_widget
@@ -75,6 +85,7 @@ class ExpenseTracker(QtWidgets.QMainWindow):
         vertical_layout.addWidget(self.delete_row_button)
         vertical_layout.addWidget(self.change_period_button)
         vertical_layout.addWidget(self.back_button)
+        self.update_table()
 
     def change_period(self) -> None:
         """
@@ -83,103 +94,84 @@ class ExpenseTracker(QtWidgets.QMainWindow):
         period_dialog = QtWidgets.QDialog(self)
         period_dialog.setWindowTitle("Выберите период отображения")
         layout = QtWidgets.QVBoxLayout(period_dialog)
-        period_combo = QtWidgets.QComboBox()
-        period_combo.addItems(['all', 'Month', 'Week', 'Day'])
-        layout.addWidget(period_combo)
+        period_picker = PeriodPicker('all')
+        period_picker.combobox.setCurrentText(self.period)
+        layout.addWidget(period_picker)
         ok_button = QtWidgets.QPushButton("Готово")
         layout.addWidget(ok_button)
         ok_button.clicked.connect(period_dialog.accept)
 
         if period_dialog.exec_():
-            self.period = period_combo.currentText()
+            period = period_picker.period()
+            if not utils.is_period(period):
+                show_error(self, utils.PeriodFormatError(period))
+                return
+            self.period = period
+            # расходы периода выбираются из репозитория по индексу дат
             self.update_table()
 
     def update_table(self) -> None:
         """
-        Обновление таблицы расходов после внесения изменений.
+        Заново загрузить из репозитория расходы выбранного
+        периода. Загрузка идёт в фоновом потоке, строки
+        появляются в таблице частями; незаконченная предыдущая
+        загрузка отменяется. Отдельные добавления, правки
+        и удаления приходят в модель событиями репозитория.
+        Пока идёт загрузка, репозиторий читается в её потоке,
+        поэтому добавлять, править и удалять расходы нельзя.
         """
-        outer_expenses = self.main_app.expense_repo.get_all()
-        self.expenses_table.setRowCount(0)
-        for expense in outer_expenses:
-            if isinstance(expense.expense_date, str):
-                expense_date = datetime.datetime.strptime(
-                    expense.expense_date,
-                    '%Y-%m-%d %H:%M:%S')
-            else:
-                expense_date = expense.expense_date
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+        self.set_editing_enabled(False)
+        self.expenses_model.clear()
+        self.expenses_proxy.set_period(self.period)
+        self.load_worker = run_in_background(
+            load_pks, self.main_app.expense_repo,
+            period=utils.PeriodFilter.for_period(self.period),
+            on_chunk=self.expenses_model.append_pks,
+            on_progress=self.show_load_progress,
+            on_finished=self.load_finished,
+            on_error=self.load_failed)
 
-            if self.period == 'all':
-                self.add_expense_to_table(expense)
-            else:
-                this_year, this_month, this_day = map(
-                    int, str(datetime.date.today()).split("-"))
-                expense_year, expense_month, expense_day = map(
-                    int, str(expense_date.date()).split("-"))
-                if (self.period == 'Day'
-                    and this_year == expense_year
-                    and this_month == expense_month
-                    and this_day == expense_day):
-                    self.add_expense_to_table(expense)
+    def show_load_progress(self, done: int, total: int) -> None:
+        """ Показать ход загрузки в строке состояния """
+        self.statusBar().showMessage(f"Загрузка расходов: {done} из {total}"
+                                     if total else "Загрузка расходов...")
 
-                elif self.period == 'Week':
-                    today_date = datetime.date(
-                        this_year, this_month, this_day)
-                    if isinstance(expense_date, datetime.datetime):
-                        expense_date = expense_date.date()
-                    week_start = today_date - datetime.timedelta(
-                        days=today_date.weekday()
-                    )
-                    week_end = week_start + datetime.timedelta(days=6)
-                    if week_start <= expense_date <= week_end:
-                        self.add_expense_to_table(expense)
-                elif (self.period == 'Month'
-                      and this_year == expense_year
-                      and this_month == expense_month):
-                    self.add_expense_to_table(expense)
+    def set_editing_enabled(self, enabled: bool) -> None:
+        """ Разрешить или запретить изменение расходов """
+        for button in (self.add_row_button, self.edit_row_button,
+                       self.delete_row_button):
+            button.setEnabled(enabled)
 
-    def add_expense_to_table(self, expense: Expense) -> None:
+    def load_finished(self, total: int) -> None:
+        """ Загрузка расходов закончена """
+        self.load_worker = None
+        self.set_editing_enabled(True)
+        self.statusBar().showMessage(f"Загружено расходов: {total}", 3000)
+
+    def load_failed(self, error: Exception) -> None:
+        """ Загрузка расходов закончилась ошибкой """
+        self.load_worker = None
+        self.set_editing_enabled(True)
+        self.statusBar().showMessage(f"Ошибка загрузки расходов: {error}")
+
+    def selected_pk(self) -> int | None:
         """
-        Добавление расхода в таблицу.
+        pk расхода в выделенной строке таблицы или None.
         """
-        row_position = self.expenses_table.rowCount()
-        self.expenses_table.insertRow(row_position)
-        self.expenses_table.setItem(
-            row_position, 0,
-            QtWidgets.QTableWidgetItem(
-                str(str(expense.expense_date).split()[0])))
-        self.expenses_table.setItem(
-            row_position, 1,
-            QtWidgets.QTableWidgetItem(
-                str(expense.amount)))
-        self.expenses_table.setItem(
-            row_position, 2,
-            QtWidgets.QTableWidgetItem(
-                str(
-                    self.main_app.category_repo.get_category_name_by_id(
-                        expense.category
-                    ))))
-        self.expenses_table.setItem(
-            row_position, 3,
-            QtWidgets.QTableWidgetItem(expense.comment))
-        self.expenses_table.setItem(
-            row_position, 4,
-            QtWidgets.QTableWidgetItem(
-                str(self.main_app.expense_repo.get_pk(expense))))
+        selected_rows = self.expenses_table.selectionModel().selectedRows()
+        if not selected_rows:
+            return None
+        return self.expenses_proxy.pk_at(selected_rows[0].row())
 
     def changethetable(self, expenses_list):
-        changed_list = []
-        for exp in expenses_list:
-            pure_date = str(
-                exp.expense_date).split()[0]
-            year, month, day = pure_date.split("-")
-            if utils.date_is_in_range(
-                self.period,
-                year,
-                month,
-                day
-            ):
-                changed_list.append(exp)
-        return changed_list
+        """
+        Расходы из expenses_list, попадающие в выбранный период.
+        """
+        period = utils.PeriodFilter.for_period(self.period)
+        return [exp for exp in expenses_list
+                if period.contains(exp.expense_date)]
 
     def add_row(self) -> None:
         """
@@ -198,46 +190,48 @@ class ExpenseTracker(QtWidgets.QMainWindow):
             if category_id is None:
                 new_category = Category(name=category_name, parent=None)
                 self.main_app.category_repo.add(new_category)
-                self.main_app.category_app.update_table()
                 cad = self.main_app.category_repo.get_id_by_name(
                     category_name
                 )
                 category_id = cad
 
             # Преобразование даты
-            expense_date = utils.reorder_time(date)
+            try:
+                expense_date = utils.reorder_time(date)
+            except utils.DateFormatError as error:
+                show_error(self, error)
+                return
             new_expense = Expense(
                 amount=int(amount),
                 comment=comment,
                 expense_date=expense_date,
                 category=category_id)
             self.main_app.expense_repo.add(new_expense)
-            self.update_table()
 
     def edit_row(self) -> None:
         """
         Редактирование строки расхода.
         """
-        selected_rows = self.expenses_table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            pk = int(self.expenses_table.item(
-                row,
-                self.expenses_table.columnCount() - 1
-            ).text())
-
+        pk = self.selected_pk()
+        expense = (None if pk is None
+                   else self.main_app.expense_repo.get(pk))
+        if expense is not None:
+            category_name = self.main_app.category_repo \
+                .get_category_name_by_id(expense.category)
             text, ok = QtWidgets.QInputDialog.getText(
                 self,
                 'Редактировать покупку',
                 'Введите данные через запятую:',
-                text=self.expenses_table.item(row, 0).text() + ', ' +
-                self.expenses_table.item(row, 1).text() + ', ' +
-                self.expenses_table.item(row, 2).text() + ', ' +
-                self.expenses_table.item(row, 3).text()
+                text=', '.join((
+                    str(expense.expense_date).split()[0],
+                    str(expense.amount),
+                    str(category_name),
+                    expense.comment))
             )
             if ok:
                 try:
-                    date, amount, category_name, comment = text.split(',')
+                    date, amount, category_name, comment = (
+                        part.strip() for part in text.split(','))
                     cd = self.main_app.category_repo.get_id_by_name(
                         category_name
                     )
@@ -247,18 +241,12 @@ class ExpenseTracker(QtWidgets.QMainWindow):
                             name=category_name,
                             parent=None)
                         self.main_app.category_repo.add(new_category)
-                        self.main_app.category_app.update_table()
                         cid = self.main_app.category_repo.get_id_by_name(
                             category_name
                         )
                         category_id = cid
 
-                    try:
-                        expense_date = datetime.datetime.strptime(
-                            date, '%Y-%m-%d')
-                    except ValueError:
-                        day, month, year = map(int, date.split('.'))
-                        expense_date = datetime.datetime(year, month, day)
+                    expense_date = utils.reorder_time(date)
 
                     edited_expense = Expense(
                         amount=int(amount),
@@ -267,7 +255,6 @@ class ExpenseTracker(QtWidgets.QMainWindow):
                         category=category_id,
                         pk=pk)
                     self.main_app.expense_repo.update(edited_expense)
-                    self.update_table()
                 except Exception as e:
                     QtWidgets.QMessageBox.warning(
                         self, 'Ошибка', f'Ошибка редактирования данных: {e}'
@@ -277,18 +264,14 @@ class ExpenseTracker(QtWidgets.QMainWindow):
         """
         Удаление строки расхода.
         """
-        selected_rows = self.expenses_table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            pk = int(
-                self.expenses_table.item(
-                    row, self.expenses_table.columnCount() - 1).text())
-            if pk is not None:
-                self.main_app.expense_repo.delete(pk)
-                self.update_table()  # Обновление таблицы
-            else:
-                QtWidgets.QMessageBox.warning(
-                    self, 'Ошибка', 'Объект не найден в репозитории.')
+        pk = self.selected_pk()
+        if pk is None:
+            return
+        try:
+            self.main_app.expense_repo.delete(pk)
+        except KeyError:
+            QtWidgets.QMessageBox.warning(
+                self, 'Ошибка', 'Объект не найден в репозитории.')
 
     def go_back(self) -> None:
         """
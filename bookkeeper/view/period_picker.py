@@ -0,0 +1,70 @@
+from PySide6 import QtCore, QtWidgets
+import utils
+
+# пункты с дополнительным вводом
+ROLLING = 'Last N days'
+SPAN = 'From..to'
+
+
+class PeriodPicker(QtWidgets.QWidget):
+    """
+    Выбор периода: календарные периоды из utils.PERIODS,
+    последние N дней и произвольный диапазон дат.
+    Результат - строка периода для utils.period_bounds.
+    """
+    def __init__(self, unbounded: str = 'all', parent=None) -> None:
+        """
+        Инициализация виджета выбора периода.
+
+        Args:
+            unbounded (str): Пункт "без периода" из
+            utils.UNBOUNDED_PERIODS, он идёт первым.
+            parent: Родительский виджет.
+        """
+        super().__init__(parent)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.combobox = QtWidgets.QComboBox()
+        self.combobox.addItems([unbounded, *utils.PERIODS, ROLLING, SPAN])
+        layout.addWidget(self.combobox)
+
+        self.days_input = QtWidgets.QSpinBox()
+        self.days_input.setRange(1, 3660)
+        self.days_input.setValue(30)
+        self.days_input.setSuffix(' дн.')
+        layout.addWidget(self.days_input)
+
+        today = QtCore.QDate.currentDate()
+        self.span_widget = QtWidgets.QWidget()
+        span_layout = QtWidgets.QHBoxLayout(self.span_widget)
+        span_layout.setContentsMargins(0, 0, 0, 0)
+        self.from_input = QtWidgets.QDateEdit(today.addMonths(-1))
+        self.to_input = QtWidgets.QDateEdit(today)
+        for date_input in (self.from_input, self.to_input):
+            date_input.setCalendarPopup(True)
+            date_input.setDisplayFormat('yyyy-MM-dd')
+            span_layout.addWidget(date_input)
+        layout.addWidget(self.span_widget)
+
+        self.combobox.currentTextChanged.connect(self._show_inputs)
+        self._show_inputs(self.combobox.currentText())
+
+    def _show_inputs(self, text: str) -> None:
+        """ Показать поля ввода, нужные выбранному пункту """
+        self.days_input.setVisible(text == ROLLING)
+        self.span_widget.setVisible(text == SPAN)
+
+    def period(self) -> str:
+        """
+        Выбранный период.
+
+        Returns:
+            str: Строка периода для utils.period_bounds.
+        """
+        text = self.combobox.currentText()
+        if text == ROLLING:
+            return utils.rolling_period(self.days_input.value())
+        if text == SPAN:
+            return utils.span_period(self.from_input.date().toPython(),
+                                     self.to_input.date().toPython())
+        return text
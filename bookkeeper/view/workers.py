@@ -0,0 +1,211 @@
+import threading
+from typing import Any, Callable, Iterable
+from PySide6 import QtCore
+from repository.connection import connections
+from repository.unit_of_work import unit_of_work
+
+
+class Cancelled(Exception):
+    """ Фоновая задача отменена """
+
+
+class WorkerSignals(QtCore.QObject):
+    """
+    Сигналы фоновой задачи. Объект создаётся в потоке
+    интерфейса, поэтому подключённые к сигналам функции
+    вызываются в нём же, а не в потоке задачи.
+    """
+    chunk = QtCore.Signal(object)
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+    cancelled = QtCore.Signal()
+
+
+class Worker(QtCore.QRunnable):
+    """
+    Задача для QThreadPool. Функция задачи вызывается
+    в потоке пула как fn(worker, *args, **kwargs) и через
+    worker отдаёт результат по частям (emit_chunk), сообщает
+    о ходе работы (report_progress) и проверяет отмену
+    (check_cancelled).
+    """
+    def __init__(self, fn: Callable[..., Any], *args: Any,
+                 **kwargs: Any) -> None:
+        """
+        Инициализирует задачу.
+
+        Args:
+            fn (Callable[..., Any]): Функция задачи,
+            первым аргументом получает сам Worker.
+            *args, **kwargs: Остальные аргументы функции.
+        """
+        super().__init__()
+        # объект задачи живёт, пока на него ссылается Python
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Попросить задачу остановиться. После отмены сигналы
+        задачи, кроме cancelled, в run_in_background не доходят.
+        """
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        """ Отменена ли задача """
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """ Прервать функцию задачи исключением Cancelled после отмены """
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def emit_chunk(self, chunk: Any) -> None:
+        """ Отдать очередную часть результата """
+        self.signals.chunk.emit(chunk)
+
+    def report_progress(self, done: int, total: int) -> None:
+        """ Сообщить, что сделано done из total """
+        self.signals.progress.emit(done, total)
+
+    def run(self) -> None:
+        """ Выполняется в потоке пула """
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:
+            # любая ошибка задачи передаётся в поток интерфейса
+            self.signals.failed.emit(error)
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+        finally:
+            # поток пула может завершиться, не дожидаясь выхода
+            # из программы: соединения задачи закрываются сразу
+            connections.close_current_thread()
+
+
+# запущенные задачи: держим ссылки, пока задача не завершится
+_running: set[Worker] = set()
+
+
+def run_in_background(
+        fn: Callable[..., Any], *args: Any,
+        on_chunk: Callable[[Any], Any] | None = None,
+        on_progress: Callable[[int, int], Any] | None = None,
+        on_finished: Callable[[Any], Any] | None = None,
+        on_error: Callable[[Exception], Any] | None = None,
+        on_cancelled: Callable[[], Any] | None = None,
+        pool: QtCore.QThreadPool | None = None,
+        **kwargs: Any) -> Worker:
+    """
+    Запускает fn(worker, *args, **kwargs) в пуле потоков.
+    Обработчики вызываются в потоке интерфейса; после
+    worker.cancel() вызывается только on_cancelled.
+
+    Args:
+        fn (Callable[..., Any]): Функция задачи.
+        on_chunk: Обработчик очередной части результата.
+        on_progress: Обработчик хода работы (сделано, всего).
+        on_finished: Обработчик результата функции.
+        on_error: Обработчик исключения из функции.
+        on_cancelled: Обработчик отмены.
+        pool (QtCore.QThreadPool | None): Пул потоков,
+        по умолчанию глобальный.
+
+    Returns:
+        Worker: Запущенная задача.
+    """
+    worker = Worker(fn, *args, **kwargs)
+    signals = worker.signals
+
+    def unless_cancelled(handler: Callable[..., Any]) -> Callable[..., Any]:
+        def call(*values: Any) -> None:
+            if not worker.is_cancelled():
+                handler(*values)
+        return call
+
+    if on_chunk is not None:
+        signals.chunk.connect(unless_cancelled(on_chunk))
+    if on_progress is not None:
+        signals.progress.connect(unless_cancelled(on_progress))
+    if on_finished is not None:
+        signals.finished.connect(unless_cancelled(on_finished))
+    if on_error is not None:
+        signals.failed.connect(unless_cancelled(on_error))
+    if on_cancelled is not None:
+        signals.cancelled.connect(on_cancelled)
+    for signal in (signals.finished, signals.failed, signals.cancelled):
+        signal.connect(lambda *_: _running.discard(worker))
+    _running.add(worker)
+    (pool or QtCore.QThreadPool.globalInstance()).start(worker)
+    return worker
+
+
+def load_pks(worker: Worker, repo: Any, chunk_size: int = 1000,
+             period: Any = None) -> int:
+    """
+    Задача загрузки: загружает репозиторий в память и отдаёт
+    pk его объектов частями по chunk_size. Если задан период
+    с границами, а у репозитория есть range, выбираются только
+    объекты периода - по индексу дат, без перебора всех.
+
+    Args:
+        worker (Worker): Задача.
+        repo: Репозиторий.
+        chunk_size (int): Размер части.
+        period (utils.PeriodFilter | None): Период.
+
+    Returns:
+        int: Число объектов.
+    """
+    if hasattr(repo, 'load'):
+        # число строк заранее неизвестно: 0 из 0
+        worker.report_progress(0, 0)
+        repo.load()
+    bounds = None if period is None else period.bounds
+    if bounds is not None and hasattr(repo, 'range'):
+        objects = repo.range(*bounds)
+    else:
+        objects = repo.get_all()
+    pks = [obj.pk for obj in objects]
+    for start in range(0, len(pks), chunk_size):
+        worker.check_cancelled()
+        chunk = pks[start:start + chunk_size]
+        worker.emit_chunk(chunk)
+        worker.report_progress(start + len(chunk), len(pks))
+    return len(pks)
+
+
+def save_repositories(worker: Worker, db_file: str,
+                      repos: Iterable[Any]) -> int:
+    """
+    Задача сохранения: copy_to_sqlite всех репозиториев
+    одной транзакцией. Отмена до фиксации откатывает её,
+    изменения остаются несохранёнными.
+
+    Args:
+        worker (Worker): Задача.
+        db_file (str): Файл базы данных.
+        repos (Iterable[Any]): Репозитории в порядке сохранения.
+
+    Returns:
+        int: Число сохранённых репозиториев.
+    """
+    repos = list(repos)
+    with unit_of_work(db_file):
+        for done, repo in enumerate(repos):
+            worker.check_cancelled()
+            worker.report_progress(done, len(repos))
+            repo.copy_to_sqlite()
+        worker.check_cancelled()
+    worker.report_progress(len(repos), len(repos))
+    return len(repos)
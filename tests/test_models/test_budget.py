@@ -57,3 +57,29 @@ def test_update_spent_sum_empty(expenses_repo):
     spent_difference = budget.update_spent_sum(expenses_repo)
     assert spent_difference == 0  
 
+
+def test_update_spent_sum_uses_date_range():
+    from ...bookkeeper.repository.memory_repository import MemoryRepository
+    repo = MemoryRepository('Expense', 'database_test.db',
+                            sorted_indexes=('expense_date',))
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time(12))
+    repo.add(Expense(expense_date=today, amount=100, category=1))
+    repo.add(Expense(expense_date=today - datetime.timedelta(days=40),
+                     amount=200, category=1))
+    budget = Budget()
+    budget.time = 'Day'
+    budget.budget = 1000
+    assert budget.update_spent_sum(repo) == 900
+
+
+@pytest.mark.parametrize('time', [
+    'Quarter', 'Year', 'Same month last year', 'Last 30 days',
+    '2024-01-01..2024-03-31'])
+def test_calendar_periods_are_accepted(time):
+    Budget(time=time)
+
+
+@pytest.mark.parametrize('time', ['all', 'Fortnight', '2024-03-31..2024-01-01'])
+def test_unknown_period_is_rejected(time):
+    with pytest.raises(ValueError):
+        Budget(time=time)
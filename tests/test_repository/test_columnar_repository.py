@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+import pytest
+
+from ...bookkeeper.repository.columnar_repository \
+    import ColumnarExpenseRepository
+from ...bookkeeper.repository.memory_repository import MemoryRepository
+from ...bookkeeper.repository.sqlite_repository import SQLiteRepository
+from ...bookkeeper.models.expense import Expense
+
+
+def make_expenses():
+    return [Expense(amount=amount, category=category, comment=comment,
+                    expense_date=day, added_date=datetime(2024, 5, 5))
+            for amount, category, comment, day in (
+                (100, 1, 'хлеб', datetime(2024, 4, 1, 10)),
+                (50, 2, 'такси', datetime(2024, 4, 2)),
+                (20, 1, 'хлеб', datetime(2024, 5, 2)),
+                (7, 3, '', datetime(2024, 3, 31, 23, 59)))]
+
+
+@pytest.fixture
+def repo():
+    repo = ColumnarExpenseRepository()
+    for expense in make_expenses():
+        repo.add(expense)
+    return repo
+
+
+def as_tuples(expenses):
+    return [(e.amount, e.category, e.expense_date, e.added_date,
+             e.comment, e.pk) for e in expenses]
+
+
+def test_crud(repo):
+    # даты хранятся с точностью до секунды, как в SQLite
+    expense = Expense(amount=1, category=5, comment='new',
+                      expense_date=datetime(2024, 6, 1),
+                      added_date=datetime(2024, 6, 2))
+    pk = repo.add(expense)
+    assert pk == expense.pk == 5
+    assert as_tuples([repo.get(pk)]) == as_tuples([expense])
+    assert repo.get(pk) is not expense
+
+    expense.amount = 2
+    repo.update(expense)
+    assert repo.get(pk).amount == 2
+
+    repo.delete(1)
+    assert repo.get(1) is None
+    assert repo.count() == 4
+    assert [e.pk for e in repo.get_all()] == [2, 3, 4, 5]
+    with pytest.raises(KeyError):
+        repo.delete(1)
+    with pytest.raises(ValueError):
+        repo.add(expense)
+
+
+def test_get_all_with_condition(repo):
+    assert [e.pk for e in repo.get_all({'category': 1})] == [1, 3]
+    assert [e.pk for e in repo.get_all({'comment': 'хлеб', 'amount': 20})] \
+        == [3]
+    assert repo.get_all({'comment': 'нет такого'}) == []
+    with pytest.raises(ValueError):
+        repo.get_all({'no_such_field': 1})
+
+
+def test_range(repo):
+    got = repo.range(datetime(2024, 4, 1), datetime(2024, 5, 1))
+    assert [e.amount for e in got] == [100, 50]
+    assert [e.amount for e in repo.range()] == [7, 100, 50, 20]
+
+
+def test_sum_amount_matches_memory_repository(repo):
+    memory = MemoryRepository(memory_name='Expense', db_file=':memory:',
+                              sorted_indexes=('expense_date',))
+    for expense in make_expenses():
+        memory.add(expense)
+    for group_by in ((), ('category',), ('day',), ('week',),
+                     ('month', 'category')):
+        assert repo.sum_amount(group_by) == memory.sum_amount(group_by)
+    april = (datetime(2024, 4, 1), datetime(2024, 5, 1))
+    assert repo.sum_amount(('category',), april) == {(1,): 100, (2,): 50}
+    assert repo.sum_amount(('month',)) == {
+        (date(2024, 3, 1),): 7, (date(2024, 4, 1),): 150,
+        (date(2024, 5, 1),): 20}
+    with pytest.raises(ValueError):
+        repo.sum_amount(('no_such_group',))
+
+
+def test_grouped_sums_are_exact_integers(repo):
+    # float теряет единицы после 2**53
+    big = 2 ** 53
+    for amount in (big, 1, 1):
+        repo.add(Expense(amount=amount, category=9,
+                         expense_date=datetime(2024, 6, 1)))
+    totals = repo.sum_amount(('category',))
+    assert totals[(9,)] == big + 2
+    assert type(totals[(9,)]) is int
+    assert repo.sum_amount(('month', 'category'))[
+        (date(2024, 6, 1), 9)] == big + 2
+
+
+def test_from_sqlite(tmp_path, repo):
+    table = SQLiteRepository(str(tmp_path / 'columnar_test.db'), Expense)
+    table.add_many(make_expenses())
+    loaded = ColumnarExpenseRepository.from_sqlite(table)
+    assert as_tuples(loaded.get_all()) == as_tuples(repo.get_all())
+    assert loaded.add(Expense(amount=1, category=1)) == 5
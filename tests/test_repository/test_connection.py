@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+
+import pytest
+
+from ...bookkeeper.repository.connection import ConnectionManager
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / 'connection_test.db')
+
+
+@pytest.fixture
+def manager():
+    manager = ConnectionManager(pragmas={'cache_size': -2000})
+    yield manager
+    manager.close()
+
+
+def test_one_connection_per_thread(manager, db_file):
+    connection = manager.get(db_file)
+    assert manager.get(db_file) is connection
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.get(db_file)))
+    thread.start()
+    thread.join()
+    assert other[0] is not connection
+
+
+def test_pragmas(manager, db_file):
+    connection = manager.get(db_file)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert connection.execute("PRAGMA cache_size").fetchone()[0] == -2000
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_close(manager, db_file):
+    connection = manager.get(db_file)
+    manager.close(db_file)
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+    assert manager.get(db_file) is not connection
+
+
+def test_close_current_thread(manager, db_file):
+    connection = manager.get(db_file)
+    other = []
+
+    def work():
+        other.append(manager.get(db_file))
+        manager.close_current_thread()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    with pytest.raises(sqlite3.ProgrammingError):
+        other[0].execute("SELECT 1")
+    # соединения других потоков не трогаются
+    assert manager.get(db_file) is connection
+    connection.execute("SELECT 1")
+
+
+def test_reader_does_not_block_writer(manager, db_file):
+    writer = manager.get(db_file)
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.execute("INSERT INTO t VALUES (1)")
+    writer.commit()
+
+    reader = sqlite3.connect(db_file)
+    reader.execute("BEGIN")
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+    writer.execute("INSERT INTO t VALUES (2)")
+    writer.commit()
+    # читатель видит свой снимок, пока не закончит транзакцию
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    reader.rollback()
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+    reader.close()
@@ -4,11 +4,12 @@ These tests work for RAM repository
 
 from ...bookkeeper.repository.memory_repository \
         import MemoryRepository
+from ...bookkeeper.repository.unit_of_work import unit_of_work
 
 import pytest
 from ...bookkeeper.models.expense import Expense
 from ...bookkeeper.models.category import Category
-from datetime import datetime
+from datetime import date, datetime
 
 @pytest.fixture
 def custom_class():
@@ -83,6 +84,27 @@ def test_get_id_by_name(repo):
     assert repo.get_id_by_name("Category 2") == cat2.pk
     assert repo.get_id_by_name("Nonexistent Category") is None
 
+def test_create_copy_without_pk_other_constructors(repo):
+    from dataclasses import dataclass
+
+    @dataclass
+    class Single:
+        name: str
+        pk: int = 0
+
+    @dataclass(init=False)
+    class PkFirst:
+        name: str = ''
+        comment: str = ''
+        pk: int = 0
+
+        def __init__(self, pk=0, name='', comment=''):
+            self.pk, self.name, self.comment = pk, name, comment
+
+    assert repo.create_copy_without_pk(Single('a', pk=3)) == Single('a')
+    copied = repo.create_copy_without_pk(PkFirst(pk=3, name='a', comment='b'))
+    assert (copied.pk, copied.name, copied.comment) == (0, 'a', 'b')
+
 def test_add_root_category(repo):
     # Добавляем корневую категорию и проверяем, что ее идентификатор корректен
     root_id = repo.add_root_category("Root Category")
@@ -123,6 +145,14 @@ def test_create_copy_without_pk(repo):
     assert copied_expense.expense_date == expense.expense_date
     assert hasattr(copied_expense, 'pk') 
 
+def test_create_copy_without_pk_is_shallow(repo):
+    category = Category(name='Food', parent=None)
+    repo.add(category)
+    copied = repo.create_copy_without_pk(category)
+    assert copied is not category
+    assert (copied.name, copied.parent, copied.pk) == ('Food', None, 0)
+    assert repo.add_without_pk(category) != category.pk
+
 def test_add_root_category(repo):
     # Добавляем корневую категорию и получаем ее идентификатор
     root_id = repo.add_root_category("Root Category")
@@ -154,3 +184,302 @@ def test_get_category_name_by_id(repo):
     assert repo.get_category_name_by_id(cat1.pk) == "Category 1"
     assert repo.get_category_name_by_id(cat2.pk) == "Category 2"
     assert repo.get_category_name_by_id(999) is None  # Несуществующий идентификатор
+
+@pytest.fixture
+def exp_db(tmp_path):
+    return str(tmp_path / 'memory_test.db')
+
+def test_copy_to_sqlite_flushes_only_changes(exp_db):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    expenses = [Expense(amount=i, category=1, comment=str(i)) for i in range(3)]
+    for e in expenses:
+        repo.add(e)
+    assert repo.has_changes()
+    repo.copy_to_sqlite()
+    assert not repo.has_changes()
+
+    expenses[0].amount = 100
+    repo.update(expenses[0])
+    repo.delete(expenses[1].pk)
+    new = Expense(amount=5, category=2, comment='new')
+    repo.add(new)
+    repo.copy_to_sqlite()
+
+    reloaded = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    assert sorted(e.pk for e in reloaded.get_all()) == [1, 3, 4]
+    assert reloaded.get(1).amount == 100
+    assert reloaded.get(2) is None
+    assert reloaded.get(4).comment == 'new'
+
+def test_pks_are_stable_across_saves(exp_db):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    for i in range(3):
+        repo.add(Expense(amount=i, category=1))
+    repo.copy_to_sqlite()
+    repo.delete(1)
+    repo.copy_to_sqlite()
+
+    reloaded = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    assert [e.pk for e in reloaded.get_all()] == [2, 3]
+    assert reloaded.add(Expense(amount=9, category=1)) == 4
+
+def test_add_then_delete_is_not_flushed(exp_db):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    pk = repo.add(Expense(amount=1, category=1))
+    repo.delete(pk)
+    assert not repo.has_changes()
+
+def test_copy_to_sqlite_in_rolled_back_unit_of_work(exp_db):
+    expenses = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    categories = MemoryRepository(memory_name='CatMemo', db_file=exp_db)
+    expenses.add(Expense(amount=1, category=1))
+    categories.add(Category(name='Food', parent=None))
+    with pytest.raises(RuntimeError):
+        with unit_of_work(exp_db):
+            categories.copy_to_sqlite()
+            expenses.copy_to_sqlite()
+            raise RuntimeError
+    # после отката изменения всё ещё ждут сохранения
+    assert expenses.has_changes() and categories.has_changes()
+    with unit_of_work(exp_db):
+        categories.copy_to_sqlite()
+        expenses.copy_to_sqlite()
+    assert not expenses.has_changes() and not categories.has_changes()
+    reloaded = MemoryRepository(memory_name='CatMemo', db_file=exp_db)
+    assert [c.name for c in reloaded.get_all()] == ['Food']
+
+def test_lazy_loading(exp_db):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    for i in range(3):
+        repo.add(Expense(amount=i, category=1,
+                         expense_date=datetime(2024, 4, i + 1)))
+    repo.copy_to_sqlite()
+
+    lazy = MemoryRepository(memory_name='ExpMemo', db_file=exp_db, lazy=True)
+    assert lazy._container == {}
+    assert lazy.count() == 3
+    # страницы и суммы читаются из базы без загрузки таблицы
+    assert [e.amount for e in lazy.page(limit=2)] == [0, 1]
+    assert lazy.sum_amount() == {(): 3}
+    assert [e.amount for e in lazy.range(datetime(2024, 4, 2))] == [1, 2]
+    assert lazy._container == {}
+    # новые объекты получают pk после наибольшего pk в базе
+    assert lazy.add(Expense(amount=10, category=2)) == 4
+    assert lazy.count() == 4
+    assert [e.pk for e in lazy.get_all()] == [1, 2, 3, 4]
+    assert lazy.add(Expense(amount=11, category=2)) == 5
+
+def test_add_during_load_keeps_pks_unique(exp_db, monkeypatch):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    for i in range(3):
+        repo.add(Expense(amount=i, category=1))
+    repo.copy_to_sqlite()
+    lazy = MemoryRepository(memory_name='ExpMemo', db_file=exp_db, lazy=True)
+    first = lazy.add(Expense(amount=10, category=1))
+    read_from_db = lazy._read_from_db
+    added = []
+
+    def read_and_add():
+        # таблица ещё читается, а объект уже добавляют
+        loaded = read_from_db()
+        added.append(lazy.add(Expense(amount=11, category=1)))
+        return loaded
+
+    monkeypatch.setattr(lazy, '_read_from_db', read_and_add)
+    # добавленный объект доступен без загрузки таблицы
+    assert lazy.get(first).amount == 10 and lazy._container.keys() == {4}
+    lazy.load()
+    assert [first, *added] == [4, 5]
+    assert lazy.add(Expense(amount=12, category=1)) == 6
+    assert [e.amount for e in lazy.get_all()] == [0, 1, 2, 10, 11, 12]
+
+@pytest.mark.parametrize('bounds', [
+    (datetime(2024, 4, 2), datetime(2024, 4, 3, 12)),
+    (date(2024, 4, 2), date(2024, 4, 4)),
+    ('2024-04-02', '2024-04-03 12:00:00'),
+    (None, date(2024, 4, 3)),
+])
+def test_lazy_range_matches_loaded(exp_db, bounds):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=exp_db)
+    for i in range(4):
+        repo.add(Expense(amount=i, category=1,
+                         expense_date=datetime(2024, 4, i + 1, 10)))
+    repo.copy_to_sqlite()
+    lazy = MemoryRepository(memory_name='ExpMemo', db_file=exp_db, lazy=True)
+    in_db = [e.pk for e in lazy.range(*bounds)]
+    assert lazy._container == {}
+    assert in_db and in_db == [e.pk for e in repo.range(*bounds)]
+
+def test_change_events(repo):
+    events = []
+    repo.subscribe(events.append)
+    category = Category(name='Food', parent=None)
+    pk = repo.add(category)
+    repo.update(category)
+    repo.delete(pk)
+    assert [(e.kind.value, e.pk, e.obj) for e in events] == [
+        ('added', pk, category), ('updated', pk, category),
+        ('deleted', pk, category)]
+    repo.unsubscribe(events.append)
+    repo.add(Category(name='Other', parent=None))
+    assert len(events) == 3
+
+@pytest.fixture
+def indexed_repo():
+    return MemoryRepository(memory_name='Category', db_file='database_test.db',
+                            indexes=('name', 'parent'))
+
+def test_index_lookup(indexed_repo):
+    root = Category(name='food', parent=None)
+    indexed_repo.add(root)
+    children = [Category(name=name, parent=root.pk) for name in ('meat', 'fruit')]
+    for child in children:
+        indexed_repo.add(child)
+
+    assert indexed_repo.get_id_by_name('meat') == children[0].pk
+    assert indexed_repo.get_id_by_name('nothing') is None
+    assert indexed_repo.get_all({'parent': root.pk}) == children
+    assert indexed_repo.get_all({'parent': root.pk, 'name': 'fruit'}) == [children[1]]
+    assert indexed_repo.get_all({'parent': 100}) == []
+
+def test_index_follows_update_and_delete(indexed_repo):
+    cat = Category(name='food', parent=None)
+    pk = indexed_repo.add(cat)
+    indexed_repo.update(Category(name='meal', parent=None, pk=pk))
+    assert indexed_repo.get_id_by_name('food') is None
+    assert indexed_repo.get_id_by_name('meal') == pk
+    indexed_repo.delete(pk)
+    assert indexed_repo.get_id_by_name('meal') is None
+    assert indexed_repo.get_all({'parent': None}) == []
+
+def test_index_follows_in_place_update(indexed_repo):
+    cat = Category(name='food', parent=None)
+    pk = indexed_repo.add(cat)
+    # объект меняют на месте, а потом передают в update
+    cat.name = 'meal'
+    indexed_repo.update(cat)
+    assert indexed_repo.get_id_by_name('food') is None
+    assert indexed_repo.get_id_by_name('meal') == pk
+
+@pytest.mark.parametrize('indexes', [('parent',), ()])
+def test_child_pks(indexes):
+    repo = MemoryRepository(memory_name='Category', db_file='database_test.db',
+                            indexes=indexes)
+    root = repo.add(Category(name='food', parent=None))
+    meat = repo.add(Category(name='meat', parent=root))
+    fruit = repo.add(Category(name='fruit', parent=root))
+    assert repo.child_pks(None) == [root]
+    assert repo.child_pks(root) == [meat, fruit]
+    assert repo.child_pks(meat) == []
+    assert repo.has_children(root)
+    assert not repo.has_children(fruit)
+    repo.delete(meat)
+    repo.delete(fruit)
+    assert not repo.has_children(root)
+
+def test_get_pk_value_equal_duplicates(repo):
+    date = datetime(2024, 4, 4)
+    exp1 = Expense(amount=100, category=1, expense_date=date, added_date=date)
+    exp2 = Expense(amount=100, category=1, expense_date=date, added_date=date)
+    repo.add(exp1)
+    repo.add(exp2)
+    assert repo.get_pk(exp1) == exp1.pk
+    assert repo.get_pk(exp2) == exp2.pk
+    assert exp1.pk != exp2.pk
+    assert repo.get_pk(Expense(amount=100, category=1, expense_date=date,
+                               added_date=date)) is None
+
+@pytest.fixture
+def dated_repo():
+    return MemoryRepository(memory_name='Expense', db_file='database_test.db',
+                            sorted_indexes=('expense_date',))
+
+def test_range(dated_repo):
+    dates = [datetime(2024, 4, d) for d in (5, 1, 3, 2, 4)]
+    expenses = [Expense(amount=d.day, category=1, expense_date=d) for d in dates]
+    for e in expenses:
+        dated_repo.add(e)
+
+    got = list(dated_repo.range(datetime(2024, 4, 2), datetime(2024, 4, 4)))
+    assert [e.expense_date.day for e in got] == [2, 3]
+    assert [e.amount for e in dated_repo.range()] == [1, 2, 3, 4, 5]
+    assert [e.amount for e in dated_repo.range(start=datetime(2024, 4, 4))] == [4, 5]
+
+def test_range_follows_update_and_delete(dated_repo):
+    expense = Expense(amount=1, category=1, expense_date=datetime(2024, 4, 1))
+    dated_repo.add(expense)
+    dated_repo.add(Expense(amount=2, category=1, expense_date='2024-04-02 10:00:00'))
+    expense.expense_date = datetime(2024, 5, 1)
+    dated_repo.update(expense)
+    assert [e.amount for e in dated_repo.range(end=datetime(2024, 5, 1))] == [2]
+    dated_repo.delete(expense.pk)
+    assert [e.amount for e in dated_repo.range()] == [2]
+
+def test_page(dated_repo):
+    for i in range(7):
+        dated_repo.add(Expense(amount=i, category=1,
+                               expense_date=datetime(2024, 4, 10 - i // 2)))
+    first = dated_repo.page(limit=3)
+    assert [e.amount for e in first] == [6, 4, 5]
+    after_key = (first[-1].expense_date, first[-1].pk)
+    assert [e.amount for e in dated_repo.page(after_key, limit=3)] == [2, 3, 0]
+    assert [e.pk for e in dated_repo.page((0, 5), order_by='pk')] == [6, 7]
+    # поле без сортированного индекса сортируется на лету
+    assert [e.amount for e in dated_repo.page(
+        (5, 6), limit=2, order_by='amount')] == [6]
+
+def test_page_index_follows_changes(dated_repo):
+    expenses = [Expense(amount=i, category=1, expense_date=datetime(2024, 4, 1))
+                for i in range(4)]
+    for e in expenses:
+        dated_repo.add(e)
+    assert [e.pk for e in dated_repo.page(order_by='pk')] == [1, 2, 3, 4]
+    assert [e.amount for e in dated_repo.page(order_by='amount')] == [0, 1, 2, 3]
+    # индексы pk и amount построены один раз и дальше поддерживаются
+    dated_repo.delete(2)
+    expenses[0].amount = 10
+    dated_repo.update(expenses[0])
+    dated_repo.add(Expense(amount=1, category=1, expense_date=datetime(2024, 4, 2)))
+    assert [e.pk for e in dated_repo.page(order_by='pk')] == [1, 3, 4, 5]
+    assert [e.pk for e in dated_repo.page((1, 3), order_by='pk')] == [4, 5]
+    assert [e.amount for e in dated_repo.page(order_by='amount')] == [1, 2, 3, 10]
+    assert dated_repo._sorted_index('pk') is dated_repo._sorted_index('pk')
+
+def test_page_and_range_on_category_fields(indexed_repo):
+    food = indexed_repo.add(Category(name='food', parent=None))
+    for name in ('Meat', 'Apples', 'Zucchini'):
+        indexed_repo.add(Category(name=name, parent=food))
+    indexed_repo.add(Category(name='Bills', parent=None))
+    # строки сравниваются как строки, а не разбираются как даты
+    assert [c.name for c in indexed_repo.page(order_by='name')] == [
+        'Apples', 'Bills', 'Meat', 'Zucchini', 'food']
+    assert [c.name for c in indexed_repo.range('A', 'M', field='name')] == [
+        'Apples', 'Bills']
+    # None (корневые) идут первыми, постранично - без потерь
+    pages, after_key = [], None
+    while True:
+        chunk = indexed_repo.page(after_key, limit=2, order_by='parent')
+        pages.append([c.name for c in chunk])
+        if len(chunk) < 2:
+            break
+        after_key = (chunk[-1].parent, chunk[-1].pk)
+    assert pages == [['food', 'Bills'], ['Meat', 'Apples'], ['Zucchini']]
+    assert [c.name for c in indexed_repo.range(end=2, field='parent')] == [
+        'Meat', 'Apples', 'Zucchini']
+
+def test_sum_amount(dated_repo):
+    from datetime import date
+    for amount, category, day in ((100, 1, datetime(2024, 4, 1, 10)),
+                                  (50, 2, datetime(2024, 4, 2)),
+                                  (20, 1, datetime(2024, 5, 2))):
+        dated_repo.add(Expense(amount=amount, category=category, expense_date=day))
+    assert dated_repo.sum_amount() == {(): 170}
+    assert dated_repo.sum_amount(
+        date_range=(datetime(2024, 4, 1), datetime(2024, 4, 2))) == {(): 100}
+    assert dated_repo.sum_amount(group_by=['day', 'category']) == {
+        (date(2024, 4, 1), 1): 100,
+        (date(2024, 4, 2), 2): 50,
+        (date(2024, 5, 2), 1): 20,
+    }
+    assert dated_repo.sum_amount(group_by=['week']) == {
+        (date(2024, 4, 1),): 150, (date(2024, 4, 29),): 20}
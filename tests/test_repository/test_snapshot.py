@@ -0,0 +1,115 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from ...bookkeeper.repository import snapshot
+from ...bookkeeper.repository.memory_repository import MemoryRepository
+from ...bookkeeper.repository.unit_of_work import unit_of_work
+from ...bookkeeper.models.category import Category
+from ...bookkeeper.models.expense import Expense
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / 'snapshot_test.db')
+
+
+def saved_repo(db_file):
+    repo = MemoryRepository(memory_name='ExpMemo', db_file=db_file,
+                            use_snapshot=True)
+    for i in range(3):
+        repo.add(Expense(amount=i, category=1, comment=str(i),
+                         expense_date=datetime(2024, 4, i + 1),
+                         added_date=datetime(2024, 4, 5)))
+    repo.copy_to_sqlite()
+    return repo
+
+
+def test_snapshot_written_on_save(db_file):
+    repo = saved_repo(db_file)
+    table = repo.expense_table
+    assert os.path.exists(snapshot.snapshot_path(table))
+    assert snapshot.read_snapshot(table) == [
+        table.to_row(obj) for obj in repo.get_all()]
+
+
+def test_warm_start_from_snapshot(db_file, monkeypatch):
+    repo = saved_repo(db_file)
+    expected = [repo.expense_table.to_row(obj) for obj in repo.get_all()]
+
+    def no_db_reads(*args, **kwargs):
+        raise AssertionError('table must not be read')
+
+    monkeypatch.setattr(type(repo.expense_table), 'iter_all', no_db_reads)
+    reloaded = MemoryRepository(memory_name='ExpMemo', db_file=db_file,
+                                use_snapshot=True)
+    assert [reloaded.expense_table.to_row(obj)
+            for obj in reloaded.get_all()] == expected
+
+
+def test_stale_snapshot_is_ignored(db_file):
+    repo = saved_repo(db_file)
+    table = repo.expense_table
+    # запись в базу мимо репозитория делает снимок устаревшим
+    table.add(Expense(amount=10, category=2,
+                      expense_date=datetime(2024, 4, 9)))
+    assert snapshot.read_snapshot(table) is None
+
+    reloaded = MemoryRepository(memory_name='ExpMemo', db_file=db_file,
+                                use_snapshot=True)
+    assert [e.amount for e in reloaded.get_all()] == [0, 1, 2, 10]
+
+
+def test_broken_snapshot_is_ignored(db_file):
+    table = saved_repo(db_file).expense_table
+    with open(snapshot.snapshot_path(table), 'r+b') as file:
+        file.write(b'garbage')
+    assert snapshot.read_snapshot(table) is None
+
+
+def test_failed_snapshot_write_does_not_fail_save(db_file, monkeypatch):
+    categories = MemoryRepository(memory_name='CatMemo', db_file=db_file,
+                                  use_snapshot=True)
+    expenses = MemoryRepository(memory_name='ExpMemo', db_file=db_file,
+                                use_snapshot=True)
+    categories.add(Category(name='food', parent=None))
+    expenses.add(Expense(amount=1, category=1,
+                         expense_date=datetime(2024, 4, 1)))
+
+    def no_space(*args, **kwargs):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(snapshot.os, 'replace', no_space)
+    with unit_of_work(db_file):
+        categories.copy_to_sqlite()
+        expenses.copy_to_sqlite()
+    assert not categories.has_changes()
+    assert not expenses.has_changes()
+    assert not os.path.exists(snapshot.snapshot_path(expenses.expense_table))
+    assert not any(name.endswith('.tmp') for name in os.listdir(
+        os.path.dirname(db_file)))
+
+    monkeypatch.undo()
+    expenses.add(Expense(amount=2, category=1,
+                         expense_date=datetime(2024, 4, 2)))
+    with unit_of_work(db_file):
+        categories.copy_to_sqlite()
+        expenses.copy_to_sqlite()
+    assert [e.amount for e in expenses.expense_table.get_all()] == [1, 2]
+
+
+def test_snapshot_survives_saves_of_other_tables(db_file):
+    table = saved_repo(db_file).expense_table
+    categories = MemoryRepository(memory_name='CatMemo', db_file=db_file,
+                                  use_snapshot=True)
+    categories.add(Category(name='food', parent=None))
+    with unit_of_work(db_file):
+        categories.copy_to_sqlite()
+    # категории сохранены, но таблица расходов не менялась
+    assert snapshot.read_snapshot(table) is not None
+    lazy = MemoryRepository(memory_name='ExpMemo', db_file=db_file,
+                            lazy=True, use_snapshot=True)
+    assert [e.amount for e in lazy.get_all()] == [0, 1, 2]
+    table.delete(1)
+    assert snapshot.read_snapshot(table) is None
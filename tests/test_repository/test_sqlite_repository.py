@@ -40,8 +40,8 @@ def test_create_table(db_file):
     expected_columns = [
         (0, 'amount', 'INTEGER', 0, None, 0),
         (1, 'category', 'INTEGER', 0, None, 0),
-        (2, 'expense_date', 'TEXT', 0, None, 0),
-        (3, 'added_date', 'TEXT', 0, None, 0),
+        (2, 'expense_date', 'DATETIME', 0, None, 0),
+        (3, 'added_date', 'DATETIME', 0, None, 0),
         (4, 'comment', 'TEXT', 0, None, 0),
         (5, 'pk', 'INTEGER', 0, None, 1)
     ]
@@ -66,7 +66,8 @@ def test_add(db_file):
     cursor = connection.cursor()
     cursor.execute("SELECT * FROM expense WHERE pk=?", (pk,))
     result = cursor.fetchone()
-    expected_result = (100, 1, '2024-04-04', '2024-04-05', 'Test', pk)
+    # даты хранятся числом секунд от начала эпохи
+    expected_result = (100, 1, 1712188800, 1712275200, 'Test', pk)
     assert result == expected_result
 
 
@@ -90,8 +91,11 @@ def test_get_all(db_file):
     assert len(expenses) == len(expenses_data)
 
     # Проверяем, что каждый полученный объект имеет ожидаемые значения атрибутов
+    # (даты возвращаются как datetime)
     for expense, data in zip(expenses, expenses_data):
         for key, value in data.items():
+            if key.endswith('_date'):
+                value = datetime.fromisoformat(value)
             assert getattr(expense, key) == value
 
 
@@ -107,3 +111,239 @@ def test_create_object(db_file):
     # Проверяем, что созданный объект имеет ожидаемые значения атрибутов
     for key, value in obj_dict.items():
         assert getattr(expense, key) == value
+
+
+def test_add_many(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    repository.add(Expense(amount=1, category=1, comment='first'))
+
+    expenses = [Expense(amount=100 + i, category=1, expense_date='2024-04-04',
+                        added_date='2024-04-05', comment=f'Test{i}')
+                for i in range(5)]
+    pks = repository.add_many(expenses)
+
+    assert pks == [expense.pk for expense in expenses]
+    assert pks == list(range(2, 7))
+
+    connection = sqlite3.connect(db_file)
+    cursor = connection.cursor()
+    cursor.execute("SELECT pk, amount, comment FROM expense ORDER BY pk")
+    rows = cursor.fetchall()
+    assert rows[1:] == [(pk, 100 + i, f'Test{i}') for i, pk in enumerate(pks)]
+
+
+def test_add_many_keeps_filled_pk(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    stored = Expense(amount=1, category=1, pk=42)
+    new = Expense(amount=2, category=1)
+    assert repository.add_many([stored, new]) == [42, new.pk]
+    assert new.pk == 1
+
+
+def test_get(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    expense = Expense(amount=100, category=1,
+                      expense_date=datetime(2024, 4, 4),
+                      added_date=datetime(2024, 4, 5, 12, 30), comment='Test')
+    pk = repository.add(expense)
+    assert repository.get(pk) == expense
+    assert repository.get(pk + 1) is None
+
+
+def test_update(db_file):
+    repository = SQLiteRepository(db_file, Category)
+    category = Category(name='food', parent=None)
+    pk = repository.add(category)
+    repository.update(Category(name='meal', parent=None, pk=pk))
+    assert repository.get(pk).name == 'meal'
+    with pytest.raises(ValueError):
+        repository.update(Category(name='meal', parent=None))
+
+
+def test_delete(db_file):
+    repository = SQLiteRepository(db_file, Category)
+    pk = repository.add(Category(name='food', parent=None))
+    repository.delete(pk)
+    assert repository.get(pk) is None
+    with pytest.raises(KeyError):
+        repository.delete(pk)
+
+
+def test_get_all_with_condition(db_file):
+    repository = SQLiteRepository(db_file, Category)
+    root = Category(name='food', parent=None)
+    repository.add(root)
+    children = [Category(name=name, parent=root.pk)
+                for name in ('meat', 'fruit')]
+    for child in children:
+        repository.add(child)
+
+    assert repository.get_all({'parent': root.pk}) == children
+    assert repository.get_all({'parent': None}) == [root]
+    assert repository.get_all({'parent': root.pk, 'name': 'fruit'}) \
+        == [children[1]]
+    with pytest.raises(ValueError):
+        repository.get_all({'name; DROP TABLE category': 1})
+
+
+def test_iter_all(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    expenses = [Expense(amount=i, category=i % 2, comment=str(i),
+                        expense_date=datetime(2024, 4, 4),
+                        added_date=datetime(2024, 4, 5))
+                for i in range(7)]
+    repository.add_many(expenses)
+
+    iterator = repository.iter_all(batch_size=3)
+    assert next(iterator) == expenses[0]
+    assert list(iterator) == expenses[1:]
+    assert list(repository.iter_all({'category': 1}, batch_size=2)) \
+        == expenses[1::2]
+
+
+def test_page(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    # одинаковые даты у соседних расходов: порядок внутри - по pk
+    expenses = [Expense(amount=i, category=1,
+                        expense_date=datetime(2024, 4, 10 - i // 2),
+                        added_date=datetime(2024, 4, 5))
+                for i in range(7)]
+    repository.add_many(expenses)
+
+    pages, after_key = [], None
+    while True:
+        chunk = repository.page(after_key, limit=3)
+        pages.append([e.amount for e in chunk])
+        if len(chunk) < 3:
+            break
+        after_key = (chunk[-1].expense_date, chunk[-1].pk)
+    assert pages == [[6, 4, 5], [2, 3, 0], [1]]
+
+    assert [e.pk for e in repository.page((0, 5), order_by='pk')] == [6, 7]
+    with pytest.raises(ValueError):
+        repository.page(order_by='no_such_field')
+
+
+def test_page_on_nullable_and_text_fields(db_file):
+    repository = SQLiteRepository(db_file, Category)
+    food = repository.add(Category(name='food', parent=None))
+    repository.add_many([Category(name=name, parent=food)
+                         for name in ('Meat', 'Apples', 'Zucchini')])
+    repository.add(Category(name='Bills', parent=None))
+    assert [c.name for c in repository.page(order_by='name')] == [
+        'Apples', 'Bills', 'Meat', 'Zucchini', 'food']
+    assert [c.name for c in repository.range('A', 'M', field='name')] == [
+        'Apples', 'Bills']
+    # после страницы, кончившейся на NULL, идут остальные строки
+    pages, after_key = [], None
+    while True:
+        chunk = repository.page(after_key, limit=1, order_by='parent')
+        pages.append([c.name for c in chunk])
+        if not chunk:
+            break
+        after_key = (chunk[-1].parent, chunk[-1].pk)
+    assert pages == [['food'], ['Bills'], ['Meat'], ['Apples'],
+                     ['Zucchini'], []]
+
+
+def test_create_table_from_annotations(db_file):
+    from dataclasses import dataclass
+    from typing import Optional
+
+    @dataclass
+    class Note:
+        text: str
+        weight: float
+        parent: Optional[int] = None
+        pk: int = 0
+
+        indexes = ('parent', ('text', 'weight'))
+
+    SQLiteRepository(db_file, Note)
+    connection = sqlite3.connect(db_file)
+    columns = connection.execute("PRAGMA table_info(note)").fetchall()
+    assert [(c[1], c[2]) for c in columns] == [
+        ('text', 'TEXT'), ('weight', 'REAL'),
+        ('parent', 'INTEGER'), ('pk', 'INTEGER')]
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(note)")}
+    assert {'idx_note_parent', 'idx_note_text_weight'} <= indexes
+
+
+def test_declared_indexes_are_used(db_file):
+    SQLiteRepository(db_file, Expense)
+    # повторное создание не должно падать
+    SQLiteRepository(db_file, Expense)
+    connection = sqlite3.connect(db_file)
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM expense "
+        "WHERE expense_date >= ? AND expense_date < ?",
+        ('2024-04-01', '2024-05-01')).fetchall()
+    assert 'idx_expense_expense_date' in str(plan)
+
+
+def test_legacy_text_dates_are_migrated(db_file):
+    connection = sqlite3.connect(db_file)
+    connection.execute(
+        "CREATE TABLE expense (amount INTEGER, category INTEGER, "
+        "expense_date TEXT, added_date TEXT, comment TEXT, "
+        "pk INTEGER PRIMARY KEY AUTOINCREMENT)")
+    connection.execute(
+        "INSERT INTO expense VALUES "
+        "(100, 1, '2024-04-04 00:00:00', '2024-04-05 10:20:30.123456', 'old', 7)")
+    connection.commit()
+    connection.close()
+
+    repository = SQLiteRepository(db_file, Expense)
+    expense = repository.get(7)
+    assert expense.expense_date == datetime(2024, 4, 4)
+    assert expense.added_date == datetime(2024, 4, 5, 10, 20, 30)
+
+    connection = sqlite3.connect(db_file)
+    assert connection.execute(
+        "SELECT typeof(expense_date), typeof(added_date) FROM expense"
+    ).fetchone() == ('integer', 'integer')
+
+
+def test_range(db_file):
+    repository = SQLiteRepository(db_file, Expense)
+    repository.add_many([
+        Expense(amount=i, category=1, expense_date=datetime(2024, 4, 10 - i))
+        for i in range(5)])
+    got = repository.range(datetime(2024, 4, 7), datetime(2024, 4, 10))
+    assert [e.amount for e in got] == [3, 2, 1]
+    assert [e.amount for e in repository.range()] == [4, 3, 2, 1, 0]
+    assert [e.amount for e in repository.range(end=datetime(2024, 4, 7))] \
+        == [4]
+    with pytest.raises(ValueError):
+        list(repository.range(field='no_such_field'))
+
+
+def test_sum_amount(db_file):
+    from datetime import date
+    repository = SQLiteRepository(db_file, Expense)
+    repository.add_many([
+        Expense(amount=100, category=1, expense_date=datetime(2024, 4, 1, 10)),
+        Expense(amount=50, category=2, expense_date=datetime(2024, 4, 1, 12)),
+        Expense(amount=30, category=1, expense_date=datetime(2024, 4, 7, 23)),
+        Expense(amount=20, category=1, expense_date=datetime(2024, 5, 2)),
+    ])
+    assert repository.sum_amount() == {(): 200}
+    assert repository.sum_amount(
+        date_range=(datetime(2024, 4, 1), datetime(2024, 5, 1))) == {(): 180}
+    assert repository.sum_amount(group_by=['category']) == {(1,): 150, (2,): 50}
+    assert repository.sum_amount(group_by=['week', 'category']) == {
+        (date(2024, 4, 1), 1): 130,
+        (date(2024, 4, 1), 2): 50,
+        (date(2024, 4, 29), 1): 20,
+    }
+    assert repository.sum_amount(group_by=['month']) == {
+        (date(2024, 4, 1),): 180, (date(2024, 5, 1),): 20}
+    assert repository.sum_amount(
+        date_range=(datetime(2025, 1, 1), datetime(2025, 2, 1))) == {(): 0}
+    # границы-date и строки ISO сравниваются как даты
+    assert repository.sum_amount(
+        date_range=(date(2024, 4, 1), date(2024, 5, 1))) == {(): 180}
+    assert repository.sum_amount(
+        date_range=('2024-04-01 11:00:00', '2024-05-01')) == {(): 80}
+    with pytest.raises(ValueError):
+        repository.sum_amount(group_by=['year; DROP TABLE expense'])
@@ -0,0 +1,168 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from ...bookkeeper.repository.connection import ConnectionManager
+from ...bookkeeper.repository.unit_of_work import unit_of_work
+from ...bookkeeper.models.category import Category
+from ...bookkeeper.models.expense import Expense
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / 'uow_test.db')
+
+
+@pytest.fixture
+def manager():
+    manager = ConnectionManager()
+    yield manager
+    manager.close()
+
+
+def make_expense(category):
+    now = datetime(2024, 4, 4)
+    return Expense(amount=100, category=category, expense_date=now,
+                   added_date=now, comment='Test')
+
+
+def test_commit_once(manager, db_file):
+    statements = []
+    with unit_of_work(db_file, manager) as uow:
+        manager.get(db_file).set_trace_callback(statements.append)
+        category_pk = uow.categories.add(Category(name='Food', parent=None))
+        uow.expenses.add(make_expense(category_pk))
+        uow.expenses.add_many(
+            [make_expense(category_pk), make_expense(category_pk)])
+        assert statements.count('COMMIT') == 0
+    assert statements.count('COMMIT') == 1
+    assert len(uow.expenses.get_all({'category': category_pk})) == 3
+
+
+def test_rollback_on_error(manager, db_file):
+    with unit_of_work(db_file, manager) as uow:
+        existing = uow.expenses.add(make_expense(1))
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_file, manager) as uow:
+            uow.categories.add(Category(name='Food', parent=None))
+            uow.expenses.delete(existing)
+            raise RuntimeError
+    assert uow.categories.get_all() == []
+    assert uow.expenses.get(existing) is not None
+
+
+def test_nested_units_share_transaction(manager, db_file):
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_file, manager) as outer:
+            with unit_of_work(db_file, manager) as inner:
+                inner.categories.add(Category(name='Food', parent=None))
+            assert manager.in_unit_of_work(db_file)
+            raise RuntimeError
+    assert not manager.in_unit_of_work(db_file)
+    assert outer.categories.get_all() == []
+
+
+def test_failed_nested_unit_is_rolled_back(manager, db_file):
+    calls = []
+    with unit_of_work(db_file, manager) as outer:
+        outer.categories.add(Category(name='Food', parent=None))
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db_file, manager) as inner:
+                inner.categories.add(Category(name='Lost', parent=None))
+                manager.after_commit(db_file, lambda: calls.append('inner'))
+                raise RuntimeError
+        # внешняя единица перехватила ошибку и продолжает работу
+        with unit_of_work(db_file, manager) as inner:
+            inner.categories.add(Category(name='Kept', parent=None))
+            manager.after_commit(db_file, lambda: calls.append('kept'))
+    assert [c.name for c in outer.categories.get_all()] == ['Food', 'Kept']
+    assert calls == ['kept']
+
+
+def test_events_sent_after_commit(manager, db_file):
+    events = []
+    with unit_of_work(db_file, manager) as uow:
+        uow.expenses.subscribe(events.append)
+        pk = uow.expenses.add(make_expense(1))
+        assert events == []
+    assert [(e.kind.value, e.pk) for e in events] == [('added', pk)]
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_file, manager):
+            uow.expenses.delete(pk)
+            raise RuntimeError
+    assert len(events) == 1
+
+
+def test_after_commit(manager, db_file):
+    calls = []
+    manager.after_commit(db_file, lambda: calls.append('now'))
+    with unit_of_work(db_file, manager):
+        manager.after_commit(db_file, lambda: calls.append('commit'))
+        assert calls == ['now']
+    assert calls == ['now', 'commit']
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_file, manager):
+            manager.after_commit(db_file, lambda: calls.append('rollback'))
+            raise RuntimeError
+    assert calls == ['now', 'commit']
+
+
+def test_failing_callback_does_not_skip_others(manager, db_file, caplog):
+    calls = []
+
+    def broken():
+        raise OSError('disk full')
+
+    with unit_of_work(db_file, manager):
+        manager.after_commit(db_file, broken)
+        manager.after_commit(db_file, lambda: calls.append('after'))
+    assert calls == ['after']
+    assert 'disk full' in caplog.text
+
+
+def test_failed_commit_is_rolled_back(manager, db_file, monkeypatch):
+    class FlakyConnection(sqlite3.Connection):
+        fail_commit = False
+
+        def commit(self):
+            if self.fail_commit:
+                raise sqlite3.OperationalError('database is locked')
+            super().commit()
+
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connect(
+        *args, factory=FlakyConnection, **kwargs))
+    with pytest.raises(sqlite3.OperationalError):
+        with unit_of_work(db_file, manager) as uow:
+            uow.categories.add(Category(name='Food', parent=None))
+            manager.get(db_file).fail_commit = True
+    connection = manager.get(db_file)
+    connection.fail_commit = False
+    assert not connection.in_transaction
+    assert not manager.in_unit_of_work(db_file)
+    # следующая единица работы не фиксирует неудавшуюся
+    with unit_of_work(db_file, manager) as uow:
+        pass
+    assert uow.categories.get_all() == []
+
+
+def test_begin_rejects_open_transaction(manager, db_file):
+    connection = manager.get(db_file)
+    connection.execute("CREATE TABLE t (x INTEGER)")
+    connection.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_file, manager):
+            pass
+    assert not manager.in_unit_of_work(db_file)
+    assert connection.in_transaction
+    connection.rollback()
+
+
+def test_repositories_are_built_on_first_access(manager, db_file):
+    statements = []
+    manager.get(db_file).set_trace_callback(statements.append)
+    with unit_of_work(db_file, manager) as uow:
+        pass
+    assert not any('CREATE' in statement for statement in statements)
+    assert uow.repository(uow.expenses.cls) is uow.expenses
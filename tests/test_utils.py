@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+from ..bookkeeper import utils
+
+
+def test_reorder_time():
+    assert utils.reorder_time('2024-04-05') == datetime(2024, 4, 5)
+    assert utils.reorder_time('05.04.2024') == datetime(2024, 4, 5)
+
+
+def test_reorder_time_raises_typed_error():
+    with pytest.raises(utils.DateFormatError) as error:
+        utils.reorder_time('вчера')
+    assert isinstance(error.value, ValueError)
+    assert error.value.date == 'вчера'
+
+
+def test_core_imports_without_qt():
+    bookkeeper = os.path.join(os.path.dirname(__file__), '..', 'bookkeeper')
+    code = ('import sys, utils, models.budget, repository.memory_repository, '
+            'repository.columnar_repository; '
+            'print("PySide6" in sys.modules)')
+    output = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True,
+        text=True, env=dict(os.environ, PYTHONPATH=bookkeeper)).stdout
+    assert output.strip() == 'False'
+
+
+@pytest.mark.parametrize('time, start, end', [
+    ('Day', datetime(2024, 4, 10), datetime(2024, 4, 11)),
+    ('Week', datetime(2024, 4, 8), datetime(2024, 4, 15)),
+    ('Month', datetime(2024, 4, 1), datetime(2024, 5, 1)),
+    ('Quarter', datetime(2024, 4, 1), datetime(2024, 7, 1)),
+    ('Year', datetime(2024, 1, 1), datetime(2025, 1, 1)),
+    ('Last 7 days', datetime(2024, 4, 4), datetime(2024, 4, 11)),
+])
+def test_period_filter_bounds(time, start, end):
+    period = utils.PeriodFilter.for_period(time, today=date(2024, 4, 10))
+    assert period.bounds == (start, end)
+    assert period.contains(start)
+    assert period.contains('2024-04-10 12:30:00')
+    assert not period.contains(end)
+
+
+def test_periods_apart_from_today():
+    assert utils.period_bounds('Same month last year', date(2024, 4, 10)) \
+        == (datetime(2023, 4, 1), datetime(2023, 5, 1))
+    # последний день диапазона входит в период
+    assert utils.period_bounds('2024-02-28..2024-03-01') \
+        == (datetime(2024, 2, 28), datetime(2024, 3, 2))
+
+
+def test_calendar_periods_cross_year():
+    assert utils.period_bounds('Quarter', date(2024, 12, 31)) \
+        == (datetime(2024, 10, 1), datetime(2025, 1, 1))
+    assert utils.period_bounds('Same month last year', date(2024, 1, 15)) \
+        == (datetime(2023, 1, 1), datetime(2023, 2, 1))
+
+
+def test_period_helpers():
+    assert utils.rolling_period(30) == 'Last 30 days'
+    assert utils.span_period(date(2024, 1, 1), date(2024, 1, 31)) \
+        == '2024-01-01..2024-01-31'
+    assert utils.is_period('Empty')
+    assert utils.is_period(utils.rolling_period(1))
+
+
+@pytest.mark.parametrize('time', [
+    'Fortnight', 'Last 0 days', '2024-02-30..2024-03-01',
+    '2024-03-02..2024-03-01'])
+def test_unknown_period(time):
+    assert not utils.is_period(time)
+    with pytest.raises(utils.PeriodFormatError) as error:
+        utils.PeriodFilter.for_period(time)
+    assert error.value.time == time
+
+
+def test_unbounded_period_filter():
+    period = utils.PeriodFilter.for_period('all')
+    assert period.bounds is None
+    assert period.contains(date(1999, 1, 1))
+    assert period.mask(np.array([0, 10**9])).all()
+
+
+def test_period_filter_mask():
+    period = utils.PeriodFilter('2024-04-01', date(2024, 5, 1))
+    dates = [datetime(2024, 3, 31, 23, 59), datetime(2024, 4, 1),
+             datetime(2024, 4, 30, 23, 59), datetime(2024, 5, 1)]
+    expected = [period.contains(moment) for moment in dates]
+    assert expected == [False, True, True, False]
+    assert period.mask(np.array(dates, dtype='datetime64[s]')).tolist() \
+        == expected
+    assert period.mask(dates).tolist() == expected
+    seconds = [int(moment.replace(tzinfo=timezone.utc).timestamp())
+               for moment in dates]
+    assert period.mask(np.array(seconds)).tolist() == expected
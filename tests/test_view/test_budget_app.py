@@ -33,16 +33,21 @@ def test_go_back(app):
     assert not budget_app.isVisible()
     assert main_app.show.called
 
-def test_handle_budget_creation(app):
+def test_handle_budget_creation(app, qtbot, monkeypatch):
     main_app = Mock()
     budget_app = BudgetApp(main_app)
-    
+    warning = MagicMock()
+    monkeypatch.setattr(QtWidgets.QMessageBox, 'warning', warning)
+
     budget = Mock()
     budget.update_spent_sum.return_value = 10
     budget_app.handle_budget_creation(budget)
-    
+
+    # сумма считается в фоновом потоке
+    qtbot.waitUntil(lambda: main_app.show.called)
     assert not budget_app.isVisible()
-    assert main_app.show.called
+    budget.update_spent_sum.assert_called_once_with(main_app.expense_repo)
+    assert "10" in warning.call_args.args[2]
 
 @pytest.fixture
 def budget_input_widget(qtbot):
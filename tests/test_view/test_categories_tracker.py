@@ -1,5 +1,6 @@
 from PySide6 import QtWidgets, QtCore
 from ...bookkeeper.view.categories_tracker import CategoryApp, visualization
+from ...bookkeeper.view.category_model import CategoryTreeModel
 from unittest.mock import MagicMock, Mock
 import pytest
 from ...bookkeeper.models.category import Category
@@ -54,13 +55,9 @@ def category_app(main_app):
     return CategoryApp(main_app)
 
 def test_update_table(category_app, cat_repo):
-    category_app.categories_table = MagicMock()
-    cat_repo.get_all.return_value = [Category(pk=1, name='Category 1', parent=None)]
+    category_app.categories_model = MagicMock()
     category_app.update_table()
-    assert category_app.categories_table.clearContents.call_count == 1
-    assert category_app.categories_table.setRowCount.call_count == 1
-    assert category_app.categories_table.insertRow.call_count == 1
-    assert category_app.categories_table.setItem.call_count == 3
+    category_app.categories_model.reload.assert_called_once()
 
 
 def test_init(category_app, main_app):
@@ -96,31 +93,138 @@ def test_delete_category(category_app, cat_repo):
     selection_model_mock.selectedRows.return_value = [MagicMock(row=0)]
 
     # Вызываем метод selectionModel() и настраиваем его возвращаемое значение
-    category_app.categories_table.selectionModel = MagicMock(return_value=selection_model_mock)
+    category_app.categories_tree.selectionModel = MagicMock(return_value=selection_model_mock)
 
     # Теперь вызываем метод selectedRows() у возвращенного selectionModel
-    category_app.categories_table.selectionModel().selectedRows.return_value = [MagicMock(row=0)]
+    category_app.categories_tree.selectionModel().selectedRows.return_value = [MagicMock(row=0)]
 
 
 def test_init_ui(category_app, main_app):
-    assert category_app.categories_table.rowCount() >= 0
-    assert category_app.categories_table.columnCount() >= 0
-    assert category_app.categories_table.horizontalHeaderItem(0).text() == "ID"
-    assert category_app.categories_table.horizontalHeaderItem(1).text() == "Название"
-    assert category_app.categories_table.horizontalHeaderItem(2).text() == "ID родителя"
+    model = category_app.categories_tree.model()
+    assert model is category_app.categories_model
+    assert model.headerData(0, QtCore.Qt.Horizontal) == "Название"
+    assert model.headerData(1, QtCore.Qt.Horizontal) == "ID"
     assert category_app.back_button.text() == "Назад"
     assert category_app.add_category_button.text() == "Добавить категорию"
     assert category_app.edit_category_button.text() == "Редактировать категорию"
     assert category_app.delete_category_button.text() == "Удалить категорию"
     assert category_app.visualize_graph_button.text() == "Отобразить граф взаимосвязей"
 
+def show_categories(model, parent=QtCore.QModelIndex()):
+    """ Что покажет дерево: подгружает детей, как это делает QTreeView """
+    while model.canFetchMore(parent):
+        model.fetchMore(parent)
+    return [model.index(row, 0, parent).data()
+            for row in range(model.rowCount(parent))]
+
+
 def test_update_table_after_add_category(category_app, cat_repo):
     cat_repo.get_all.return_value = [Category(pk=0, name="Category 1", parent=None)]
+    cat_repo.get.side_effect = lambda pk: cat_repo.get_all.return_value[0]
     category_app.update_table()
-    assert category_app.categories_table.rowCount() == 1
-    assert category_app.categories_table.item(0, 0).text() == "0"
-    assert category_app.categories_table.item(0, 1).text() == "Category 1"
-    assert category_app.categories_table.item(0, 2).text() == 'None'
+    model = category_app.categories_model
+    assert show_categories(model) == ["Category 1"]
+    assert model.index(0, 1).data() == "0"
+    assert not model.hasChildren(model.index(0, 0))
+
+
+def test_tree_shows_hierarchy(category_app):
+    model = category_app.categories_model
+    assert show_categories(model) == ['name1', 'name1']
+    root = model.index(0, 0)
+    assert model.pk_at(root) == 0
+    assert model.hasChildren(root)
+    assert model.rowCount(root) == 0
+    assert show_categories(model, root) == ['name1']
+    child = model.index(0, 0, root)
+    assert model.pk_at(child) == 1
+    assert model.parent(child) == root
+    assert not model.hasChildren(model.index(1, 0))
+
+
+def test_tree_fetches_children_in_batches():
+    repo = MemoryRepository(memory_name='Category', db_file='database_test.db',
+                            indexes=('parent',))
+    root = repo.add(Category(name='root', parent=None))
+    for i in range(450):
+        repo.add(Category(name=f'child {i}', parent=root))
+    model = CategoryTreeModel(repo)
+    model.fetchMore(QtCore.QModelIndex())
+    root_index = model.index(0, 0)
+    assert model.hasChildren(root_index)
+    model.fetchMore(root_index)
+    assert model.rowCount(root_index) == model.BATCH
+    assert model.canFetchMore(root_index)
+    assert show_categories(model, root_index)[-1] == 'child 449'
+    assert not model.canFetchMore(root_index)
+
+
+def test_tree_follows_repository_events():
+    repo = MemoryRepository(memory_name='Category', db_file='database_test.db',
+                            indexes=('parent',))
+    food = repo.add(Category(name='food', parent=None))
+    other = repo.add(Category(name='other', parent=None))
+    model = CategoryTreeModel(repo)
+    assert show_categories(model) == ['food', 'other']
+    food_index = model.index(0, 0)
+
+    meat = repo.add(Category(name='meat', parent=food))
+    assert show_categories(model, food_index) == ['meat']
+    repo.update(Category(name='beef', parent=food, pk=meat))
+    assert show_categories(model, food_index) == ['beef']
+    repo.update(Category(name='beef', parent=other, pk=meat))
+    assert model.rowCount(food_index) == 0
+    other_index = model.index(1, 0)
+    assert show_categories(model, other_index) == ['beef']
+    repo.delete(food)
+    assert show_categories(model) == ['other']
+    assert model.parent(model.index(0, 0, model.index(0, 0))) \
+        == model.index(0, 0)
+
+
+@pytest.mark.parametrize('indexes', [('parent',), ()])
+def test_tree_shows_orphans_at_root(indexes):
+    repo = MemoryRepository(memory_name='Category', db_file='database_test.db',
+                            indexes=indexes)
+    food = repo.add(Category(name='food', parent=None))
+    meat = repo.add(Category(name='meat', parent=food))
+    # родителя 100 нет: категория показывается в корне
+    repo.add(Category(name='lost', parent=100))
+    model = CategoryTreeModel(repo)
+    assert show_categories(model) == ['food', 'lost']
+    show_categories(model, model.index(0, 0))
+    repo.delete(food)
+    assert show_categories(model) == ['lost', 'meat']
+    meat_index = model.index(1, 0)
+    assert model.pk_at(meat_index) == meat
+    repo.update(Category(name='beef', parent=food, pk=meat))
+    assert show_categories(model) == ['lost', 'beef']
+    repo.delete(meat)
+    assert show_categories(model) == ['lost']
+
+
+def test_tree_without_child_pks_indexes_events(tmp_path, monkeypatch):
+    from ...bookkeeper.repository.sqlite_repository import SQLiteRepository
+    repo = SQLiteRepository(str(tmp_path / 'tree.db'), Category)
+    food = repo.add(Category(name='food', parent=None))
+    other = repo.add(Category(name='other', parent=None))
+    get_all = repo.get_all
+    calls = []
+    monkeypatch.setattr(repo, 'get_all',
+                        lambda *args: calls.append(args) or get_all(*args))
+    model = CategoryTreeModel(repo)
+    assert show_categories(model) == ['food', 'other']
+    food_index = model.index(0, 0)
+
+    meat = repo.add(Category(name='meat', parent=food))
+    fish = repo.add(Category(name='fish', parent=food))
+    assert show_categories(model, food_index) == ['meat', 'fish']
+    repo.update(Category(name='meat', parent=other, pk=meat))
+    repo.delete(fish)
+    assert not model.hasChildren(food_index)
+    assert show_categories(model, model.index(1, 0)) == ['meat']
+    # индекс детей построен один раз, дальше его ведут события
+    assert len(calls) == 1
 
 
 def test_add_category_dialog_ok(category_app, cat_repo, qtbot, monkeypatch):
@@ -148,7 +252,7 @@ def test_add_category_duplicate(category_app, cat_repo, qtbot, monkeypatch):
 
 def test_edit_category_dialog_ok(category_app, cat_repo, qtbot, monkeypatch):
     cat_repo.get.return_value = Category(pk=0, name="Category 1", parent=None)
-    qtbot.mouseClick(category_app.categories_table, QtCore.Qt.LeftButton, pos=QtCore.QPoint(0, 0))
+    qtbot.mouseClick(category_app.categories_tree, QtCore.Qt.LeftButton, pos=QtCore.QPoint(0, 0))
     qtbot.keyClicks(category_app, "Edited Category, None")
     with qtbot.waitSignal(category_app.edit_category_button.clicked):
         qtbot.mouseClick(category_app.edit_category_button, QtCore.Qt.LeftButton)
@@ -156,7 +260,7 @@ def test_edit_category_dialog_ok(category_app, cat_repo, qtbot, monkeypatch):
 
 def test_edit_category_dialog_cancel(category_app, cat_repo, qtbot, monkeypatch):
     cat_repo.get.return_value = Category(pk=0, name="Category 1", parent=None)
-    qtbot.mouseClick(category_app.categories_table, QtCore.Qt.LeftButton, pos=QtCore.QPoint(0, 0))
+    qtbot.mouseClick(category_app.categories_tree, QtCore.Qt.LeftButton, pos=QtCore.QPoint(0, 0))
     qtbot.keyClicks(category_app, "Edited Category, None")
     with qtbot.assertNotEmitted(category_app.edit_category_button.clicked):
         qtbot.keyClick(category_app, QtCore.Qt.Key_Return)
@@ -189,7 +293,7 @@ def category_app(main_app):
 def test_update_table_empty(category_app, cat_repo):
     cat_repo.get_all.return_value = []
     category_app.update_table()
-    assert category_app.categories_table.rowCount() == 0
+    assert show_categories(category_app.categories_model) == []
 
 def test_go_back(category_app, main_app):
     category_app.hide = MagicMock()
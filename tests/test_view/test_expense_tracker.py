@@ -6,6 +6,7 @@ from ...bookkeeper.models.category import Category
 from ...bookkeeper.models.expense import Expense
 from ...bookkeeper.repository.memory_repository import MemoryRepository
 from ...bookkeeper.repository.abstract_repository import AbstractRepository
+from ...bookkeeper.view import expense_model
 from pytestqt import qtbot
 from datetime import datetime
 import pytestqt
@@ -22,62 +23,116 @@ def expense_tracker(main_app):
 
 
 def test_setup_table(expense_tracker):
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
     expense_tracker.setup_table()
-    assert expense_tracker.expenses_table.columnCount() == 5
-    assert expense_tracker.expenses_table.horizontalHeaderItem(0).text() == "Дата"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(1).text() == "Сумма"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(2).text() == "Категория"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(3).text() == "Комментарий"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(4).text() == "PK"
+    model = expense_tracker.expenses_table.model()
+    assert model.columnCount() == 5
+    assert [model.headerData(i, QtCore.Qt.Horizontal) for i in range(5)] \
+        == ["Дата", "Сумма", "Категория", "Комментарий", "PK"]
 
 
-def test_update_table_all(expense_tracker, main_app):
+def test_update_table_all(expense_tracker, main_app, qtbot):
     main_app.expense_repo.get_all.return_value = [
         Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"),
         Expense(expense_date=datetime(2024, 4, 5), amount=150, category=2, comment="Test2")
     ]
     expense_tracker.main_app = main_app
     expense_tracker.period = 'all'
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
     expense_tracker.update_table()
-    assert expense_tracker.expenses_table.rowCount() == 2
+    # расходы загружаются в фоновом потоке
+    qtbot.waitUntil(lambda: expense_tracker.expenses_proxy.rowCount() == 2)
 
 
 # Тесты на другие периоды, например, для 'Day', 'Week', 'Month', можно написать аналогично
 
 
-def test_add_expense_to_table(expense_tracker, main_app):
+def test_added_expense_appears_in_table(expense_tracker, main_app):
     main_app.category_repo.get_category_name_by_id.return_value = "Test Category"
-    main_app.expense_repo.get_pk.return_value = 1
-    expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
-    expense = Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test")
-    expense_tracker.add_expense_to_table(expense)
-    assert expense_tracker.expenses_table.rowCount() == 1
-
-
-def test_change_period_day(expense_tracker, main_app):
-    main_app.expense_repo.get_all.return_value = [
-        Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"),
-        Expense(expense_date=datetime(2024, 4, 5), amount=150, category=2, comment="Test2")
+    expense = Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1,
+                      comment="Test", pk=1)
+    main_app.expense_repo.get.return_value = expense
+    # классы событий - те же, что видит модель
+    expense_tracker.expenses_model.on_expense_changed(
+        expense_model.ChangeEvent(expense_model.ChangeKind.ADDED, 1, expense))
+    proxy = expense_tracker.expenses_proxy
+    assert proxy.rowCount() == 1
+    assert [proxy.index(0, column).data() for column in range(5)] \
+        == ['2024-04-04', '100', 'Test Category', 'Test', '1']
+
+
+def test_change_period_day(expense_tracker, main_app, qtbot):
+    expenses = [
+        Expense(expense_date=datetime.now(), amount=100, category=1, comment="Test", pk=1),
+        Expense(expense_date=datetime(2024, 4, 5), amount=150, category=2, comment="Test2", pk=2)
     ]
+    main_app.expense_repo.get_all.return_value = expenses
+    main_app.expense_repo.get.side_effect = lambda pk: expenses[pk - 1]
+    # расходы периода выбираются по индексу дат
+    main_app.expense_repo.range.side_effect = lambda start, end: [
+        exp for exp in expenses if start <= exp.expense_date < end]
     expense_tracker.main_app = main_app
     expense_tracker.period = 'Day'
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
     expense_tracker.update_table()
-    assert expense_tracker.expenses_table.rowCount() == 1
+    qtbot.waitUntil(lambda: expense_tracker.load_worker is None)
+    assert expense_tracker.expenses_proxy.rowCount() == 1
+    assert expense_tracker.expenses_proxy.pk_at(0) == 1
 
 # Аналогично можно добавить тесты для 'Week' и 'Month'
 
 
+def test_repository_events_update_single_rows(main_app):
+    main_app.expense_repo = MemoryRepository('Expense', ':memory:')
+    main_app.category_repo = MemoryRepository('Category', ':memory:')
+    tracker = ExpenseTracker(main_app)
+    first = Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1)
+    second = Expense(expense_date=datetime(2024, 4, 5), amount=150, category=2)
+    main_app.expense_repo.add(first)
+    main_app.expense_repo.add(second)
+    proxy = tracker.expenses_proxy
+    assert proxy.rowCount() == 2
+
+    tracker.update_table = MagicMock()
+    first.amount = 5
+    main_app.expense_repo.update(first)
+    assert proxy.index(0, 1).data() == '5'
+    main_app.expense_repo.delete(first.pk)
+    assert proxy.rowCount() == 1
+    assert proxy.pk_at(0) == second.pk
+    tracker.update_table.assert_not_called()
+
+
+def test_row_of_follows_removed_rows():
+    repo = MemoryRepository('Expense', ':memory:')
+    model = expense_model.ExpenseTableModel(
+        repo, MemoryRepository('Category', ':memory:'))
+    pks = [repo.add(Expense(expense_date=datetime(2024, 4, 4), amount=i,
+                            category=1)) for i in range(6)]
+    assert [model.row_of(pk) for pk in pks] == list(range(6))
+    repo.delete(pks[4])
+    repo.delete(pks[1])
+    changed = []
+    model.dataChanged.connect(lambda top, bottom: changed.append(top.row()))
+    repo.update(repo.get(pks[5]))
+    assert changed == [3]
+    assert [model.row_of(pk) for pk in pks] == [0, None, 1, 2, None, 3]
+    assert [model.pk_at(row) for row in range(model.rowCount())] \
+        == [pks[0], pks[2], pks[3], pks[5]]
+
+
 def test_add_row(expense_tracker, main_app, qtbot):
     main_app.category_repo.get_id_by_name.return_value = 1
     expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
     qtbot.keyClicks(expense_tracker, "2024-04-04, 100, Test Category, Test")
         
-    assert expense_tracker.expenses_table.rowCount() >=0
+    assert expense_tracker.expenses_proxy.rowCount() >=0
+
+def test_add_row_wrong_date(expense_tracker, main_app, monkeypatch):
+    monkeypatch.setattr(QtWidgets.QInputDialog, 'getText', MagicMock(
+        return_value=("вчера, 100, Test Category, Test", True)))
+    warning = MagicMock()
+    monkeypatch.setattr(QtWidgets.QMessageBox, 'warning', warning)
+    expense_tracker.add_row()
+    assert 'Неверный формат даты' in warning.call_args.args[2]
+    main_app.expense_repo.add.assert_not_called()
 
 # Тесты для edit_row и delete_row могут быть добавлены аналогичным образом
 
@@ -88,42 +143,22 @@ def test_go_back(expense_tracker, main_app):
     expense_tracker.hide.assert_called_once()
     expense_tracker.main_app.show.assert_called_once()
     
-def test_delete_row(expense_tracker, main_app, qtbot):
-    main_app.expense_repo.delete = MagicMock()
-
-    expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
-
-    # Добавляем строку в таблицу для удаления
-    expense_tracker.add_expense_to_table(Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"))
-
-    # Выбираем строку в таблице
-    expense_tracker.expenses_table.setCurrentCell(0, 0)
-    qtbot.mouseClick(expense_tracker.delete_row_button, QtCore.Qt.LeftButton)
-
-    # Проверяем, что строка удалена из таблицы
-    assert expense_tracker.expenses_table.rowCount() == 1
-
-def test_edit_row(expense_tracker, main_app, qtbot):
-    main_app.category_repo.get_id_by_name.return_value = 1
-    main_app.category_repo.get_category_name_by_id.return_value = "Test Category"
-    main_app.expense_repo.get_pk.return_value = 1
-
-    expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
-
-    # Добавляем строку в таблицу для редактирования
-    expense_tracker.add_expense_to_table(Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"))
-
-    # Выбираем строку в таблице
-    expense_tracker.expenses_table.setCurrentCell(0, 0)
+def show_expenses(expense_tracker, main_app, expenses, qtbot):
+    main_app.expense_repo.get_all.return_value = expenses
+    main_app.expense_repo.get.side_effect = \
+        lambda pk: next((e for e in expenses if e.pk == pk), None)
+    expense_tracker.update_table()
+    qtbot.waitUntil(lambda: expense_tracker.load_worker is None)
 
-    # Имитируем действие редактирования строки
-   
-    qtbot.mouseClick(expense_tracker.edit_row_button, QtCore.Qt.LeftButton)
 
-    # Проверяем, что таблица обновилась
-    assert expense_tracker.expenses_table.rowCount() == 1
+def test_editing_is_disabled_while_loading(expense_tracker, main_app, qtbot):
+    buttons = (expense_tracker.add_row_button, expense_tracker.edit_row_button,
+               expense_tracker.delete_row_button)
+    main_app.expense_repo.get_all.return_value = []
+    expense_tracker.update_table()
+    assert not any(button.isEnabled() for button in buttons)
+    qtbot.waitUntil(lambda: expense_tracker.load_worker is None)
+    assert all(button.isEnabled() for button in buttons)
 
 
 def test_init(expense_tracker, main_app):
@@ -136,21 +171,20 @@ def test_init(expense_tracker, main_app):
 
 def test_setup_table(expense_tracker):
     expense_tracker.setup_table()
-    assert expense_tracker.expenses_table.columnCount() == 5
-    assert expense_tracker.expenses_table.horizontalHeaderItem(0).text() == "Дата"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(1).text() == "Сумма"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(2).text() == "Категория"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(3).text() == "Комментарий"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(4).text() == "PK"
+    model = expense_tracker.expenses_table.model()
+    assert model.columnCount() == 5
+    assert [model.headerData(i, QtCore.Qt.Horizontal) for i in range(5)] \
+        == ["Дата", "Сумма", "Категория", "Комментарий", "PK"]
 
 
 def test_init_ui(expense_tracker):
     # Проверяем, что таблица создана и настроены ее колонки
-    assert isinstance(expense_tracker.expenses_table, QtWidgets.QTableWidget)
-    assert expense_tracker.expenses_table.columnCount() > 0
-    assert expense_tracker.expenses_table.horizontalHeaderItem(0).text() == "Дата"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(1).text() == "Сумма"
-    assert expense_tracker.expenses_table.horizontalHeaderItem(2).text() == "Категория"
+    assert isinstance(expense_tracker.expenses_table, QtWidgets.QTableView)
+    model = expense_tracker.expenses_table.model()
+    assert model.columnCount() > 0
+    assert model.headerData(0, QtCore.Qt.Horizontal) == "Дата"
+    assert model.headerData(1, QtCore.Qt.Horizontal) == "Сумма"
+    assert model.headerData(2, QtCore.Qt.Horizontal) == "Категория"
 
     # Проверяем, что созданы кнопки и установлены их тексты
     assert isinstance(expense_tracker.back_button, QtWidgets.QPushButton)
@@ -211,41 +245,36 @@ def test_changethetable(expense_tracker):
     changed_list = expense_tracker.changethetable(expenses_list)
     assert len(changed_list) == 1  # Ожидаем только один элемент, так как установлен период 'Day'
 
-def test_edit_row(expense_tracker, main_app, qtbot):
+def test_edit_row(expense_tracker, main_app, qtbot, monkeypatch):
     # Подготовим моки и данные
     main_app.category_repo.get_id_by_name.return_value = 1
     main_app.category_repo.get_category_name_by_id.return_value = "Test Category"
-    main_app.expense_repo.get_pk.return_value = 1
-    expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
-    # Добавим строку в таблицу для редактирования
-    expense_tracker.add_expense_to_table(Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"))
-    # Выберем строку в таблице
-    expense_tracker.expenses_table.setCurrentCell(0, 0)
-    # Имитируем действие редактирования строки
+    show_expenses(expense_tracker, main_app, [
+        Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test", pk=7)], qtbot)
+    dialog = MagicMock(return_value=("2024-04-06, 200, Test Category, New", True))
+    monkeypatch.setattr(QtWidgets.QInputDialog, 'getText', dialog)
+    # Выберем строку в таблице и отредактируем её
+    expense_tracker.expenses_table.selectRow(0)
     qtbot.mouseClick(expense_tracker.edit_row_button, QtCore.Qt.LeftButton)
-    # Проверим, что таблица обновилась
-    assert expense_tracker.expenses_table.rowCount() == 1
+    # В диалоге - данные расхода, в репозиторий уходит расход с тем же pk
+    assert dialog.call_args.kwargs['text'] == '2024-04-04, 100, Test Category, Test'
+    edited = main_app.expense_repo.update.call_args.args[0]
+    assert (edited.pk, edited.amount, edited.comment) == (7, 200, 'New')
 
 def test_delete_row(expense_tracker, main_app, qtbot):
     # Подготовим моки и данные
-    main_app.expense_repo.delete = MagicMock()
-    expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
-    # Добавим строку в таблицу для удаления
-    expense_tracker.add_expense_to_table(Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test"))
-    # Выберем строку в таблице
-    expense_tracker.expenses_table.setCurrentCell(0, 0)
-    # Имитируем действие удаления строки
+    show_expenses(expense_tracker, main_app, [
+        Expense(expense_date=datetime(2024, 4, 4), amount=100, category=1, comment="Test", pk=7),
+        Expense(expense_date=datetime(2024, 4, 5), amount=150, category=1, comment="Test2", pk=9)], qtbot)
+    # Выберем строку в таблице и удалим её
+    expense_tracker.expenses_table.selectRow(1)
     qtbot.mouseClick(expense_tracker.delete_row_button, QtCore.Qt.LeftButton)
-    # Проверим, что строка удалена из таблицы
-    assert expense_tracker.expenses_table.rowCount() >= 0  # Ожидаем, что после удаления строки в таблице не будет строк
+    main_app.expense_repo.delete.assert_called_once_with(9)
 
 
 def test_add_row_exception_handling(expense_tracker, main_app, qtbot):
     main_app.category_repo.get_id_by_name.side_effect = Exception("Error getting category ID")
     expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
     
     # Проверим, что добавление строки не вызывает исключения, а вместо этого выводится предупреждение
     assert not qtbot.keyClicks(expense_tracker, "2024-04-04, 100, Test Category, Test")
@@ -254,10 +283,9 @@ def test_edit_row_exception_handling(expense_tracker, main_app, qtbot):
     main_app.category_repo.get_id_by_name.return_value = 1
     main_app.category_repo.get_category_name_by_id.side_effect = Exception("Error getting category name")
     expense_tracker.main_app = main_app
-    expense_tracker.expenses_table = QtWidgets.QTableWidget()
 
     # Выберем строку в таблице
-    expense_tracker.expenses_table.setCurrentCell(0, 0)
+    expense_tracker.expenses_table.selectRow(0)
 
     # Имитируем действие редактирования строки
 
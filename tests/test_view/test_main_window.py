@@ -1,6 +1,7 @@
 import pytest
 from PySide6 import QtWidgets, QtCore
 from ...bookkeeper.view.Main_window import MainApp
+from ...bookkeeper.view import Main_window
 from ...bookkeeper.view.expense_tracker import ExpenseTracker
 from ...bookkeeper.view.categories_tracker import CategoryApp
 from ...bookkeeper.view.budget_app import BudgetApp
@@ -23,6 +24,17 @@ def test_main_app_init(main_app):
     assert isinstance(main_app.expense_tracker, ExpenseTracker)
     assert isinstance(main_app.budget_app, BudgetApp)
 
+def test_sub_windows_are_built_on_first_open(main_app):
+    assert 'expense_tracker' not in vars(main_app)
+    main_app.hide = MagicMock()
+    main_app.open_expense_tracker()
+    tracker = main_app.expense_tracker
+    # класс - тот же, что импортирует Main_window
+    assert isinstance(tracker, Main_window.ExpenseTracker)
+    assert main_app.expense_tracker is tracker
+    assert 'category_app' not in vars(main_app)
+    assert 'budget_app' not in vars(main_app)
+
 def test_main_app_init_ui(main_app):
     assert main_app.layout().count() == 4
     assert isinstance(main_app.expense_button, QtWidgets.QPushButton)
@@ -55,11 +67,15 @@ def test_main_app_open_budget_app(main_app):
     main_app.budget_app.show.assert_called_once()
     main_app.hide.assert_called_once()
 
-def test_main_app_save_and_close(main_app):
+def test_main_app_save_and_close(main_app, qtbot):
     main_app.expense_repo.copy_to_sqlite = MagicMock()
     main_app.category_repo.copy_to_sqlite = MagicMock()
     QtWidgets.QMessageBox.warning = MagicMock()
     main_app.save_and_close()
+    # сохранение идёт в фоновом потоке, кнопки недоступны до его конца
+    assert not main_app.saveandclose_button.isEnabled()
+    qtbot.waitUntil(lambda: main_app.save_worker is None)
+    assert main_app.saveandclose_button.isEnabled()
     main_app.expense_repo.copy_to_sqlite.assert_called_once()
     main_app.category_repo.copy_to_sqlite.assert_called_once()
     QtWidgets.QMessageBox.warning.assert_called_once()
@@ -82,6 +98,7 @@ def test_main_app_save_and_close_button_clicked(main_app, qtbot):
     QtWidgets.QMessageBox.warning = MagicMock()
 
     qtbot.mouseClick(main_app.saveandclose_button, QtCore.Qt.LeftButton)
+    qtbot.waitUntil(lambda: main_app.save_worker is None)
 
     main_app.expense_repo.copy_to_sqlite.assert_called_once()
     main_app.category_repo.copy_to_sqlite.assert_called_once()
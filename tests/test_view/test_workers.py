@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+from ...bookkeeper.view import workers
+from ...bookkeeper.models.expense import Expense
+from ...bookkeeper.repository.memory_repository import MemoryRepository
+
+
+def test_chunks_progress_and_result(qtbot):
+    def task(worker, n):
+        for i in range(n):
+            worker.emit_chunk(i)
+            worker.report_progress(i + 1, n)
+        return n
+
+    chunks, progress, result = [], [], []
+    workers.run_in_background(
+        task, 3,
+        on_chunk=chunks.append,
+        on_progress=lambda done, total: progress.append((done, total)),
+        on_finished=result.append)
+    qtbot.waitUntil(lambda: bool(result))
+    assert chunks == [0, 1, 2]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert result == [3]
+
+
+def test_error_is_delivered(qtbot):
+    def task(worker):
+        raise ValueError('broken')
+
+    errors = []
+    workers.run_in_background(task, on_error=errors.append)
+    qtbot.waitUntil(lambda: bool(errors))
+    assert str(errors[0]) == 'broken'
+
+
+def test_cancel(qtbot):
+    started = threading.Event()
+    release = threading.Event()
+
+    def task(worker):
+        worker.emit_chunk('early')
+        started.set()
+        release.wait(5)
+        worker.check_cancelled()
+        return 'done'
+
+    chunks, finished, cancelled = [], [], []
+    worker = workers.run_in_background(
+        task,
+        on_chunk=chunks.append,
+        on_finished=finished.append,
+        on_cancelled=lambda: cancelled.append(True))
+    assert started.wait(5)
+    worker.cancel()
+    release.set()
+    qtbot.waitUntil(lambda: bool(cancelled))
+    # часть, отданная до отмены, уже не нужна
+    assert chunks == []
+    assert finished == []
+
+
+def test_load_pks(qtbot, tmp_path):
+    repo = MemoryRepository('ExpMemo', str(tmp_path / 'load.db'))
+    for i in range(5):
+        repo.add(Expense(amount=i, category=1,
+                         expense_date=datetime(2024, 4, 1)))
+    repo.copy_to_sqlite()
+    lazy = MemoryRepository('ExpMemo', str(tmp_path / 'load.db'), lazy=True)
+
+    chunks, result = [], []
+    workers.run_in_background(workers.load_pks, lazy, chunk_size=2,
+                              on_chunk=chunks.append,
+                              on_finished=result.append)
+    qtbot.waitUntil(lambda: bool(result))
+    assert chunks == [[1, 2], [3, 4], [5]]
+    assert result == [5]
+
+
+def test_load_pks_of_period(qtbot, tmp_path):
+    from ...bookkeeper import utils
+    repo = MemoryRepository('ExpMemo', str(tmp_path / 'period.db'),
+                            sorted_indexes=('expense_date',))
+    for day in (20, 1, 15, 2):
+        repo.add(Expense(amount=day, category=1,
+                         expense_date=datetime(2024, 4, day)))
+    period = utils.PeriodFilter.for_period('2024-04-02..2024-04-15')
+
+    chunks, result = [], []
+    workers.run_in_background(workers.load_pks, repo, period=period,
+                              on_chunk=chunks.append,
+                              on_finished=result.append)
+    qtbot.waitUntil(lambda: bool(result))
+    # только расходы периода, в порядке дат
+    assert chunks == [[4, 3]]
+    assert result == [2]
+
+
+def test_worker_closes_its_connections(qtbot, tmp_path):
+    db_file = str(tmp_path / 'threads.db')
+    used = []
+
+    def task(worker):
+        used.append(workers.connections.get(db_file))
+
+    result = []
+    workers.run_in_background(task, on_finished=result.append)
+    qtbot.waitUntil(lambda: bool(result))
+    with pytest.raises(sqlite3.ProgrammingError):
+        used[0].execute("SELECT 1")
+
+
+def test_cancelled_save_is_rolled_back(tmp_path):
+    db_file = str(tmp_path / 'save.db')
+    repo = MemoryRepository('ExpMemo', db_file)
+    repo.add(Expense(amount=1, category=1, expense_date=datetime(2024, 4, 1)))
+    worker = workers.Worker(workers.save_repositories, db_file, [repo])
+    copy_to_sqlite = repo.copy_to_sqlite
+
+    def copy_and_cancel():
+        copy_to_sqlite()
+        worker.cancel()
+
+    repo.copy_to_sqlite = copy_and_cancel
+    worker.run()
+    assert repo.has_changes()
+    assert repo.expense_table.get_all() == []